@@ -1,8 +1,13 @@
 import os
+import time
+from flask import has_app_context
 from flask_caching import Cache
 
 cache = Cache()
 
+# Stand-in for the app cache when code runs outside a Flask app context.
+_local_cache = {}
+
 def init_cache(app):
     redis_url = os.environ.get('REDIS_URL')
 
@@ -33,9 +38,28 @@ CACHE_TIMEOUTS = {
     'price_history': 900,
     'supplier_reviews': 600,
     'review_statistics': 600,
+    'robots_txt': 86400,
+    'bom_alternatives': 300,
 }
 
 
 def make_cache_key(*args, **kwargs):
     from flask import request
     return f"{request.path}?{request.query_string.decode('utf-8')}"
+
+
+def shared_cache_get(key):
+    """Read from the app cache (Redis when configured), or a process-local dict outside an app context."""
+    if has_app_context():
+        return cache.get(key)
+    entry = _local_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def shared_cache_set(key, value, timeout):
+    if has_app_context():
+        cache.set(key, value, timeout=timeout)
+    else:
+        _local_cache[key] = (time.monotonic() + timeout, value)
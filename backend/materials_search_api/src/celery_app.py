@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from kombu import Queue
 
 redis_url = os.environ.get('REDIS_URL', 'redis://localhost:6390/0')
 
@@ -7,7 +8,49 @@ celery_app = Celery(
     'materials_search',
     broker=redis_url,
     backend=redis_url,
-    include=['src.tasks.sync_tasks']
+    include=['src.tasks.sync_tasks', 'src.tasks.bom_tasks']
+)
+
+# One queue per workload class so long browser scrapes, API syncs, housekeeping
+# and user-triggered jobs never wait behind each other. A worker started with
+# CELERY_WORKLOAD=<queue> (and -Q <queue>) takes that workload's settings; a
+# worker without it consumes every queue with the defaults below.
+WORKLOADS = {
+    'interactive': {
+        'concurrency': 4,
+        'prefetch_multiplier': 1,
+        'time_limit': 3600,
+        'soft_time_limit': 3300,
+    },
+    'api': {
+        'concurrency': 8,
+        'prefetch_multiplier': 4,
+        'time_limit': 1800,
+        'soft_time_limit': 1680,
+    },
+    'browser': {
+        'concurrency': 2,
+        'prefetch_multiplier': 1,
+        'time_limit': 3600,
+        'soft_time_limit': 3300,
+        # Recycle processes so a long-lived Chromium cannot grow without bound.
+        'max_tasks_per_child': 50,
+    },
+    'maintenance': {
+        'concurrency': 1,
+        'prefetch_multiplier': 1,
+        'time_limit': 7200,
+        'soft_time_limit': 6900,
+    },
+}
+DEFAULT_QUEUE = 'api'
+MAINTENANCE_TASKS = (
+    'cleanup_expired_prices',
+    'update_price_consensus',
+    'match_provider_items',
+    'resolve_canonical_materials_task',
+    'refresh_canonical_comparisons_task',
+    'normalize_unit_prices',
 )
 
 celery_app.conf.update(
@@ -21,8 +64,23 @@ celery_app.conf.update(
     task_soft_time_limit=3300,
     worker_prefetch_multiplier=1,
     worker_concurrency=2,
+    task_queues=[Queue(name) for name in WORKLOADS],
+    task_default_queue=DEFAULT_QUEUE,
+    # Provider syncs pick their queue per call (see sync_tasks.workload_queue).
+    task_routes={f'src.tasks.sync_tasks.{name}': {'queue': 'maintenance'} for name in MAINTENANCE_TASKS},
 )
 
+workload = os.environ.get('CELERY_WORKLOAD')
+if workload:
+    settings = WORKLOADS[workload]
+    celery_app.conf.update(
+        worker_concurrency=int(os.environ.get('CELERY_CONCURRENCY', settings['concurrency'])),
+        worker_prefetch_multiplier=settings['prefetch_multiplier'],
+        task_time_limit=settings['time_limit'],
+        task_soft_time_limit=settings['soft_time_limit'],
+        worker_max_tasks_per_child=settings.get('max_tasks_per_child'),
+    )
+
 celery_app.conf.beat_schedule = {
     'sync-volatile-materials-hourly': {
         'task': 'src.tasks.sync_tasks.sync_volatile_materials',
@@ -32,6 +90,27 @@ celery_app.conf.beat_schedule = {
         'task': 'src.tasks.sync_tasks.sync_full_catalog',
         'schedule': 86400.0,
     },
+    'probe-open-provider-circuits': {
+        'task': 'src.tasks.sync_tasks.probe_open_circuits',
+        'schedule': 120.0,
+    },
+    'rematch-unmatched-provider-items-daily': {
+        'task': 'src.tasks.sync_tasks.match_provider_items',
+        'schedule': 86400.0,
+        'kwargs': {'rematch': True},
+    },
+    'resolve-canonical-materials-daily': {
+        'task': 'src.tasks.sync_tasks.resolve_canonical_materials_task',
+        'schedule': 86400.0,
+    },
+    'refresh-stale-canonical-comparisons': {
+        'task': 'src.tasks.sync_tasks.refresh_canonical_comparisons_task',
+        'schedule': 600.0,
+    },
+    'normalize-unit-prices-daily': {
+        'task': 'src.tasks.sync_tasks.normalize_unit_prices',
+        'schedule': 86400.0,
+    },
     'cleanup-expired-prices': {
         'task': 'src.tasks.sync_tasks.cleanup_expired_prices',
         'schedule': 21600.0,
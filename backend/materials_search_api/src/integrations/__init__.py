@@ -1,10 +1,11 @@
-from .base import DataProviderAdapter, APIProviderAdapter, ScraperProviderAdapter, MaterialPrice, SyncResult
+from .base import DataProviderAdapter, APIProviderAdapter, ScraperProviderAdapter, MaterialPrice, SyncResult, SyncCheckpoint, ProviderError
 from .registry import provider_registry, get_provider_adapter
 
 from .demo_provider import DemoProviderAdapter
 from .rsmeans_provider import RSMeansProviderAdapter
 from .serpapi_provider import SerpApiProviderAdapter, HomeDepotProviderAdapter, LowesProviderAdapter
 from .scraper_provider import PlaywrightScraperAdapter, GraingerScraperAdapter, MCMasterScraperAdapter
+from .http_scraper_provider import HttpScraperAdapter
 
 __all__ = [
     'DataProviderAdapter',
@@ -12,6 +13,8 @@ __all__ = [
     'ScraperProviderAdapter',
     'MaterialPrice',
     'SyncResult',
+    'SyncCheckpoint',
+    'ProviderError',
     'provider_registry',
     'get_provider_adapter',
     'DemoProviderAdapter',
@@ -21,5 +24,6 @@ __all__ = [
     'LowesProviderAdapter',
     'PlaywrightScraperAdapter',
     'GraingerScraperAdapter',
-    'MCMasterScraperAdapter'
+    'MCMasterScraperAdapter',
+    'HttpScraperAdapter'
 ]
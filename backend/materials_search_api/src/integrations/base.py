@@ -1,8 +1,19 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Union
 import httpx
+from .http_cache import CachingTransport, DEFAULT_HTTP_CACHE_MODE, DEFAULT_FIXTURES_DIR, BYPASS_CACHE_HEADERS
+from .robots import get_robots_rules, get_crawl_delay, ROBOTS_USER_AGENT
+from src.services.units import parse_unit
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -19,6 +30,20 @@ class MaterialPrice:
     specifications: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class SyncCheckpoint:
+    """
+    Resumable position in a crawl, yielded by iter_prices between pages.
+
+    Everything yielded before the checkpoint belongs to pages_done pages;
+    next_url/cursor locate the next page to fetch.
+    """
+    pages_done: int
+    items_yielded: int
+    next_url: Optional[str] = None
+    cursor: Optional[str] = None
+
+
 @dataclass
 class SyncResult:
     success: bool
@@ -26,9 +51,69 @@ class SyncResult:
     items_failed: int
     error_message: Optional[str] = None
     prices: Optional[List[MaterialPrice]] = None
+    status_code: Optional[int] = None
+    retry_after: Optional[float] = None
+    retryable: bool = False
+
+
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+
+class ProviderError(RuntimeError):
+    """A provider call failed; carries what the retry policy needs to decide."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        retryable: Optional[bool] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        if retryable is None:
+            retryable = status_code in RETRYABLE_STATUS_CODES
+        self.retryable = retryable
+
+    @classmethod
+    def from_result(cls, result: 'SyncResult', provider_name: str) -> 'ProviderError':
+        return cls(
+            result.error_message or f'{provider_name} sync failed',
+            status_code=result.status_code,
+            retry_after=result.retry_after,
+            retryable=result.retryable or result.status_code in RETRYABLE_STATUS_CODES
+        )
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> 'ProviderError':
+        return cls(
+            f'HTTP {response.status_code} from {response.request.url}',
+            status_code=response.status_code,
+            retry_after=parse_retry_after(response.headers.get('retry-after'))
+        )
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header value (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
 
 
 class DataProviderAdapter(ABC):
+    # Celery queue this provider's syncs run on; see celery_app.WORKLOADS.
+    workload = 'api'
+
     def __init__(self, provider_config: Dict[str, Any]):
         self.name = provider_config.get('name', 'Unknown')
         self.base_url = provider_config.get('base_url', '')
@@ -37,13 +122,36 @@ class DataProviderAdapter(ABC):
         self.rate_limit_requests = provider_config.get('rate_limit_requests', 100)
         self.rate_limit_period = provider_config.get('rate_limit_period', 3600)
         self._client: Optional[httpx.AsyncClient] = None
+        self.items_failed = 0
+        # Per-request latency (ms) and HTTP error status counts, read by the
+        # provider health tracker after each task.
+        self.request_latencies_ms: List[float] = []
+        self.request_errors: Dict[str, int] = {}
+
+    async def _on_request(self, request: httpx.Request):
+        request.extensions['started_at'] = time.monotonic()
+
+    async def _on_response(self, response: httpx.Response):
+        started_at = response.request.extensions.get('started_at')
+        if started_at is not None:
+            self.request_latencies_ms.append((time.monotonic() - started_at) * 1000)
+        if response.status_code >= 400:
+            key = f'http_{response.status_code}'
+            self.request_errors[key] = self.request_errors.get(key, 0) + 1
 
     async def get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
-                timeout=30.0,
-                headers=self._get_headers()
+                timeout=self.config.get('request_timeout_seconds', 30.0),
+                headers=self._get_headers(),
+                event_hooks={'request': [self._on_request], 'response': [self._on_response]},
+                transport=CachingTransport(
+                    self.name,
+                    mode=self.config.get('http_cache_mode', DEFAULT_HTTP_CACHE_MODE),
+                    ttl=self.config.get('http_cache_ttl'),
+                    fixtures_dir=self.config.get('http_fixtures_dir', DEFAULT_FIXTURES_DIR)
+                )
             )
         return self._client
 
@@ -66,10 +174,53 @@ class DataProviderAdapter(ABC):
     ) -> SyncResult:
         pass
 
+    async def iter_prices(
+        self,
+        category: Optional[str] = None,
+        search_query: Optional[str] = None,
+        limit: int = 100,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[MaterialPrice, SyncCheckpoint]]:
+        """
+        Stream prices one at a time instead of returning them all in a SyncResult.
+
+        The default implementation wraps fetch_prices so every adapter can be
+        consumed by the streaming sync pipeline. Adapters that paginate should
+        override this to yield items as each page arrives, honor the
+        start_page/max_pages window, and yield a SyncCheckpoint after each page
+        so an interrupted sync can pass it back as `checkpoint` and continue
+        from there. Items that could not be parsed are counted on
+        self.items_failed.
+        """
+        self.items_failed = 0
+        result = await self.fetch_prices(category=category, search_query=search_query, limit=limit)
+        if not result.success:
+            raise ProviderError.from_result(result, self.name)
+
+        self.items_failed = result.items_failed
+        for price in result.prices or []:
+            yield price
+
+    def plan_chunks(self) -> List[Dict[str, Any]]:
+        """
+        Split a full sync into independent units of work.
+
+        Each chunk is a dict of iter_prices keyword arguments. By default a
+        provider is chunked per entry of config['sync_categories'].
+        """
+        categories = self.config.get('sync_categories') or [None]
+        return [{'category': category} for category in categories]
+
     @abstractmethod
     async def fetch_single_price(self, external_id: str) -> Optional[MaterialPrice]:
         pass
 
+    async def fetch_single_prices(self, external_ids: List[str]) -> List[Optional[MaterialPrice]]:
+        """Fetch several items concurrently; results keep the order of external_ids."""
+        return list(await asyncio.gather(*(self.fetch_single_price(eid) for eid in external_ids)))
+
     @abstractmethod
     async def search_materials(
         self,
@@ -99,7 +250,7 @@ class APIProviderAdapter(DataProviderAdapter):
     async def validate_connection(self) -> bool:
         try:
             client = await self.get_client()
-            response = await client.get('/health')
+            response = await client.get('/health', headers=BYPASS_CACHE_HEADERS)
             return response.status_code == 200
         except Exception:
             return False
@@ -109,22 +260,186 @@ class ScraperProviderAdapter(DataProviderAdapter):
     def __init__(self, provider_config: Dict[str, Any]):
         super().__init__(provider_config)
         self.respect_robots_txt = self.config.get('respect_robots_txt', True)
-        self.delay_between_requests = self.config.get('delay_seconds', 2)
+        self.delay_between_requests = self._configured_delay()
+        self.selectors = self.config.get('selectors', {})
+        self.max_pages = self.config.get('max_pages', 5)
+        self.skipped_urls: List[str] = []
 
     async def validate_connection(self) -> bool:
         try:
             client = await self.get_client()
-            response = await client.get('/')
+            response = await client.get('/', headers=BYPASS_CACHE_HEADERS)
             return response.status_code < 500
         except Exception:
             return False
 
-    async def check_robots_txt(self) -> bool:
+    def _is_replay(self) -> bool:
+        return self.config.get('http_cache_mode', DEFAULT_HTTP_CACHE_MODE) == 'replay'
+
+    def _configured_delay(self) -> float:
+        # Replayed fixtures never reach the host, so there is nothing to throttle.
+        if self._is_replay():
+            return 0
+        return self.config.get('delay_seconds', 2)
+
+    async def check_robots_txt(self, url: Optional[str] = None) -> bool:
+        """
+        Check `url` (default: base_url) against the host's cached robots.txt.
+
+        A Crawl-delay for our user agent longer than delay_seconds (even
+        when that is 0) becomes the throttle delay, so we never crawl faster
+        than the host asks; replay mode never reaches the host and ignores it.
+        """
         if not self.respect_robots_txt:
             return True
-        try:
-            client = await self.get_client()
-            response = await client.get('/robots.txt')
+
+        url = url or self.base_url
+        rules = await get_robots_rules(await self.get_client(), url)
+
+        crawl_delay = get_crawl_delay(rules)
+        if crawl_delay is not None and not self._is_replay():
+            self.delay_between_requests = max(self._configured_delay(), crawl_delay)
+
+        return rules.can_fetch(ROBOTS_USER_AGENT, url)
+
+    async def is_allowed(self, url: str) -> bool:
+        """
+        Whether robots.txt lets us fetch `url`.
+
+        A disallowed URL is logged and kept in self.skipped_urls; the caller
+        skips it and the rest of the crawl goes on.
+        """
+        if await self.check_robots_txt(url):
             return True
+        logger.warning('%s: skipping %s, disallowed by robots.txt', self.name, url)
+        self.skipped_urls.append(url)
+        return False
+
+    async def fetch_prices(
+        self,
+        category: Optional[str] = None,
+        search_query: Optional[str] = None,
+        limit: int = 100
+    ) -> SyncResult:
+        try:
+            all_prices = [
+                price async for price in self.iter_prices(category, search_query, limit)
+                if isinstance(price, MaterialPrice)
+            ]
+
+            return SyncResult(
+                success=True,
+                items_processed=len(all_prices),
+                items_failed=self.items_failed,
+                prices=all_prices
+            )
+
+        except Exception as e:
+            return SyncResult(
+                success=False,
+                items_processed=0,
+                items_failed=0,
+                error_message=str(e)
+            )
+
+    def plan_chunks(self) -> List[Dict[str, Any]]:
+        chunks = super().plan_chunks()
+        pages_per_chunk = self.config.get('pages_per_chunk')
+        if not pages_per_chunk or not self._has_page_urls():
+            return chunks
+
+        return [
+            {**chunk, 'start_page': start, 'max_pages': min(pages_per_chunk, self.max_pages - start + 1)}
+            for chunk in chunks
+            for start in range(1, self.max_pages + 1, pages_per_chunk)
+        ]
+
+    def _build_search_url(self, category: Optional[str], search_query: Optional[str], page: int = 1) -> str:
+        url_template = self.config.get('search_url_template', '{base_url}/search?q={query}')
+        query = search_query or category or ''
+        return url_template.format(base_url=self.base_url, query=query, category=category or '', page=page)
+
+    def _has_page_urls(self) -> bool:
+        return '{page}' in self.config.get('search_url_template', '')
+
+    def _field_selectors(self, selectors: Dict[str, str]) -> Dict[str, str]:
+        return {
+            field: selector for field, selector in selectors.items()
+            if field not in ('product_list', 'next_page')
+        }
+
+    def _parse_item(self, item: Dict[str, Any]) -> Optional[MaterialPrice]:
+        if not item.get('name') or not item.get('price'):
+            return None
+
+        try:
+            price_str = item.get('price', '0')
+            price_value = self._parse_price(price_str)
+
+            external_id = item.get('id') or item.get('sku') or self._generate_id(item.get('name', ''))
+
+            return MaterialPrice(
+                external_id=str(external_id),
+                name=item.get('name', '').strip(),
+                price=price_value,
+                unit=self._parse_unit(item.get('unit', ''), item.get('name', '')),
+                currency='USD',
+                confidence_score=0.7,
+                source_url=self._make_absolute_url(item.get('link', '')),
+                category=item.get('category', self._infer_category(item.get('name', ''))),
+                raw_data=item,
+                specifications={
+                    'scraped': True,
+                    'source': self.name
+                }
+            )
+
         except Exception:
-            return True
+            return None
+
+    def _parse_price(self, price_str: str) -> float:
+        if not price_str:
+            return 0.0
+
+        cleaned = re.sub(r'[^\d.,]', '', str(price_str))
+        cleaned = cleaned.replace(',', '')
+
+        match = re.search(r'(\d+\.?\d*)', cleaned)
+        if match:
+            return float(match.group(1))
+
+        return 0.0
+
+    def _parse_unit(self, unit_str: str, name: str) -> str:
+        return parse_unit(unit_str, name)
+
+    def _generate_id(self, name: str) -> str:
+        return hashlib.md5(name.encode()).hexdigest()[:12]
+
+    def _make_absolute_url(self, url: str) -> str:
+        if not url:
+            return ''
+        if url.startswith('http'):
+            return url
+        if url.startswith('/'):
+            return f"{self.base_url.rstrip('/')}{url}"
+        return f"{self.base_url.rstrip('/')}/{url}"
+
+    def _infer_category(self, title: str) -> str:
+        title_lower = title.lower()
+        categories = {
+            'Lumber': ['lumber', 'wood', 'plywood', '2x4', '2x6', 'stud', 'board'],
+            'Concrete': ['concrete', 'cement', 'mortar'],
+            'Steel': ['steel', 'rebar', 'metal'],
+            'Drywall': ['drywall', 'sheetrock', 'gypsum'],
+            'Insulation': ['insulation', 'foam'],
+            'Roofing': ['shingle', 'roofing'],
+            'Plumbing': ['pipe', 'pvc', 'fitting'],
+            'Electrical': ['wire', 'electrical', 'outlet']
+        }
+
+        for cat, keywords in categories.items():
+            if any(kw in title_lower for kw in keywords):
+                return cat
+
+        return 'General'
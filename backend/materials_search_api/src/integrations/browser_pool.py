@@ -0,0 +1,144 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional, Dict
+from urllib.parse import urlparse
+
+DEFAULT_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 4))
+USER_AGENT = 'MaterialsSearch/1.0 (Research Bot; +https://example.com/bot)'
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_pools: Dict[bool, 'BrowserPool'] = {}
+
+
+class HostThrottle:
+    """Spaces out request starts per host, shared by every page of a pool."""
+
+    def __init__(self):
+        self._next_allowed: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def wait(self, url: str, delay: float):
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+
+        async with lock:
+            loop = asyncio.get_running_loop()
+            remaining = self._next_allowed.get(host, 0) - loop.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            self._next_allowed[host] = loop.time() + delay
+
+
+class BrowserPool:
+    """
+    A single Chromium instance with up to `size` isolated contexts, each owning
+    one page. Callers borrow a page with `async with pool.page() as page:` and
+    block when every slot is busy.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, headless: bool = True):
+        self.size = size
+        self.headless = headless
+        self.throttle = HostThrottle()
+        self._playwright = None
+        self._browser = None
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self._launch_lock = asyncio.Lock()
+
+    async def _get_browser(self):
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                try:
+                    from playwright.async_api import async_playwright
+                except ImportError:
+                    raise ImportError("Playwright is required. Install with: pip install playwright && playwright install chromium")
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        return self._browser
+
+    async def _new_slot(self):
+        browser = await self._get_browser()
+        context = await browser.new_context(user_agent=USER_AGENT)
+        return context, await context.new_page()
+
+    @asynccontextmanager
+    async def page(self):
+        async with self._slots:
+            context, page = self._idle.pop() if self._idle else await self._new_slot()
+            try:
+                yield page
+            finally:
+                await self._release(context, page)
+
+    async def _release(self, context, page):
+        if page.is_closed() or not self._browser or not self._browser.is_connected():
+            # Crashed or closed page: drop the context so the slot is rebuilt.
+            try:
+                await context.close()
+            except Exception:
+                pass
+            return
+
+        try:
+            await page.unroute('**/*')
+        except Exception:
+            pass
+        self._idle.append((context, page))
+
+    async def close(self):
+        while self._idle:
+            context, _ = self._idle.pop()
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+def run_in_worker_loop(coro):
+    """
+    Run a coroutine on this process's long-lived event loop.
+
+    Celery tasks used to call asyncio.run, which creates and tears down a loop
+    per task; Playwright objects are bound to their loop, so that also forced a
+    Chromium launch per sync. Keeping one loop per worker process lets
+    get_shared_browser_pool hand the same browser to every task.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
+
+
+def get_shared_browser_pool(headless: bool = True) -> Optional[BrowserPool]:
+    """Return the worker-wide pool, or None when not running on the worker loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    if loop is not _worker_loop:
+        return None
+
+    if headless not in _shared_pools:
+        _shared_pools[headless] = BrowserPool(DEFAULT_POOL_SIZE, headless)
+    return _shared_pools[headless]
+
+
+def shutdown_worker_loop():
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+
+    for pool in list(_shared_pools.values()):
+        _worker_loop.run_until_complete(pool.close())
+    _shared_pools.clear()
+    _worker_loop.close()
+    _worker_loop = None
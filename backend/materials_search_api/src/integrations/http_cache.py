@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import json
+import os
+import re
+from typing import Optional, Dict, Any
+import httpx
+from src.cache import shared_cache_get, shared_cache_set
+
+# 'cache' honours Cache-Control, 'record' also writes every response to the
+# fixtures directory, 'replay' serves only from fixtures, 'off' disables both.
+HTTP_CACHE_MODES = ('cache', 'record', 'replay', 'off')
+DEFAULT_HTTP_CACHE_MODE = os.environ.get('HTTP_CACHE_MODE', 'cache')
+DEFAULT_FIXTURES_DIR = os.environ.get('HTTP_FIXTURES_DIR', 'fixtures/http')
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+CACHEABLE_STATUS = (200, 203, 300, 301, 404, 410)
+# Hop-by-hop and encoding headers no longer describe the stored (decoded) body.
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+SECRET_PARAMS = ('api_key', 'apikey', 'key', 'token', 'access_token')
+# Sent by health probes so a cached 200 never stands in for a live check.
+BYPASS_CACHE_HEADERS = {'Cache-Control': 'no-cache'}
+
+
+def _request_key(request: httpx.Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(str(request.url).encode())
+    digest.update(request.content or b'')
+    return digest.hexdigest()
+
+
+def _redacted_url(url: httpx.URL) -> str:
+    params = [
+        (name, '***' if name.lower() in SECRET_PARAMS else value)
+        for name, value in url.params.multi_items()
+    ]
+    return str(url.copy_with(params=params)) if params else str(url)
+
+
+def _max_age(cache_control: str) -> Optional[int]:
+    directives = {d.strip().split('=')[0].lower(): d for d in cache_control.split(',') if d.strip()}
+    if {'no-store', 'no-cache', 'private'} & directives.keys():
+        return 0
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            match = re.search(r'=\s*"?(\d+)', directives[name])
+            if match:
+                return int(match.group(1))
+    return None
+
+
+def _serialize(response: httpx.Response, content: bytes) -> Dict[str, Any]:
+    return {
+        'status_code': response.status_code,
+        'headers': [
+            [name, value] for name, value in response.headers.multi_items()
+            if name.lower() not in DROPPED_HEADERS
+        ],
+        'content': base64.b64encode(content).decode('ascii')
+    }
+
+
+def _deserialize(data: Dict[str, Any], request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        status_code=data['status_code'],
+        headers=data['headers'],
+        content=base64.b64decode(data['content']),
+        request=request
+    )
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that serves repeated provider requests from a shared cache.
+
+    GET/HEAD responses are stored in the app cache (Redis when REDIS_URL is set)
+    for the provider's `http_cache_ttl`, or else for the response's
+    Cache-Control max-age; responses marked no-store/no-cache/private, or with
+    neither, are not cached. A request sent with `Cache-Control: no-cache`
+    always goes to the network.
+
+    In record mode every response is also written to
+    <fixtures_dir>/<provider>/<request hash>.json; replay mode serves only
+    from those files and never touches the network, so the ingestion pipeline
+    can be run and benchmarked offline.
+    """
+
+    def __init__(
+        self,
+        provider_name: str,
+        mode: str = DEFAULT_HTTP_CACHE_MODE,
+        ttl: Optional[int] = None,
+        fixtures_dir: str = DEFAULT_FIXTURES_DIR,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        self.provider_name = provider_name
+        self.mode = mode
+        self.ttl = ttl
+        self.fixtures_path = os.path.join(fixtures_dir, re.sub(r'[^\w.-]+', '_', provider_name.lower()))
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request)
+
+        if self.mode == 'replay':
+            data = self._read_fixture(key)
+            if data is None:
+                raise httpx.ConnectError(f"No recorded fixture for {request.method} {request.url}", request=request)
+            return _deserialize(data, request)
+
+        cacheable = (
+            self.mode != 'off'
+            and request.method in CACHEABLE_METHODS
+            and 'no-cache' not in request.headers.get('cache-control', '')
+        )
+        if cacheable:
+            data = shared_cache_get(f"http:{self.provider_name}:{key}")
+            if data is not None:
+                return _deserialize(data, request)
+
+        response = await self._transport.handle_async_request(request)
+        if not cacheable and self.mode != 'record':
+            return response
+
+        content = await response.aread()
+        await response.aclose()
+        data = _serialize(response, content)
+
+        if self.mode == 'record':
+            self._write_fixture(key, request, data)
+
+        ttl = self._ttl_for(response)
+        if cacheable and ttl:
+            shared_cache_set(f"http:{self.provider_name}:{key}", data, ttl)
+
+        return _deserialize(data, request)
+
+    def _ttl_for(self, response: httpx.Response) -> int:
+        if response.status_code not in CACHEABLE_STATUS:
+            return 0
+        max_age = _max_age(response.headers.get('cache-control', ''))
+        if max_age == 0:
+            return 0
+        if self.ttl is not None:
+            return self.ttl
+        return max_age or 0
+
+    def _fixture_file(self, key: str) -> str:
+        return os.path.join(self.fixtures_path, f"{key}.json")
+
+    def _read_fixture(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._fixture_file(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_fixture(self, key: str, request: httpx.Request, data: Dict[str, Any]):
+        os.makedirs(self.fixtures_path, exist_ok=True)
+        with open(self._fixture_file(key), 'w') as f:
+            json.dump({'method': request.method, 'url': _redacted_url(request.url), **data}, f, indent=2)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -0,0 +1,157 @@
+from urllib.parse import urljoin
+from typing import Optional, List, Dict, Any, AsyncIterator, Union
+from .base import ScraperProviderAdapter, MaterialPrice, SyncCheckpoint, ProviderError
+from .browser_pool import HostThrottle
+from .registry import provider_registry
+
+
+def _parse_html(html: str):
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        raise ImportError("selectolax is required. Install with: pip install selectolax")
+    return LexborHTMLParser(html)
+
+
+class HttpScraperAdapter(ScraperProviderAdapter):
+    """
+    Scraper adapter for server-rendered sites that fetches pages with httpx and
+    parses them with selectolax, without launching a browser.
+
+    Uses the same selectors config as PlaywrightScraperAdapter, so a provider can
+    switch between the two by changing its adapter name. Pages that build their
+    product grid with JavaScript still need the Playwright adapter.
+
+    Required config:
+    - base_url: Target website URL
+    - selectors: CSS selectors for data extraction; next_page must match an
+      element with an href
+    - respect_robots_txt: Whether to check robots.txt (default: True)
+    - delay_seconds: Minimum delay between requests; a longer robots.txt Crawl-delay wins (default: 2)
+    - search_url_template: Search URL, optionally with {page} (default: '{base_url}/search?q={query}')
+    - pages_per_chunk: Split full syncs into page ranges of this size; requires
+      a search_url_template containing {page} (optional)
+    """
+
+    def __init__(self, provider_config: Dict[str, Any]):
+        super().__init__(provider_config)
+        self.throttle = HostThrottle()
+
+    def _get_headers(self) -> Dict[str, str]:
+        headers = super()._get_headers()
+        headers['User-Agent'] = 'MaterialsSearch/1.0 (Research Bot; +https://example.com/bot)'
+        headers['Accept'] = 'text/html,application/xhtml+xml'
+        return headers
+
+    async def _get_document(self, url: str):
+        """(parsed document, final URL); the document is None when robots.txt disallows `url`."""
+        if not await self.is_allowed(url):
+            return None, url
+        await self.throttle.wait(url, self.delay_between_requests)
+        client = await self.get_client()
+        response = await client.get(url, follow_redirects=True)
+        if response.status_code >= 400:
+            raise ProviderError.from_response(response)
+        return _parse_html(response.text), str(response.url)
+
+    async def iter_prices(
+        self,
+        category: Optional[str] = None,
+        search_query: Optional[str] = None,
+        limit: int = 100,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[MaterialPrice, SyncCheckpoint]]:
+        self.items_failed = 0
+
+        max_pages = max_pages or self.max_pages
+        checkpoint = checkpoint or {}
+        items_yielded = checkpoint.get('items_yielded', 0)
+        pages_done = checkpoint.get('pages_done', 0)
+        page_number = start_page + pages_done
+        url = checkpoint.get('next_url') or self._build_search_url(category, search_query, page_number)
+
+        while pages_done < max_pages and items_yielded < limit:
+            document, page_url = await self._get_document(url)
+            if document is None:
+                return
+            items = self._extract_items(document)
+            for item in items:
+                try:
+                    price = self._parse_item(item)
+                except Exception:
+                    price = None
+                    self.items_failed += 1
+
+                if price:
+                    items_yielded += 1
+                    yield price
+
+                if items_yielded >= limit:
+                    return
+
+            pages_done += 1
+            if self._has_page_urls():
+                if not items:
+                    return
+                page_number += 1
+                url = self._build_search_url(category, search_query, page_number)
+            else:
+                url = self._next_page_url(document, page_url)
+                if not url:
+                    return
+
+            yield SyncCheckpoint(pages_done=pages_done, items_yielded=items_yielded, next_url=url)
+
+    async def fetch_single_price(self, external_id: str) -> Optional[MaterialPrice]:
+        try:
+            document, page_url = await self._get_document(f"{self.base_url}/product/{external_id}")
+            if document is None:
+                return None
+            item = self._extract_single_item(document, page_url)
+            return self._parse_item(item) if item else None
+        except Exception:
+            return None
+
+    async def search_materials(self, query: str, limit: int = 20) -> List[MaterialPrice]:
+        result = await self.fetch_prices(search_query=query, limit=limit)
+        return result.prices or []
+
+    def _extract_fields(self, root, fields: Dict[str, str]) -> Dict[str, Any]:
+        item = {}
+        for field, selector in fields.items():
+            node = root.css_first(selector)
+            if node is None:
+                continue
+            if field == 'link':
+                item[field] = node.attributes.get('href')
+            else:
+                item[field] = node.text(separator=' ', strip=True)
+        return item
+
+    def _extract_items(self, document) -> List[Dict[str, Any]]:
+        fields = self._field_selectors(self.selectors)
+        items = []
+        for node in document.css(self.selectors.get('product_list', '.product-item')):
+            item = self._extract_fields(node, fields)
+            if item.get('name') and item.get('price'):
+                items.append(item)
+        return items
+
+    def _extract_single_item(self, document, page_url: str) -> Optional[Dict[str, Any]]:
+        detail_selectors = self.config.get('detail_selectors', self.selectors)
+        item = self._extract_fields(document, self._field_selectors(detail_selectors))
+        if 'link' in item:
+            item['link'] = page_url
+        return item if item.get('name') and item.get('price') else None
+
+    def _next_page_url(self, document, page_url: str) -> Optional[str]:
+        node = document.css_first(self.selectors.get('next_page', '.pagination .next'))
+        href = node.attributes.get('href') if node is not None else None
+        if not href or href.startswith('#') or href.startswith('javascript:'):
+            return None
+        return urljoin(page_url, href)
+
+
+provider_registry.register('http_scraper', HttpScraperAdapter)
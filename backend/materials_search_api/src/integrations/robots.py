@@ -0,0 +1,71 @@
+import time
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import httpx
+from src.cache import shared_cache_get, shared_cache_set, CACHE_TIMEOUTS
+
+ROBOTS_USER_AGENT = 'MaterialsSearch'
+# Unreachable robots.txt is retried sooner than a successfully fetched one.
+ROBOTS_ERROR_TTL = 600
+
+# Parsed rules per host for this process, in front of the shared cache.
+_parsed: Dict[str, Tuple[float, RobotFileParser]] = {}
+
+
+def _cache_key(host: str) -> str:
+    return f"robots:{host}"
+
+
+async def _download(client: httpx.AsyncClient, robots_url: str) -> Tuple[str, int]:
+    """Return the robots.txt body to parse and how long to keep it."""
+    try:
+        response = await client.get(robots_url, follow_redirects=True)
+    except httpx.HTTPError:
+        return '', ROBOTS_ERROR_TTL
+
+    if response.status_code >= 500:
+        return '', ROBOTS_ERROR_TTL
+    if response.status_code >= 400:
+        # No robots.txt (404, 410, ...) means no restrictions.
+        return '', CACHE_TIMEOUTS['robots_txt']
+    return response.text, CACHE_TIMEOUTS['robots_txt']
+
+
+async def get_robots_rules(client: httpx.AsyncClient, url: str) -> RobotFileParser:
+    """
+    Return parsed robots.txt rules for the host of `url`.
+
+    The raw file is kept in the application cache (Redis when REDIS_URL is set),
+    so every adapter and worker shares one download per host per TTL. Parsed
+    rules are also memoised in-process, so per-URL checks make no network calls.
+    """
+    parsed_url = urlparse(url)
+    host = parsed_url.netloc
+    now = time.monotonic()
+
+    entry = _parsed.get(host)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    body = shared_cache_get(_cache_key(host))
+    ttl = CACHE_TIMEOUTS['robots_txt']
+    if body is None:
+        body, ttl = await _download(client, f"{parsed_url.scheme}://{host}/robots.txt")
+        shared_cache_set(_cache_key(host), body, ttl)
+
+    rules = RobotFileParser()
+    rules.parse(body.splitlines())
+    rules.modified()
+    _parsed[host] = (now + min(ttl, ROBOTS_ERROR_TTL), rules)
+    return rules
+
+
+def get_crawl_delay(rules: RobotFileParser, user_agent: str = ROBOTS_USER_AGENT) -> Optional[float]:
+    delay = rules.crawl_delay(user_agent)
+    if delay is None:
+        rate = rules.request_rate(user_agent)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+    return float(delay)
@@ -1,6 +1,9 @@
+import httpx
 from typing import Optional, List, Dict, Any
-from .base import APIProviderAdapter, MaterialPrice, SyncResult
+from .base import APIProviderAdapter, MaterialPrice, SyncResult, parse_retry_after
+from .http_cache import BYPASS_CACHE_HEADERS
 from .registry import provider_registry
+from src.services.units import parse_unit
 
 
 class RSMeansProviderAdapter(APIProviderAdapter):
@@ -71,7 +74,9 @@ class RSMeansProviderAdapter(APIProviderAdapter):
                     success=False,
                     items_processed=0,
                     items_failed=0,
-                    error_message=f'API error: {response.status_code}'
+                    error_message=f'API error: {response.status_code}',
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('retry-after'))
                 )
 
             data = response.json()
@@ -89,7 +94,8 @@ class RSMeansProviderAdapter(APIProviderAdapter):
                 success=False,
                 items_processed=0,
                 items_failed=0,
-                error_message=str(e)
+                error_message=str(e),
+                retryable=isinstance(e, httpx.TransportError)
             )
 
     async def fetch_single_price(self, external_id: str) -> Optional[MaterialPrice]:
@@ -118,7 +124,7 @@ class RSMeansProviderAdapter(APIProviderAdapter):
     async def validate_connection(self) -> bool:
         try:
             client = await self.get_client()
-            response = await client.get('/status')
+            response = await client.get('/status', headers=BYPASS_CACHE_HEADERS)
             return response.status_code == 200
         except Exception:
             return False
@@ -133,7 +139,7 @@ class RSMeansProviderAdapter(APIProviderAdapter):
                     external_id=item.get('id', item.get('code', '')),
                     name=item.get('description', item.get('name', '')),
                     price=float(item.get('unit_cost', item.get('material_cost', 0))),
-                    unit=item.get('unit', 'EA'),
+                    unit=parse_unit(item.get('unit'), default='EA'),
                     currency='USD',
                     confidence_score=0.95,
                     source_url=f"https://www.rsmeans.com/costs/{item.get('id', '')}",
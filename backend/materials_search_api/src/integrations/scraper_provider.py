@@ -1,9 +1,33 @@
 import asyncio
-import re
-from typing import Optional, List, Dict, Any
-from .base import ScraperProviderAdapter, MaterialPrice, SyncResult
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Union
+from .base import ScraperProviderAdapter, MaterialPrice, SyncCheckpoint, ProviderError, parse_retry_after
+from .browser_pool import BrowserPool, get_shared_browser_pool, DEFAULT_POOL_SIZE
 from .registry import provider_registry
 
+BLOCKED_RESOURCE_TYPES = ('image', 'font', 'stylesheet', 'media')
+BLOCKED_URL_PATTERNS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'facebook.net', 'hotjar.com', 'segment.io', 'newrelic.com', 'optimizely.com'
+)
+
+# Runs in the page: extracts every product card in one round trip instead of
+# a query_selector + inner_text call per field per element.
+EXTRACT_ITEMS_JS = """
+({productSelector, fields}) => {
+    const roots = productSelector ? Array.from(document.querySelectorAll(productSelector)) : [document];
+    return roots.map(root => {
+        const item = {};
+        for (const [field, selector] of Object.entries(fields)) {
+            const el = root.querySelector(selector);
+            if (!el) continue;
+            item[field] = field === 'link' ? (productSelector ? el.getAttribute('href') : location.href) : el.innerText;
+        }
+        return item;
+    }).filter(item => item.name && item.price);
+}
+"""
+
 
 class PlaywrightScraperAdapter(ScraperProviderAdapter):
     """
@@ -16,7 +40,18 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
     - base_url: Target website URL
     - selectors: CSS selectors for data extraction
     - respect_robots_txt: Whether to check robots.txt (default: True)
-    - delay_seconds: Delay between requests (default: 2)
+    - delay_seconds: Minimum delay between requests; a longer robots.txt Crawl-delay wins (default: 2)
+    - pages_per_chunk: Split full syncs into page ranges of this size; requires
+      a search_url_template containing {page} (optional)
+    - search_queries: Queries to crawl concurrently when a sync has no category
+      or search query of its own (optional)
+    - concurrency: Pages used in parallel when not running on a worker's
+      shared browser pool (default: BROWSER_POOL_SIZE, 4)
+    - extraction_mode: 'evaluate' extracts a whole page with one page.evaluate
+      call; 'elements' queries each field through element handles (default: 'evaluate')
+    - block_resources: Abort image/font/stylesheet/media and analytics requests (default: True)
+    - wait_until: 'selector' waits for the product list selector after DOM load;
+      any Playwright load state (e.g. 'networkidle') is passed to goto (default: 'selector')
 
     Example selectors config:
     {
@@ -29,109 +64,219 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
     }
     """
 
+    workload = 'browser'
+
     def __init__(self, provider_config: Dict[str, Any]):
         super().__init__(provider_config)
-        self.selectors = self.config.get('selectors', {})
         self.headless = self.config.get('headless', True)
-        self.max_pages = self.config.get('max_pages', 5)
-        self._browser = None
-        self._page = None
+        self.extraction_mode = self.config.get('extraction_mode', 'evaluate')
+        self.block_resources = self.config.get('block_resources', True)
+        self.wait_until = self.config.get('wait_until', 'selector')
+        self.wait_timeout_ms = self.config.get('wait_timeout_ms', 15000)
+        self.concurrency = self.config.get('concurrency', DEFAULT_POOL_SIZE)
+        self._pool: Optional[BrowserPool] = None
+        self._owns_pool = False
+
+    async def _get_pool(self) -> BrowserPool:
+        if self._pool is None:
+            self._pool = get_shared_browser_pool(self.headless)
+            if self._pool is None:
+                self._pool = BrowserPool(self.concurrency, self.headless)
+                self._owns_pool = True
+        return self._pool
+
+    @asynccontextmanager
+    async def _page(self):
+        pool = await self._get_pool()
+        async with pool.page() as page:
+            if self.block_resources:
+                await page.route('**/*', self._route_request)
+            yield page
+
+    async def _route_request(self, route):
+        request = route.request
+        blocked_types = self.config.get('blocked_resource_types', BLOCKED_RESOURCE_TYPES)
+        blocked_patterns = self.config.get('blocked_url_patterns', BLOCKED_URL_PATTERNS)
+
+        if request.resource_type in blocked_types or any(p in request.url for p in blocked_patterns):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _throttle(self, url: str):
+        pool = await self._get_pool()
+        await pool.throttle.wait(url, self.delay_between_requests)
+
+    async def _goto(self, page, url: str, ready_selector: Optional[str] = None) -> bool:
+        """Navigate to `url`; False, without navigating, when robots.txt disallows it."""
+        if not await self.is_allowed(url):
+            return False
+        await self._throttle(url)
+        if self.wait_until != 'selector':
+            response = await page.goto(url, wait_until=self.wait_until)
+        else:
+            response = await page.goto(url, wait_until='domcontentloaded')
+
+        if response is not None and response.status >= 400:
+            raise ProviderError(
+                f'HTTP {response.status} from {url}',
+                status_code=response.status,
+                retry_after=parse_retry_after(response.headers.get('retry-after'))
+            )
 
-    async def _get_browser(self):
-        if self._browser is None:
-            try:
-                from playwright.async_api import async_playwright
-                self._playwright = await async_playwright().start()
-                self._browser = await self._playwright.chromium.launch(headless=self.headless)
-            except ImportError:
-                raise ImportError("Playwright is required. Install with: pip install playwright && playwright install chromium")
-        return self._browser
-
-    async def _get_page(self):
-        if self._page is None or self._page.is_closed():
-            browser = await self._get_browser()
-            self._page = await browser.new_page()
-            await self._page.set_extra_http_headers({
-                'User-Agent': 'MaterialsSearch/1.0 (Research Bot; +https://example.com/bot)'
-            })
-        return self._page
+        if self.wait_until == 'selector':
+            await self._wait_for_ready(page, ready_selector)
+        return True
+
+    async def _wait_for_ready(self, page, ready_selector: Optional[str] = None):
+        if self.wait_until != 'selector':
+            await page.wait_for_load_state(self.wait_until)
+            return
+
+        await page.wait_for_load_state('domcontentloaded')
+        selector = ready_selector or self.selectors.get('product_list', '.product-item')
+        try:
+            await page.wait_for_selector(selector, timeout=self.wait_timeout_ms)
+        except Exception:
+            # An empty results page never renders the selector; extraction
+            # will simply find no items.
+            pass
 
     async def close(self):
-        if self._page and not self._page.is_closed():
-            await self._page.close()
-        if self._browser:
-            await self._browser.close()
-        if hasattr(self, '_playwright'):
-            await self._playwright.stop()
-
-    async def fetch_prices(
+        # The worker-wide pool outlives this adapter; only a private pool is closed.
+        if self._owns_pool and self._pool:
+            await self._pool.close()
+        self._pool = None
+        self._owns_pool = False
+        await super().close()
+
+    async def iter_prices(
         self,
         category: Optional[str] = None,
         search_query: Optional[str] = None,
-        limit: int = 100
-    ) -> SyncResult:
-        if not await self.check_robots_txt():
-            return SyncResult(
-                success=False,
-                items_processed=0,
-                items_failed=0,
-                error_message='Scraping disallowed by robots.txt'
-            )
+        limit: int = 100,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[MaterialPrice, SyncCheckpoint]]:
+        self.items_failed = 0
+
+        search_queries = self.config.get('search_queries')
+        if not category and not search_query and search_queries:
+            targets = [{'search_query': q, 'start_page': start_page, 'max_pages': max_pages} for q in search_queries]
+            async for price in self._iter_concurrently(targets, limit):
+                yield price
+            return
+
+        async with self._page() as page:
+            async for price in self._crawl(page, category, search_query, limit, start_page, max_pages, checkpoint):
+                yield price
+
+    async def _iter_concurrently(self, targets: List[Dict[str, Any]], limit: int) -> AsyncIterator[MaterialPrice]:
+        """
+        Crawl several searches at once, one pooled page per target.
+
+        The pool size bounds how many crawls run in parallel and the pool's host
+        throttle keeps navigations to the same host delay_seconds apart. `limit`
+        applies per target. A failing target is skipped unless all of them fail.
+        Page checkpoints are not forwarded, so these crawls restart when resumed.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 50)
+        done = object()
+
+        async def crawl_target(target):
+            async with self._page() as page:
+                async for price in self._crawl(page, limit=limit, **target):
+                    if isinstance(price, MaterialPrice):
+                        await queue.put(price)
+
+        async def crawl_all():
+            try:
+                return await asyncio.gather(*(crawl_target(t) for t in targets), return_exceptions=True)
+            finally:
+                await queue.put(done)
 
+        runner = asyncio.create_task(crawl_all())
         try:
-            page = await self._get_page()
-            all_prices = []
-            pages_scraped = 0
-            failed_items = 0
-
-            search_url = self._build_search_url(category, search_query)
-            await page.goto(search_url, wait_until='networkidle')
-
-            while pages_scraped < self.max_pages and len(all_prices) < limit:
-                await asyncio.sleep(self.delay_between_requests)
-
-                items = await self._extract_items(page)
-                for item in items:
-                    try:
-                        price = self._parse_item(item)
-                        if price:
-                            all_prices.append(price)
-                    except Exception:
-                        failed_items += 1
-
-                    if len(all_prices) >= limit:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+
+            errors = [r for r in await runner if isinstance(r, Exception)]
+            if errors and len(errors) == len(targets):
+                raise errors[0]
+        finally:
+            runner.cancel()
+
+    async def _crawl(
+        self,
+        page,
+        category: Optional[str] = None,
+        search_query: Optional[str] = None,
+        limit: int = 100,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[MaterialPrice, SyncCheckpoint]]:
+        max_pages = max_pages or self.max_pages
+        checkpoint = checkpoint or {}
+        items_yielded = checkpoint.get('items_yielded', 0)
+        pages_scraped = checkpoint.get('pages_done', 0)
+        page_number = start_page + pages_scraped
+        if pages_scraped >= max_pages or items_yielded >= limit:
+            return
+
+        url = checkpoint.get('next_url') or self._build_search_url(category, search_query, page_number)
+        if not await self._goto(page, url):
+            return
+
+        while pages_scraped < max_pages and items_yielded < limit:
+            items = await self._extract_items(page)
+            for item in items:
+                try:
+                    price = self._parse_item(item)
+                except Exception:
+                    price = None
+                    self.items_failed += 1
+
+                if price:
+                    items_yielded += 1
+                    yield price
+
+                if items_yielded >= limit:
+                    break
+
+            pages_scraped += 1
+
+            if pages_scraped < max_pages and items_yielded < limit:
+                if self._has_page_urls():
+                    if not items:
                         break
-
-                pages_scraped += 1
-
-                if pages_scraped < self.max_pages and len(all_prices) < limit:
+                    page_number += 1
+                    if not await self._goto(page, self._build_search_url(category, search_query, page_number)):
+                        break
+                else:
                     has_next = await self._go_to_next_page(page)
                     if not has_next:
                         break
 
-            return SyncResult(
-                success=True,
-                items_processed=len(all_prices),
-                items_failed=failed_items,
-                prices=all_prices
-            )
-
-        except Exception as e:
-            return SyncResult(
-                success=False,
-                items_processed=0,
-                items_failed=0,
-                error_message=str(e)
-            )
+                # Pages reached by clicking are only resumable if they have their own URL.
+                if self._has_page_urls() or page.url != url:
+                    url = page.url
+                    yield SyncCheckpoint(pages_done=pages_scraped, items_yielded=items_yielded, next_url=url)
 
     async def fetch_single_price(self, external_id: str) -> Optional[MaterialPrice]:
         try:
-            page = await self._get_page()
-            product_url = f"{self.base_url}/product/{external_id}"
-            await page.goto(product_url, wait_until='networkidle')
+            async with self._page() as page:
+                product_url = f"{self.base_url}/product/{external_id}"
+                detail_selectors = self.config.get('detail_selectors', self.selectors)
+                if not await self._goto(page, product_url, ready_selector=detail_selectors.get('name')):
+                    return None
 
-            item = await self._extract_single_item(page)
-            return self._parse_item(item) if item else None
+                item = await self._extract_single_item(page)
+                return self._parse_item(item) if item else None
 
         except Exception:
             return None
@@ -142,18 +287,22 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
 
     async def validate_connection(self) -> bool:
         try:
-            page = await self._get_page()
-            response = await page.goto(self.base_url, wait_until='domcontentloaded')
-            return response.status < 400
+            async with self._page() as page:
+                response = await page.goto(self.base_url, wait_until='domcontentloaded')
+                return response.status < 400
         except Exception:
             return False
 
-    def _build_search_url(self, category: Optional[str], search_query: Optional[str]) -> str:
-        url_template = self.config.get('search_url_template', '{base_url}/search?q={query}')
-        query = search_query or category or ''
-        return url_template.format(base_url=self.base_url, query=query, category=category or '')
-
     async def _extract_items(self, page) -> List[Dict[str, Any]]:
+        if self.extraction_mode == 'evaluate':
+            try:
+                return await page.evaluate(EXTRACT_ITEMS_JS, {
+                    'productSelector': self.selectors.get('product_list', '.product-item'),
+                    'fields': self._field_selectors(self.selectors)
+                })
+            except Exception:
+                return []
+
         items = []
         product_selector = self.selectors.get('product_list', '.product-item')
 
@@ -186,9 +335,20 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
         return items
 
     async def _extract_single_item(self, page) -> Optional[Dict[str, Any]]:
-        item = {}
         detail_selectors = self.config.get('detail_selectors', self.selectors)
 
+        if self.extraction_mode == 'evaluate':
+            try:
+                items = await page.evaluate(EXTRACT_ITEMS_JS, {
+                    'productSelector': None,
+                    'fields': self._field_selectors(detail_selectors)
+                })
+            except Exception:
+                return None
+            return items[0] if items else None
+
+        item = {}
+
         for field, selector in detail_selectors.items():
             if field in ('product_list', 'next_page'):
                 continue
@@ -197,7 +357,7 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
                 el = await page.query_selector(selector)
                 if el:
                     if field == 'link':
-                        item[field] = await page.url
+                        item[field] = page.url
                     else:
                         item[field] = await el.inner_text()
             except Exception:
@@ -210,110 +370,14 @@ class PlaywrightScraperAdapter(ScraperProviderAdapter):
         try:
             next_btn = await page.query_selector(next_selector)
             if next_btn and await next_btn.is_visible():
+                await self._throttle(page.url)
                 await next_btn.click()
-                await page.wait_for_load_state('networkidle')
+                await self._wait_for_ready(page)
                 return True
         except Exception:
             pass
         return False
 
-    def _parse_item(self, item: Dict[str, Any]) -> Optional[MaterialPrice]:
-        if not item.get('name') or not item.get('price'):
-            return None
-
-        try:
-            price_str = item.get('price', '0')
-            price_value = self._parse_price(price_str)
-
-            external_id = item.get('id') or item.get('sku') or self._generate_id(item.get('name', ''))
-
-            return MaterialPrice(
-                external_id=str(external_id),
-                name=item.get('name', '').strip(),
-                price=price_value,
-                unit=self._parse_unit(item.get('unit', ''), item.get('name', '')),
-                currency='USD',
-                confidence_score=0.7,
-                source_url=self._make_absolute_url(item.get('link', '')),
-                category=item.get('category', self._infer_category(item.get('name', ''))),
-                raw_data=item,
-                specifications={
-                    'scraped': True,
-                    'source': self.name
-                }
-            )
-
-        except Exception:
-            return None
-
-    def _parse_price(self, price_str: str) -> float:
-        if not price_str:
-            return 0.0
-
-        cleaned = re.sub(r'[^\d.,]', '', str(price_str))
-        cleaned = cleaned.replace(',', '')
-
-        match = re.search(r'(\d+\.?\d*)', cleaned)
-        if match:
-            return float(match.group(1))
-
-        return 0.0
-
-    def _parse_unit(self, unit_str: str, name: str) -> str:
-        unit_lower = (unit_str or '').lower()
-        name_lower = name.lower()
-
-        unit_patterns = {
-            'SF': ['sq ft', 'sq. ft', 'square foot', 'sqft', '/sf'],
-            'LF': ['lin ft', 'lin. ft', 'linear foot', 'lf', '/lf'],
-            'CY': ['cu yd', 'cubic yard', 'cy'],
-            'BAG': ['bag', '/bag', 'per bag'],
-            'SHT': ['sheet', '/sheet', 'per sheet'],
-            'GAL': ['gallon', 'gal', '/gal'],
-            'BOX': ['box', '/box', 'per box'],
-            'CS': ['case', '/case', 'per case'],
-            'BDL': ['bundle', '/bundle', 'per bundle']
-        }
-
-        combined = f"{unit_lower} {name_lower}"
-        for unit, patterns in unit_patterns.items():
-            if any(p in combined for p in patterns):
-                return unit
-
-        return 'EA'
-
-    def _generate_id(self, name: str) -> str:
-        import hashlib
-        return hashlib.md5(name.encode()).hexdigest()[:12]
-
-    def _make_absolute_url(self, url: str) -> str:
-        if not url:
-            return ''
-        if url.startswith('http'):
-            return url
-        if url.startswith('/'):
-            return f"{self.base_url.rstrip('/')}{url}"
-        return f"{self.base_url.rstrip('/')}/{url}"
-
-    def _infer_category(self, title: str) -> str:
-        title_lower = title.lower()
-        categories = {
-            'Lumber': ['lumber', 'wood', 'plywood', '2x4', '2x6', 'stud', 'board'],
-            'Concrete': ['concrete', 'cement', 'mortar'],
-            'Steel': ['steel', 'rebar', 'metal'],
-            'Drywall': ['drywall', 'sheetrock', 'gypsum'],
-            'Insulation': ['insulation', 'foam'],
-            'Roofing': ['shingle', 'roofing'],
-            'Plumbing': ['pipe', 'pvc', 'fitting'],
-            'Electrical': ['wire', 'electrical', 'outlet']
-        }
-
-        for cat, keywords in categories.items():
-            if any(kw in title_lower for kw in keywords):
-                return cat
-
-        return 'General'
-
 
 class GraingerScraperAdapter(PlaywrightScraperAdapter):
     """Pre-configured scraper for Grainger industrial supplies."""
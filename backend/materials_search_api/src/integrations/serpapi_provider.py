@@ -1,6 +1,8 @@
+import httpx
 from typing import Optional, List, Dict, Any
-from .base import APIProviderAdapter, MaterialPrice, SyncResult
+from .base import APIProviderAdapter, MaterialPrice, SyncResult, parse_retry_after
 from .registry import provider_registry
+from src.services.units import parse_unit
 
 
 class SerpApiProviderAdapter(APIProviderAdapter):
@@ -72,7 +74,9 @@ class SerpApiProviderAdapter(APIProviderAdapter):
                     success=False,
                     items_processed=0,
                     items_failed=0,
-                    error_message=f'API error: {response.status_code}'
+                    error_message=f'API error: {response.status_code}',
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('retry-after'))
                 )
 
             data = response.json()
@@ -90,7 +94,8 @@ class SerpApiProviderAdapter(APIProviderAdapter):
                 success=False,
                 items_processed=0,
                 items_failed=0,
-                error_message=str(e)
+                error_message=str(e),
+                retryable=isinstance(e, httpx.TransportError)
             )
 
     async def fetch_single_price(self, external_id: str) -> Optional[MaterialPrice]:
@@ -280,40 +285,7 @@ class SerpApiProviderAdapter(APIProviderAdapter):
             return None
 
     def _extract_unit(self, title: str, default: str = 'EA') -> str:
-        title_lower = title.lower()
-        unit_patterns = {
-            '/sq. ft': 'SF',
-            '/sq ft': 'SF',
-            'per sq ft': 'SF',
-            '/lin. ft': 'LF',
-            '/lin ft': 'LF',
-            '/linear ft': 'LF',
-            'per linear': 'LF',
-            '/cu. yd': 'CY',
-            '/cu yd': 'CY',
-            'per bag': 'BAG',
-            '/bag': 'BAG',
-            '/sheet': 'SHT',
-            'per sheet': 'SHT',
-            '/piece': 'EA',
-            '/each': 'EA',
-            'per piece': 'EA',
-            '/box': 'BOX',
-            'per box': 'BOX',
-            '/case': 'CS',
-            'per case': 'CS',
-            '/bundle': 'BDL',
-            'per bundle': 'BDL',
-            '/gallon': 'GAL',
-            '/gal': 'GAL',
-            'per gallon': 'GAL'
-        }
-
-        for pattern, unit in unit_patterns.items():
-            if pattern in title_lower:
-                return unit
-
-        return default
+        return parse_unit(None, title, default)
 
     def _infer_category(self, title: str) -> str:
         title_lower = title.lower()
@@ -0,0 +1,8 @@
+-- Edit markers read by the BOM alternatives cache (src/services/bom_alternatives.py)
+-- Run once; new databases get these from db.create_all().
+
+ALTER TABLE materials ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_materials_updated_at ON materials (updated_at);
+CREATE INDEX IF NOT EXISTS ix_material_variants_last_updated ON material_variants (last_updated);
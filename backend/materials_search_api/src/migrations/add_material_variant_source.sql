@@ -0,0 +1,8 @@
+-- Variant provenance for entity resolution (src/services/entity_resolution.py)
+-- Run once; new databases get these from db.create_all(). Existing variants
+-- were entered by hand and keep the 'manual' default.
+
+ALTER TABLE material_variants ADD COLUMN IF NOT EXISTS source VARCHAR(20) DEFAULT 'manual';
+
+CREATE INDEX IF NOT EXISTS ix_material_variants_canonical ON material_variants (canonical_material_id);
+CREATE INDEX IF NOT EXISTS ix_material_variants_material ON material_variants (material_id);
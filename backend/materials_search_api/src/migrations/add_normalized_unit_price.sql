@@ -0,0 +1,20 @@
+-- Normalized unit pricing (src/services/units.py) on existing databases
+-- Run once; new databases get these from db.create_all(). Backfill the values
+-- afterwards with the normalize_unit_prices task.
+
+ALTER TABLE materials ADD COLUMN IF NOT EXISTS normalized_unit VARCHAR(10);
+ALTER TABLE materials ADD COLUMN IF NOT EXISTS normalized_unit_price FLOAT;
+
+ALTER TABLE material_variants ADD COLUMN IF NOT EXISTS normalized_unit VARCHAR(10);
+ALTER TABLE material_variants ADD COLUMN IF NOT EXISTS normalized_unit_price FLOAT;
+
+CREATE INDEX IF NOT EXISTS ix_materials_normalized_unit_price ON materials (normalized_unit_price);
+CREATE INDEX IF NOT EXISTS ix_materials_unit_normalized_price ON materials (normalized_unit, normalized_unit_price);
+
+-- Catalog indexes that were declared but never created before the model fix
+CREATE INDEX IF NOT EXISTS ix_materials_category ON materials (category);
+CREATE INDEX IF NOT EXISTS ix_materials_price ON materials (price);
+CREATE INDEX IF NOT EXISTS ix_materials_availability ON materials (availability);
+CREATE INDEX IF NOT EXISTS ix_materials_supplier ON materials (supplier_id);
+CREATE INDEX IF NOT EXISTS ix_materials_category_price ON materials (category, price);
+CREATE INDEX IF NOT EXISTS ix_materials_name ON materials (name);
@@ -0,0 +1,7 @@
+-- Content hashes that let ingestion skip unchanged provider prices
+-- Run once; new databases get these from db.create_all(). Rows without a hash
+-- are rewritten on their next sync, which fills it in.
+
+ALTER TABLE price_sources ADD COLUMN IF NOT EXISTS content_hash VARCHAR(40);
+
+CREATE INDEX IF NOT EXISTS ix_price_sources_provider_external ON price_sources (provider_id, external_id);
@@ -0,0 +1,6 @@
+-- Per-provider circuit breaker state and health histograms
+-- Run once; new databases get these from db.create_all().
+
+ALTER TABLE data_providers ADD COLUMN IF NOT EXISTS circuit_state VARCHAR(20) DEFAULT 'closed';
+ALTER TABLE data_providers ADD COLUMN IF NOT EXISTS circuit_opened_at TIMESTAMP;
+ALTER TABLE data_providers ADD COLUMN IF NOT EXISTS health JSON DEFAULT '{}';
@@ -0,0 +1,6 @@
+-- Per-user and per-project best-value scoring weights (src/services/scoring.py)
+-- Run once; new databases get these from db.create_all(). NULL means the
+-- default weights.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS scoring_weights JSON;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS scoring_weights JSON;
@@ -0,0 +1,5 @@
+-- Resumable paginated syncs (src/services/ingestion.py checkpoints)
+-- Run once; new databases get these from db.create_all().
+
+ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS checkpoint JSON DEFAULT '{}';
+ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS resumed_from_id INTEGER REFERENCES sync_jobs (id);
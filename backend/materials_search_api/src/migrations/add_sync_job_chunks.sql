@@ -0,0 +1,6 @@
+-- Chunk progress for fanned-out provider syncs (sync_provider / finalize_sync_job)
+-- Run once; new databases get these from db.create_all().
+
+ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS chunks_total INTEGER DEFAULT 1;
+ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS chunks_completed INTEGER DEFAULT 0;
+ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS chunks_failed INTEGER DEFAULT 0;
@@ -75,3 +75,35 @@ class BOMItem(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'material': self.material.to_dict() if self.material else None
         }
+
+
+class BOMOptimizationJob(db.Model):
+    __tablename__ = 'bom_optimization_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bom_id = db.Column(db.Integer, db.ForeignKey('bills_of_materials.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(50), default='pending')  # 'pending', 'running', 'completed', 'failed'
+    constraints = db.Column(db.JSON, default={})
+    result = db.Column(db.JSON)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    bom = db.relationship('BillOfMaterials', backref=db.backref(
+        'optimization_jobs', lazy='dynamic', cascade='all, delete-orphan'
+    ))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'bom_id': self.bom_id,
+            'status': self.status,
+            'constraints': self.constraints,
+            'result': self.result,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
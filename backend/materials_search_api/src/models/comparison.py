@@ -1,4 +1,5 @@
 from src.models.user import db
+from sqlalchemy import Index
 from datetime import datetime
 
 
@@ -15,7 +16,7 @@ class CanonicalMaterial(db.Model):
 
     variants = db.relationship('MaterialVariant', backref='canonical', lazy='dynamic')
 
-    def to_dict(self):
+    def to_dict(self, variant_count=None):
         return {
             'id': self.id,
             'name': self.name,
@@ -24,7 +25,7 @@ class CanonicalMaterial(db.Model):
             'specifications': self.specifications,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'variant_count': self.variants.count()
+            'variant_count': self.variants.count() if variant_count is None else variant_count
         }
 
 
@@ -40,11 +41,20 @@ class MaterialVariant(db.Model):
     lead_time_days = db.Column(db.Integer)
     availability = db.Column(db.String(50))
     minimum_order = db.Column(db.Float)
+    normalized_unit = db.Column(db.String(10))
+    normalized_unit_price = db.Column(db.Float)
+    source = db.Column(db.String(20), default='manual')  # 'manual', 'resolver'
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     supplier = db.relationship('Supplier', backref=db.backref('variants', lazy='dynamic'))
     material = db.relationship('Material', backref=db.backref('variant', uselist=False))
 
+    __table_args__ = (
+        Index('ix_material_variants_canonical', 'canonical_material_id'),
+        Index('ix_material_variants_material', 'material_id'),
+        Index('ix_material_variants_last_updated', 'last_updated'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -54,8 +64,80 @@ class MaterialVariant(db.Model):
             'material_id': self.material_id,
             'price': self.price,
             'unit': self.unit,
+            'normalized_unit': self.normalized_unit,
+            'normalized_unit_price': self.normalized_unit_price,
             'lead_time_days': self.lead_time_days,
             'availability': self.availability,
             'minimum_order': self.minimum_order,
+            'source': self.source,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+        }
+
+
+class CanonicalComparison(db.Model):
+    """
+    Materialized price comparison for one canonical material.
+
+    Holds everything the comparison endpoints return (variants sorted by
+    price, statistics, best value), so a read is a single primary-key lookup.
+    Rows are rebuilt when a variant is added and flagged stale when variants
+    or their suppliers change elsewhere; stale or missing rows are rebuilt on
+    read or by the periodic sweep.
+    """
+    __tablename__ = 'canonical_comparisons'
+
+    canonical_material_id = db.Column(db.Integer, db.ForeignKey('canonical_materials.id'), primary_key=True)
+    canonical = db.Column(db.JSON, nullable=False)
+    variants = db.Column(db.JSON, nullable=False)
+    comparisons = db.Column(db.JSON, nullable=False)
+    price_range = db.Column(db.JSON, nullable=False)
+    price_statistics = db.Column(db.JSON, nullable=False)
+    best_value = db.Column(db.JSON)
+    is_stale = db.Column(db.Boolean, default=False, nullable=False)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_canonical_comparisons_stale', 'is_stale'),
+    )
+
+
+class CanonicalMaterialStats(db.Model):
+    """
+    Variant count and price statistics per canonical material.
+
+    Kept in step with the variants by services.comparison.refresh_canonical_stats
+    so the catalog listing is one join, sortable and filterable on indexed
+    columns. Canonicals without variants have a row of zeros.
+    """
+    __tablename__ = 'canonical_material_stats'
+
+    canonical_material_id = db.Column(db.Integer, db.ForeignKey('canonical_materials.id'), primary_key=True)
+    variant_count = db.Column(db.Integer, default=0, nullable=False)
+    min_price = db.Column(db.Float, default=0.0, nullable=False)
+    max_price = db.Column(db.Float, default=0.0, nullable=False)
+    avg_price = db.Column(db.Float, default=0.0, nullable=False)
+    price_spread = db.Column(db.Float, default=0.0, nullable=False)
+    price_spread_percent = db.Column(db.Float, default=0.0, nullable=False)
+    last_updated = db.Column(db.DateTime, nullable=False)
+
+    # (sort column, id) pairs serve keyset pagination for each sort order.
+    __table_args__ = (
+        Index('ix_canonical_stats_variant_count', 'variant_count', 'canonical_material_id'),
+        Index('ix_canonical_stats_min_price', 'min_price', 'canonical_material_id'),
+        Index('ix_canonical_stats_max_price', 'max_price', 'canonical_material_id'),
+        Index('ix_canonical_stats_avg_price', 'avg_price', 'canonical_material_id'),
+        Index('ix_canonical_stats_price_spread', 'price_spread', 'canonical_material_id'),
+        Index('ix_canonical_stats_price_spread_percent', 'price_spread_percent', 'canonical_material_id'),
+        Index('ix_canonical_stats_last_updated', 'last_updated', 'canonical_material_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'variant_count': self.variant_count,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'avg_price': self.avg_price,
+            'price_spread': self.price_spread,
+            'price_spread_percent': self.price_spread_percent,
             'last_updated': self.last_updated.isoformat() if self.last_updated else None
         }
@@ -27,6 +27,10 @@ class Material(db.Model):
     certifications = db.Column(db.JSON)
     sustainability_rating = db.Column(db.String(10))
     image_url = db.Column(db.String(500))
+    # Price per comparable unit (SF, LF, EA, ...), kept by src.services.units
+    normalized_unit = db.Column(db.String(10))
+    normalized_unit_price = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     supplier = db.relationship('Supplier', backref=db.backref('materials', lazy=True))
     
@@ -40,6 +44,8 @@ class Material(db.Model):
             'specifications': self.specifications,
             'price': self.price,
             'unit': self.unit,
+            'normalized_unit': self.normalized_unit,
+            'normalized_unit_price': self.normalized_unit_price,
             'supplier_id': self.supplier_id,
             'supplier_name': self.supplier.name if self.supplier else None,
             'availability': self.availability,
@@ -51,24 +57,21 @@ class Material(db.Model):
         }
 
 
+# Declared against the mapped columns: assigning __table_args__ after the class
+# is built would leave the Table without these indexes.
 if is_postgres:
     Material.search_vector = db.Column(TSVECTOR)
-    Material.__table_args__ = (
-        Index('ix_materials_search_vector', 'search_vector', postgresql_using='gin'),
-        Index('ix_materials_category', 'category'),
-        Index('ix_materials_price', 'price'),
-        Index('ix_materials_availability', 'availability'),
-        Index('ix_materials_supplier', 'supplier_id'),
-        Index('ix_materials_category_price', 'category', 'price'),
-        Index('ix_materials_name', 'name'),
-    )
-else:
-    Material.__table_args__ = (
-        Index('ix_materials_category', 'category'),
-        Index('ix_materials_price', 'price'),
-        Index('ix_materials_availability', 'availability'),
-        Index('ix_materials_supplier', 'supplier_id'),
-    )
+    Index('ix_materials_search_vector', Material.search_vector, postgresql_using='gin')
+    Index('ix_materials_category_price', Material.category, Material.price)
+    Index('ix_materials_name', Material.name)
+
+Index('ix_materials_category', Material.category)
+Index('ix_materials_price', Material.price)
+Index('ix_materials_availability', Material.availability)
+Index('ix_materials_supplier', Material.supplier_id)
+Index('ix_materials_normalized_unit_price', Material.normalized_unit_price)
+Index('ix_materials_unit_normalized_price', Material.normalized_unit, Material.normalized_unit_price)
+Index('ix_materials_updated_at', Material.updated_at)
 
 
 class Supplier(db.Model):
@@ -90,6 +93,7 @@ class Supplier(db.Model):
     rating = db.Column(db.Float, default=0.0)
     total_reviews = db.Column(db.Integer, default=0)
     is_verified = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         Index('ix_suppliers_rating', 'rating'),
@@ -195,6 +199,8 @@ class Project(db.Model):
     end_date = db.Column(db.Date)
     status = db.Column(db.String(50), default='Planning')
     user_id = db.Column(db.Integer, nullable=False)
+    # Best-value weight overrides; take precedence over the owner's.
+    scoring_weights = db.Column(db.JSON)
 
     def to_dict(self):
         return {
@@ -207,7 +213,8 @@ class Project(db.Model):
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'status': self.status,
-            'user_id': self.user_id
+            'user_id': self.user_id,
+            'scoring_weights': self.scoring_weights
         }
 
 
@@ -225,6 +232,9 @@ class DataProvider(db.Model):
     rate_limit_period = db.Column(db.Integer, default=3600)
     last_sync_at = db.Column(db.DateTime)
     sync_interval_hours = db.Column(db.Integer, default=24)
+    circuit_state = db.Column(db.String(20), default='closed')  # 'closed', 'open', 'half_open'
+    circuit_opened_at = db.Column(db.DateTime)
+    health = db.Column(db.JSON, default={})  # outcome window, latency/error histograms
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -241,6 +251,9 @@ class DataProvider(db.Model):
             'rate_limit_period': self.rate_limit_period,
             'last_sync_at': self.last_sync_at.isoformat() if self.last_sync_at else None,
             'sync_interval_hours': self.sync_interval_hours,
+            'circuit_state': self.circuit_state or 'closed',
+            'circuit_opened_at': self.circuit_opened_at.isoformat() if self.circuit_opened_at else None,
+            'health': self.health or {},
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -258,6 +271,7 @@ class PriceSource(db.Model):
     confidence_score = db.Column(db.Float, default=1.0)
     source_url = db.Column(db.String(500))
     raw_data = db.Column(db.JSON)
+    content_hash = db.Column(db.String(40))
     fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     expires_at = db.Column(db.DateTime)
     is_valid = db.Column(db.Boolean, default=True)
@@ -267,6 +281,7 @@ class PriceSource(db.Model):
     __table_args__ = (
         Index('ix_price_sources_material_provider', 'material_id', 'provider_id'),
         Index('ix_price_sources_fetched', 'fetched_at'),
+        Index('ix_price_sources_provider_external', 'provider_id', 'external_id'),
     )
 
     def to_dict(self):
@@ -287,22 +302,220 @@ class PriceSource(db.Model):
         }
 
 
+class MaterialPriceConsensus(db.Model):
+    __tablename__ = 'material_price_consensus'
+
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), primary_key=True)
+    consensus_price = db.Column(db.Float, nullable=False)
+    median_price = db.Column(db.Float)
+    mean_price = db.Column(db.Float)
+    min_price = db.Column(db.Float)
+    max_price = db.Column(db.Float)
+    mad = db.Column(db.Float)
+    source_count = db.Column(db.Integer, default=0)
+    outlier_count = db.Column(db.Integer, default=0)
+    confidence = db.Column(db.Float)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    material = db.relationship('Material', backref=db.backref('price_consensus', uselist=False))
+
+    def to_dict(self):
+        return {
+            'material_id': self.material_id,
+            'consensus_price': self.consensus_price,
+            'median_price': self.median_price,
+            'mean_price': self.mean_price,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'mad': self.mad,
+            'source_count': self.source_count,
+            'outlier_count': self.outlier_count,
+            'confidence': self.confidence,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+
+class MaterialRefreshSchedule(db.Model):
+    __tablename__ = 'material_refresh_schedules'
+
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'), primary_key=True)
+    volatility = db.Column(db.Float)  # std dev of daily log price changes
+    volatility_source = db.Column(db.String(20))  # 'material', 'category', 'default'
+    refresh_interval_hours = db.Column(db.Float, nullable=False)
+    last_refreshed_at = db.Column(db.DateTime)
+    next_refresh_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    material = db.relationship('Material', backref=db.backref('refresh_schedule', uselist=False))
+
+    __table_args__ = (
+        Index('ix_material_refresh_schedules_next', 'next_refresh_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'material_id': self.material_id,
+            'volatility': self.volatility,
+            'volatility_source': self.volatility_source,
+            'refresh_interval_hours': self.refresh_interval_hours,
+            'last_refreshed_at': self.last_refreshed_at.isoformat() if self.last_refreshed_at else None,
+            'next_refresh_at': self.next_refresh_at.isoformat() if self.next_refresh_at else None
+        }
+
+
+class DeadLetter(db.Model):
+    __tablename__ = 'dead_letters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'sync', 'chunk', 'refresh', 'items'
+    provider_id = db.Column(db.Integer, db.ForeignKey('data_providers.id'), nullable=False)
+    sync_job_id = db.Column(db.Integer, db.ForeignKey('sync_jobs.id'))
+    payload = db.Column(db.JSON, default={})  # task arguments needed to replay
+    error_type = db.Column(db.String(100))
+    error_message = db.Column(db.Text)
+    status_code = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, default=1)
+    status = db.Column(db.String(20), default='pending')  # 'pending', 'replayed', 'discarded'
+    replay_task_id = db.Column(db.String(100))
+    replayed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    provider = db.relationship('DataProvider', backref=db.backref('dead_letters', lazy='dynamic'))
+
+    __table_args__ = (
+        Index('ix_dead_letters_status_provider', 'status', 'provider_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'provider_id': self.provider_id,
+            'provider_name': self.provider.name if self.provider else None,
+            'sync_job_id': self.sync_job_id,
+            'payload': self.payload or {},
+            'error_type': self.error_type,
+            'error_message': self.error_message,
+            'status_code': self.status_code,
+            'attempts': self.attempts,
+            'status': self.status,
+            'replay_task_id': self.replay_task_id,
+            'replayed_at': self.replayed_at.isoformat() if self.replayed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class ProviderMaterialMap(db.Model):
+    """Which catalog material a provider's item (provider_id, external_id) is."""
+    __tablename__ = 'provider_material_map'
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('data_providers.id'), nullable=False)
+    external_id = db.Column(db.String(200), nullable=False)
+    material_id = db.Column(db.Integer, db.ForeignKey('materials.id'))
+    status = db.Column(db.String(20), default='pending')  # 'pending', 'matched', 'unmatched'
+    match_method = db.Column(db.String(20))  # 'history', 'name', 'tokens', 'manual'
+    match_score = db.Column(db.Float)
+    provider_name = db.Column(db.String(500))  # item name as the provider lists it
+    category = db.Column(db.String(100))
+    pending_price = db.Column(db.JSON)  # latest unmatched offer, written once matched
+    match_attempts = db.Column(db.Integer, default=0)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    matched_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    material = db.relationship('Material')
+    provider = db.relationship('DataProvider')
+
+    __table_args__ = (
+        Index('ux_provider_material_map_provider_external', 'provider_id', 'external_id', unique=True),
+        Index('ix_provider_material_map_status', 'status', 'provider_id'),
+        Index('ix_provider_material_map_material', 'material_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'provider_id': self.provider_id,
+            'provider_name': self.provider.name if self.provider else None,
+            'external_id': self.external_id,
+            'material_id': self.material_id,
+            'material_name': self.material.name if self.material else None,
+            'status': self.status,
+            'match_method': self.match_method,
+            'match_score': self.match_score,
+            'item_name': self.provider_name,
+            'category': self.category,
+            'match_attempts': self.match_attempts,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None,
+            'matched_at': self.matched_at.isoformat() if self.matched_at else None
+        }
+
+
+class PriceSourceArchive(db.Model):
+    """A batch of purged price_sources rows, stored as zlib-compressed JSON."""
+    __tablename__ = 'price_source_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    first_price_source_id = db.Column(db.Integer, nullable=False)
+    last_price_source_id = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    oldest_fetched_at = db.Column(db.DateTime)
+    newest_fetched_at = db.Column(db.DateTime)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'first_price_source_id': self.first_price_source_id,
+            'last_price_source_id': self.last_price_source_id,
+            'row_count': self.row_count,
+            'oldest_fetched_at': self.oldest_fetched_at.isoformat() if self.oldest_fetched_at else None,
+            'newest_fetched_at': self.newest_fetched_at.isoformat() if self.newest_fetched_at else None,
+            'compressed_bytes': len(self.payload) if self.payload else 0,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+
 class SyncJob(db.Model):
     __tablename__ = 'sync_jobs'
 
     id = db.Column(db.Integer, primary_key=True)
     provider_id = db.Column(db.Integer, db.ForeignKey('data_providers.id'), nullable=False)
     job_type = db.Column(db.String(50), nullable=False)  # 'full', 'incremental', 'single'
-    status = db.Column(db.String(50), default='pending')  # 'pending', 'running', 'completed', 'failed'
+    status = db.Column(db.String(50), default='pending')  # 'pending', 'running', 'retrying', 'completed', 'failed', 'coalesced'
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
     items_processed = db.Column(db.Integer, default=0)
     items_failed = db.Column(db.Integer, default=0)
+    chunks_total = db.Column(db.Integer, default=1)
+    chunks_completed = db.Column(db.Integer, default=0)
+    chunks_failed = db.Column(db.Integer, default=0)
+    # Last completed position per unfinished chunk, keyed by the chunk's JSON
+    checkpoint = db.Column(db.JSON, default={})
+    resumed_from_id = db.Column(db.Integer, db.ForeignKey('sync_jobs.id'))
     error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     provider = db.relationship('DataProvider', backref=db.backref('sync_jobs', lazy='dynamic'))
 
+    def progress(self):
+        chunks_total = self.chunks_total or 1
+        chunks_done = (self.chunks_completed or 0) + (self.chunks_failed or 0)
+        eta_seconds = None
+        if self.status == 'running' and self.started_at and 0 < chunks_done < chunks_total:
+            elapsed = (datetime.utcnow() - self.started_at).total_seconds()
+            eta_seconds = round(elapsed / chunks_done * (chunks_total - chunks_done))
+
+        return {
+            'chunks_total': chunks_total,
+            'chunks_completed': self.chunks_completed or 0,
+            'chunks_failed': self.chunks_failed or 0,
+            'percent': round(100.0 * chunks_done / chunks_total, 1),
+            'eta_seconds': eta_seconds
+        }
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -314,6 +527,9 @@ class SyncJob(db.Model):
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'items_processed': self.items_processed,
             'items_failed': self.items_failed,
-            'error_message': self.error_message
+            'error_message': self.error_message,
+            'progress': self.progress(),
+            'checkpoint': self.checkpoint or {},
+            'resumed_from_id': self.resumed_from_id
         }
 
@@ -13,6 +13,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=True)
     company_name = db.Column(db.String(200))
     role = db.Column(db.String(50), default='buyer')
+    # Best-value weight overrides (see services/scoring.py).
+    scoring_weights = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     saved_searches = db.relationship('SavedSearch', backref='user', lazy='dynamic')
@@ -28,6 +30,7 @@ class User(db.Model):
             'email': self.email,
             'company_name': self.company_name,
             'role': self.role,
+            'scoring_weights': self.scoring_weights,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -7,9 +7,13 @@ from src.services.bom import (
     duplicate_bom, refresh_all_prices, export_bom_to_csv, get_bom_summary,
     reorder_items
 )
+from src.services.bom_alternatives import get_bom_alternatives
 from src.schemas.bom import (
-    BOMCreate, BOMUpdate, BOMItemCreate, BOMItemUpdate, BOMItemReorder, BOMDuplicate
+    BOMCreate, BOMUpdate, BOMItemCreate, BOMItemUpdate, BOMItemReorder, BOMDuplicate, BOMOptimize
 )
+from src.models.user import db
+from src.models.bom import BOMOptimizationJob
+from src.tasks.bom_tasks import optimize_bom_task
 
 bom_bp = Blueprint('bom', __name__)
 
@@ -343,6 +347,70 @@ def get_bom_summary_route(bom_id):
         return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
 
 
+@bom_bp.route('/boms/<int:bom_id>/alternatives', methods=['GET'])
+@jwt_required()
+def get_bom_alternatives_route(bom_id):
+    user_id = int(get_jwt_identity())
+
+    bom = get_bom_by_id(bom_id, user_id)
+    if not bom:
+        return jsonify({'error': 'BOM not found', 'code': 'NOT_FOUND'}), 404
+
+    try:
+        return jsonify(get_bom_alternatives(bom))
+    except Exception as e:
+        return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
+
+
+@bom_bp.route('/boms/<int:bom_id>/optimize', methods=['POST'])
+@jwt_required()
+def optimize_bom_route(bom_id):
+    user_id = int(get_jwt_identity())
+
+    bom = get_bom_by_id(bom_id, user_id)
+    if not bom:
+        return jsonify({'error': 'BOM not found', 'code': 'NOT_FOUND'}), 404
+
+    try:
+        params = BOMOptimize(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'code': 'VALIDATION_ERROR',
+            'details': [{'loc': list(err['loc']), 'msg': err['msg'], 'type': err['type']} for err in e.errors()]
+        }), 400
+
+    try:
+        job = BOMOptimizationJob(bom_id=bom.id, user_id=user_id, status='pending', constraints=params.model_dump())
+        db.session.add(job)
+        db.session.commit()
+
+        # Estimators wait on the result, so it runs on the interactive workers.
+        task = optimize_bom_task.apply_async((job.id,), queue='interactive')
+        db.session.refresh(job)
+
+        return jsonify({**job.to_dict(), 'task_id': task.id}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
+
+
+@bom_bp.route('/boms/<int:bom_id>/optimize/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_bom_optimization(bom_id, job_id):
+    user_id = int(get_jwt_identity())
+
+    bom = get_bom_by_id(bom_id, user_id)
+    if not bom:
+        return jsonify({'error': 'BOM not found', 'code': 'NOT_FOUND'}), 404
+
+    job = BOMOptimizationJob.query.filter_by(id=job_id, bom_id=bom.id).first()
+    if not job:
+        return jsonify({'error': 'Optimization job not found', 'code': 'NOT_FOUND'}), 404
+
+    return jsonify(job.to_dict())
+
+
 @bom_bp.route('/boms/<int:bom_id>/export', methods=['GET'])
 @jwt_required()
 def export_bom(bom_id):
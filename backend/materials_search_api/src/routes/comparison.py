@@ -1,24 +1,57 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from pydantic import ValidationError
+from sqlalchemy import and_, or_, asc, desc, func
 from src.models.user import db
 from src.models.material import Material
-from src.models.comparison import CanonicalMaterial, MaterialVariant
+from src.models.comparison import CanonicalMaterial, MaterialVariant, CanonicalMaterialStats
 from src.services.comparison import (
     get_material_comparison,
     create_canonical_material,
     add_variant_to_canonical,
-    get_price_statistics
+    get_canonical_comparison
 )
-from src.schemas.comparison import CanonicalMaterialCreate, MaterialVariantCreate
+from src.services.scoring import scoring_weights_for
+from src.schemas.comparison import (
+    CanonicalMaterialCreate, MaterialVariantCreate, CanonicalMaterialListParams, CanonicalSortBy
+)
+from src.schemas.material import SortOrder
+from src.routes.materials import validate_request_params, encode_cursor, decode_cursor
+from src.tasks.sync_tasks import resolve_canonical_materials_task
 
 comparison_bp = Blueprint('comparison', __name__)
 
+# Listing values for a canonical whose stats row is missing (e.g. created
+# before the stats table existed and not yet backfilled).
+_EMPTY_STATS = {
+    'variant_count': 0, 'min_price': 0.0, 'max_price': 0.0, 'avg_price': 0.0,
+    'price_spread': 0.0, 'price_spread_percent': 0.0, 'last_updated': None
+}
+
+
+def _stat(name):
+    """A stats column with its empty-row default, for the outer-joined listing query."""
+    column = getattr(CanonicalMaterialStats, name)
+    default = CanonicalMaterial.created_at if name == 'last_updated' else _EMPTY_STATS[name]
+    return func.coalesce(column, default)
+
 
 @comparison_bp.route('/materials/<int:material_id>/compare', methods=['GET'])
 def compare_material_prices(material_id):
+    user_id = None
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        if identity:
+            user_id = int(identity)
+    except Exception:
+        pass
+
     try:
-        result = get_material_comparison(material_id)
+        project_id = request.args.get('project_id', type=int)
+        weights = scoring_weights_for(user_id, project_id) if user_id else None
+        result = get_material_comparison(material_id, weights)
 
         if not result:
             return jsonify({
@@ -34,24 +67,106 @@ def compare_material_prices(material_id):
 
 @comparison_bp.route('/canonical-materials', methods=['GET'])
 def get_canonical_materials():
-    try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        category = request.args.get('category')
+    """
+    Canonical materials with their variant count and price statistics.
+
+    One query joins the maintained stats table, so stats can be filtered
+    and sorted on (e.g. sort_by=price_spread_percent&sort_order=desc for the
+    widest spreads). The join is outer: a canonical without a stats row is
+    listed with empty stats. Offset pagination by default; use_cursor
+    switches to keyset pagination on (sort value, id).
+    """
+    params, error = validate_request_params(CanonicalMaterialListParams, request.args.to_dict())
+    if error:
+        return jsonify(error), 400
 
-        query = CanonicalMaterial.query
+    try:
+        if params.sort_by == CanonicalSortBy.name:
+            sort_column = CanonicalMaterial.name
+        else:
+            sort_column = _stat(params.sort_by.value)
+        sort_order_fn = desc if params.sort_order == SortOrder.desc else asc
+
+        query = db.session.query(CanonicalMaterial, CanonicalMaterialStats, sort_column.label('sort_value')).outerjoin(
+            CanonicalMaterialStats, CanonicalMaterialStats.canonical_material_id == CanonicalMaterial.id
+        )
 
-        if category:
-            query = query.filter(CanonicalMaterial.category == category)
+        if params.category:
+            query = query.filter(CanonicalMaterial.category == params.category)
+        if params.subcategory:
+            query = query.filter(CanonicalMaterial.subcategory == params.subcategory)
+        if params.min_variant_count is not None:
+            query = query.filter(_stat('variant_count') >= params.min_variant_count)
+        if params.max_variant_count is not None:
+            query = query.filter(_stat('variant_count') <= params.max_variant_count)
+        if params.min_price_spread is not None:
+            query = query.filter(_stat('price_spread') >= params.min_price_spread)
+        if params.min_price_spread_percent is not None:
+            query = query.filter(_stat('price_spread_percent') >= params.min_price_spread_percent)
+        if params.updated_since is not None:
+            query = query.filter(_stat('last_updated') >= params.updated_since)
+
+        def serialize(rows):
+            results = []
+            for canonical, stats, _ in rows:
+                values = stats.to_dict() if stats else _EMPTY_STATS
+                results.append({**canonical.to_dict(variant_count=values['variant_count']), **values})
+            return results
+
+        if params.use_cursor:
+            if params.cursor:
+                cursor_data = decode_cursor(params.cursor)
+                if not cursor_data:
+                    return jsonify({'error': 'Invalid cursor', 'code': 'VALIDATION_ERROR'}), 400
+                cursor_sort_value = cursor_data.get('sort_value')
+                if params.sort_by == CanonicalSortBy.last_updated:
+                    cursor_sort_value = datetime.fromisoformat(cursor_sort_value)
+                cursor_id = cursor_data.get('id')
+
+                if params.sort_order == SortOrder.desc:
+                    query = query.filter(or_(
+                        sort_column < cursor_sort_value,
+                        and_(sort_column == cursor_sort_value, CanonicalMaterial.id < cursor_id)
+                    ))
+                else:
+                    query = query.filter(or_(
+                        sort_column > cursor_sort_value,
+                        and_(sort_column == cursor_sort_value, CanonicalMaterial.id > cursor_id)
+                    ))
+
+            rows = query.order_by(sort_order_fn(sort_column), sort_order_fn(CanonicalMaterial.id)).limit(
+                params.per_page + 1
+            ).all()
+            has_next = len(rows) > params.per_page
+            rows = rows[:params.per_page]
+
+            next_cursor = None
+            if has_next and rows:
+                canonical, _, last_sort_value = rows[-1]
+                if isinstance(last_sort_value, datetime):
+                    last_sort_value = last_sort_value.isoformat()
+                next_cursor = encode_cursor(canonical.id, last_sort_value)
 
-        materials = query.paginate(page=page, per_page=per_page, error_out=False)
+            return jsonify({
+                'canonical_materials': serialize(rows),
+                'per_page': params.per_page,
+                'has_next': has_next,
+                'next_cursor': next_cursor,
+                'pagination_type': 'cursor'
+            })
+
+        total = query.count()
+        rows = query.order_by(sort_order_fn(sort_column), sort_order_fn(CanonicalMaterial.id)).offset(
+            (params.page - 1) * params.per_page
+        ).limit(params.per_page).all()
 
         return jsonify({
-            'canonical_materials': [m.to_dict() for m in materials.items],
-            'total': materials.total,
-            'pages': materials.pages,
-            'current_page': page,
-            'per_page': per_page
+            'canonical_materials': serialize(rows),
+            'total': total,
+            'pages': (total + params.per_page - 1) // params.per_page,
+            'current_page': params.page,
+            'per_page': params.per_page,
+            'pagination_type': 'offset'
         })
 
     except Exception as e:
@@ -61,14 +176,19 @@ def get_canonical_materials():
 @comparison_bp.route('/canonical-materials/<int:canonical_id>', methods=['GET'])
 def get_canonical_material(canonical_id):
     try:
-        canonical = CanonicalMaterial.query.get_or_404(canonical_id)
-        stats = get_price_statistics(canonical_id)
-
-        result = canonical.to_dict()
-        result['price_statistics'] = stats
-        result['variants'] = [v.to_dict() for v in canonical.variants.all()]
+        record = get_canonical_comparison(canonical_id)
+        if not record:
+            return jsonify({
+                'error': f'Canonical material with ID {canonical_id} not found',
+                'code': 'NOT_FOUND'
+            }), 404
 
-        return jsonify(result)
+        return jsonify({
+            **record.canonical,
+            'price_statistics': record.price_statistics,
+            'variants': record.variants,
+            'best_value': record.best_value
+        })
 
     except Exception as e:
         return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
@@ -106,6 +226,18 @@ def create_canonical():
         return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
 
 
+@comparison_bp.route('/canonical-materials/resolve', methods=['POST'])
+@jwt_required()
+def resolve_canonicals():
+    from src.models.user import User
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin access required', 'code': 'FORBIDDEN'}), 403
+
+    task = resolve_canonical_materials_task.delay()
+    return jsonify({'message': 'Entity resolution queued', 'task_id': task.id}), 202
+
+
 @comparison_bp.route('/canonical-materials/<int:canonical_id>/variants', methods=['POST'])
 @jwt_required()
 def add_variant(canonical_id):
@@ -151,13 +283,17 @@ def add_variant(canonical_id):
 @comparison_bp.route('/canonical-materials/<int:canonical_id>/variants', methods=['GET'])
 def get_variants(canonical_id):
     try:
-        canonical = CanonicalMaterial.query.get_or_404(canonical_id)
-        variants = canonical.variants.all()
+        record = get_canonical_comparison(canonical_id)
+        if not record:
+            return jsonify({
+                'error': f'Canonical material with ID {canonical_id} not found',
+                'code': 'NOT_FOUND'
+            }), 404
 
         return jsonify({
-            'canonical_material': canonical.to_dict(),
-            'variants': [v.to_dict() for v in variants],
-            'price_statistics': get_price_statistics(canonical_id)
+            'canonical_material': record.canonical,
+            'variants': record.variants,
+            'price_statistics': record.price_statistics
         })
 
     except Exception as e:
@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db
-from src.models.material import DataProvider, PriceSource, SyncJob
-from src.tasks.sync_tasks import sync_provider
+from src.models.material import Material, DataProvider, PriceSource, SyncJob, DeadLetter, ProviderMaterialMap
+from src.tasks.sync_tasks import sync_provider, replay_dead_letter, match_provider_items, interactive_queue
+from src.services.consensus import get_price_consensus, summarize_sources
+from src.services.provider_health import is_provider_available
+from src.services.sync_lock import running_sync_job_id
+from src.services.material_matcher import assign_material
 
 data_integration_bp = Blueprint('data_integration', __name__)
 
@@ -90,11 +94,28 @@ def trigger_sync(provider_id):
 
     if not provider.is_active:
         return jsonify({'error': 'Provider is not active'}), 400
+    if not is_provider_available(provider):
+        return jsonify({
+            'error': 'Provider circuit is open',
+            'circuit_state': provider.circuit_state,
+            'circuit_opened_at': provider.circuit_opened_at.isoformat() if provider.circuit_opened_at else None
+        }), 503
 
     data = request.get_json() or {}
     job_type = data.get('job_type', 'full')
 
-    task = sync_provider.delay(provider_id, job_type)
+    running_job_id = running_sync_job_id(provider_id)
+    if running_job_id:
+        return jsonify({
+            'message': 'Sync already running',
+            'sync_job_id': running_job_id,
+            'provider_id': provider_id,
+            'coalesced': True
+        })
+
+    # User-triggered syncs get their own workers instead of queueing behind
+    # scheduled ones; browser scrapes keep to the browser workers.
+    task = sync_provider.apply_async((provider_id, job_type), queue=interactive_queue(provider))
 
     return jsonify({
         'message': 'Sync job queued',
@@ -137,6 +158,152 @@ def get_sync_job(job_id):
     return jsonify(job.to_dict())
 
 
+def _require_admin():
+    from src.models.user import User
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin access required', 'code': 'FORBIDDEN'}), 403
+    return None
+
+
+@data_integration_bp.route('/dead-letters', methods=['GET'])
+@jwt_required()
+def list_dead_letters():
+    forbidden = _require_admin()
+    if forbidden:
+        return forbidden
+
+    provider_id = request.args.get('provider_id', type=int)
+    kind = request.args.get('kind')
+    status = request.args.get('status', 'pending')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+
+    query = DeadLetter.query
+
+    if provider_id:
+        query = query.filter_by(provider_id=provider_id)
+    if kind:
+        query = query.filter_by(kind=kind)
+    if status != 'all':
+        query = query.filter_by(status=status)
+
+    query = query.order_by(DeadLetter.created_at.desc())
+    entries = query.paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'dead_letters': [e.to_dict() for e in entries.items],
+        'total': entries.total,
+        'page': page,
+        'per_page': per_page,
+        'has_next': entries.has_next,
+        'has_prev': entries.has_prev
+    })
+
+
+@data_integration_bp.route('/dead-letters/replay', methods=['POST'])
+@jwt_required()
+def replay_dead_letters():
+    forbidden = _require_admin()
+    if forbidden:
+        return forbidden
+
+    data = request.get_json() or {}
+    query = DeadLetter.query.filter_by(status='pending')
+
+    if data.get('ids'):
+        query = query.filter(DeadLetter.id.in_(data['ids']))
+    elif data.get('provider_id'):
+        query = query.filter_by(provider_id=data['provider_id'])
+        if data.get('kind'):
+            query = query.filter_by(kind=data['kind'])
+    else:
+        return jsonify({'error': 'Provide ids or provider_id', 'code': 'VALIDATION_ERROR'}), 400
+
+    replayed = []
+    skipped = []
+    for entry in query.order_by(DeadLetter.id).all():
+        # Entries stay pending until their provider's circuit lets work through.
+        if not is_provider_available(entry.provider):
+            skipped.append({'id': entry.id, 'reason': 'Provider circuit is open'})
+            continue
+        task = replay_dead_letter(entry)
+        replayed.append({'id': entry.id, 'kind': entry.kind, 'task_id': task.id})
+
+    return jsonify({
+        'message': f'{len(replayed)} dead letters replayed',
+        'replayed': replayed,
+        'skipped': skipped
+    })
+
+
+@data_integration_bp.route('/provider-material-map', methods=['GET'])
+@jwt_required()
+def list_provider_material_map():
+    forbidden = _require_admin()
+    if forbidden:
+        return forbidden
+
+    provider_id = request.args.get('provider_id', type=int)
+    status = request.args.get('status')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+
+    query = ProviderMaterialMap.query
+
+    if provider_id:
+        query = query.filter_by(provider_id=provider_id)
+    if status:
+        query = query.filter_by(status=status)
+
+    query = query.order_by(ProviderMaterialMap.last_seen_at.desc())
+    entries = query.paginate(page=page, per_page=per_page, error_out=False)
+
+    return jsonify({
+        'items': [e.to_dict() for e in entries.items],
+        'total': entries.total,
+        'page': page,
+        'per_page': per_page,
+        'has_next': entries.has_next,
+        'has_prev': entries.has_prev
+    })
+
+
+@data_integration_bp.route('/provider-material-map/<int:entry_id>', methods=['PUT'])
+@jwt_required()
+def update_provider_material_map(entry_id):
+    forbidden = _require_admin()
+    if forbidden:
+        return forbidden
+
+    entry = ProviderMaterialMap.query.get_or_404(entry_id)
+    data = request.get_json() or {}
+    material_id = data.get('material_id')
+    if not material_id or not Material.query.get(material_id):
+        return jsonify({'error': 'Valid material_id is required', 'code': 'VALIDATION_ERROR'}), 400
+
+    assign_material(entry, material_id)
+    return jsonify(entry.to_dict())
+
+
+@data_integration_bp.route('/provider-material-map/match', methods=['POST'])
+@jwt_required()
+def run_material_matcher():
+    forbidden = _require_admin()
+    if forbidden:
+        return forbidden
+
+    data = request.get_json() or {}
+    task = match_provider_items.delay(data.get('provider_id'), bool(data.get('rematch', False)))
+
+    return jsonify({
+        'message': 'Matcher queued',
+        'task_id': task.id,
+        'provider_id': data.get('provider_id'),
+        'rematch': bool(data.get('rematch', False))
+    })
+
+
 @data_integration_bp.route('/price-sources', methods=['GET'])
 def list_price_sources():
     material_id = request.args.get('material_id', type=int)
@@ -175,19 +342,29 @@ def get_material_price_sources(material_id):
 
     sources = query.order_by(PriceSource.confidence_score.desc()).all()
 
-    prices = [s.price for s in sources]
-    avg_price = sum(prices) / len(prices) if prices else None
-    min_price = min(prices) if prices else None
-    max_price = max(prices) if prices else None
+    # The stored consensus row covers valid sources only; it is read as-is and
+    # computed on the fly only before the first refresh has written it, or
+    # when invalid sources are listed too.
+    stored = get_price_consensus(material_id) if valid_only else None
+    if stored is not None:
+        consensus = stored.to_dict()
+    else:
+        material = Material.query.get(material_id)
+        consensus = summarize_sources(material, sources) if material else None
 
     return jsonify({
         'material_id': material_id,
         'price_sources': [s.to_dict() for s in sources],
         'statistics': {
-            'count': len(sources),
-            'average_price': round(avg_price, 2) if avg_price else None,
-            'min_price': min_price,
-            'max_price': max_price,
-            'price_spread': round(max_price - min_price, 2) if min_price and max_price else None
+            'count': consensus['source_count'] if consensus else 0,
+            'consensus_price': round(consensus['consensus_price'], 2) if consensus else None,
+            'average_price': round(consensus['mean_price'], 2) if consensus else None,
+            'median_price': consensus['median_price'] if consensus else None,
+            'min_price': consensus['min_price'] if consensus else None,
+            'max_price': consensus['max_price'] if consensus else None,
+            'price_spread': round(consensus['max_price'] - consensus['min_price'], 2) if consensus else None,
+            'outlier_count': consensus['outlier_count'] if consensus else 0,
+            'confidence': consensus['confidence'] if consensus else None,
+            'computed_at': consensus.get('computed_at') if consensus else None
         }
     })
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from sqlalchemy import or_, and_, asc, desc, func
 from sqlalchemy.orm import joinedload
 from pydantic import ValidationError
@@ -6,10 +7,17 @@ from src.models.user import db
 from src.models.material import Material, Supplier, Project
 from src.schemas.material import MaterialSearchParams, MaterialCreate, MaterialSortBy, SortOrder
 from src.schemas.supplier import SupplierCreate
+from src.schemas.user_features import ScoringWeightsUpdate
 from src.services.price_history import record_price
+from src.services.similarity import similar_material_ids
+from src.services.scoring import score_candidates, score_offers, scoring_weights_for
+from src.services.units import apply_normalized_price, unit_conversion
+from src.services.comparison import mark_comparisons_stale
+from src.services.entity_resolution import refresh_resolver_variants
 from src.cache import cache, CACHE_TIMEOUTS, make_cache_key
 import json
 import base64
+import numpy as np
 
 materials_bp = Blueprint('materials', __name__)
 
@@ -87,6 +95,12 @@ def search_materials():
                 Material.sustainability_rating == params.sustainability_rating.value
             )
 
+        if params.comparable_unit:
+            # Prices per unit only line up within one comparable unit (SF, LF, ...)
+            materials_query = materials_query.filter(
+                Material.normalized_unit == unit_conversion(params.comparable_unit)[0]
+            )
+
         sort_column = getattr(Material, params.sort_by.value, Material.name)
         sort_order_fn = desc if params.sort_order == SortOrder.desc else asc
 
@@ -206,6 +220,7 @@ def create_material():
             sustainability_rating=params.sustainability_rating.value if params.sustainability_rating else None,
             image_url=params.image_url
         )
+        apply_normalized_price(material)
 
         db.session.add(material)
         db.session.commit()
@@ -259,6 +274,10 @@ def update_material(material_id):
             material.sustainability_rating = data['sustainability_rating']
         if 'image_url' in data:
             material.image_url = data['image_url']
+        apply_normalized_price(material)
+        # Variants copied from this material, and the comparisons listing them, follow the edit.
+        refresh_resolver_variants([material.id])
+        mark_comparisons_stale(material_ids=[material.id])
 
         db.session.commit()
 
@@ -465,22 +484,72 @@ def get_recommendations():
         material_id = request.args.get('material_id', type=int)
         project_type = request.args.get('project_type')
         category = request.args.get('category')
+        project_id = request.args.get('project_id', type=int)
         limit = request.args.get('limit', 10, type=int)
-        
+
+        user_id = None
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+            if identity:
+                user_id = int(identity)
+        except Exception:
+            pass
+        weights = scoring_weights_for(user_id, project_id)
+
         if material_id:
-            # Get recommendations based on similar materials
+            # Nearest materials in the category from the similarity index
             base_material = Material.query.get_or_404(material_id)
-            recommendations = Material.query.filter(
-                and_(
-                    Material.category == base_material.category,
-                    Material.id != material_id
+            matches = similar_material_ids(base_material, k=limit)
+            scores = dict(matches)
+            by_id = {
+                m.id: m for m in Material.query.options(joinedload(Material.supplier)).filter(
+                    Material.id.in_(scores)
                 )
-            ).limit(limit).all()
+            }
+            recommendations = [
+                {
+                    **by_id[mid].to_dict(),
+                    'supplier_rating': by_id[mid].supplier.rating if by_id[mid].supplier else None,
+                    'similarity_score': score
+                }
+                for mid, score in matches if mid in by_id
+            ]
+            value_scores = score_offers(recommendations, weights=weights)
+            return jsonify({
+                'recommendations': [
+                    {**r, 'value_score': round(float(v), 2)} for r, v in zip(recommendations, value_scores)
+                ]
+            })
         elif category:
-            # Get popular materials in category
-            recommendations = Material.query.filter(
+            # Best value in the category: score every material as arrays, load only the top `limit`
+            rows = db.session.query(
+                Material.id, Material.price, Material.lead_time_days, Material.availability,
+                Material.normalized_unit, Material.normalized_unit_price, Supplier.rating
+            ).outerjoin(Supplier, Supplier.id == Material.supplier_id).filter(
                 Material.category == category
-            ).limit(limit).all()
+            ).order_by(Material.id).all()
+            value_scores = score_candidates(
+                [r.price for r in rows],
+                lead_times=[r.lead_time_days for r in rows],
+                availability=[r.availability for r in rows],
+                ratings=[r.rating for r in rows],
+                unit_prices=[r.normalized_unit_price for r in rows],
+                units=[r.normalized_unit for r in rows],
+                weights=weights
+            )
+            top = np.argsort(-value_scores, kind='stable')[:max(limit, 0)]
+            by_id = {
+                m.id: m for m in Material.query.options(joinedload(Material.supplier)).filter(
+                    Material.id.in_([rows[i].id for i in top])
+                )
+            }
+            return jsonify({
+                'recommendations': [
+                    {**by_id[rows[i].id].to_dict(), 'value_score': round(float(value_scores[i]), 2)}
+                    for i in top if rows[i].id in by_id
+                ]
+            })
         else:
             # Get general recommendations
             recommendations = Material.query.limit(limit).all()
@@ -549,6 +618,56 @@ def create_project():
         return jsonify({'error': str(e)}), 500
 
 
+@materials_bp.route('/projects/<int:project_id>/scoring-weights', methods=['GET'])
+@jwt_required()
+def get_project_scoring_weights(project_id):
+    """Best-value weight overrides for a project and the weights they resolve to"""
+    user_id = int(get_jwt_identity())
+    project = Project.query.filter_by(id=project_id, user_id=user_id).first()
+    if not project:
+        return jsonify({'error': f'Project with ID {project_id} not found', 'code': 'NOT_FOUND'}), 404
+
+    return jsonify({
+        'overrides': project.scoring_weights or {},
+        'weights': scoring_weights_for(user_id, project_id)
+    })
+
+
+@materials_bp.route('/projects/<int:project_id>/scoring-weights', methods=['PUT'])
+@jwt_required()
+def update_project_scoring_weights(project_id):
+    """Replace a project's best-value weight overrides; null components fall back to the owner's"""
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    if data is None:
+        return jsonify({'error': 'Request body is required', 'code': 'VALIDATION_ERROR'}), 400
+
+    try:
+        params = ScoringWeightsUpdate(**data)
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'code': 'VALIDATION_ERROR',
+            'details': [{'loc': list(err['loc']), 'msg': err['msg'], 'type': err['type']} for err in e.errors()]
+        }), 400
+
+    project = Project.query.filter_by(id=project_id, user_id=user_id).first()
+    if not project:
+        return jsonify({'error': f'Project with ID {project_id} not found', 'code': 'NOT_FOUND'}), 404
+
+    try:
+        project.scoring_weights = params.model_dump(exclude_none=True) or None
+        db.session.commit()
+        return jsonify({
+            'overrides': project.scoring_weights or {},
+            'weights': scoring_weights_for(user_id, project_id)
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
+
 @materials_bp.route('/materials/autocomplete', methods=['GET'])
 @cache.cached(timeout=60, make_cache_key=make_cache_key)
 def autocomplete_materials():
@@ -1,14 +1,16 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from pydantic import ValidationError
-from src.models.user import db, SavedSearch, Favorite
+from src.models.user import db, User, SavedSearch, Favorite
 from src.models.material import Material
 from src.schemas.user_features import (
     SavedSearchCreate,
     SavedSearchUpdate,
     FavoriteCreate,
-    FavoriteUpdate
+    FavoriteUpdate,
+    ScoringWeightsUpdate
 )
+from src.services.scoring import resolve_weights
 
 user_features_bp = Blueprint('user_features', __name__)
 
@@ -380,3 +382,52 @@ def toggle_favorite(material_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
+
+
+@user_features_bp.route('/scoring-weights', methods=['GET'])
+@jwt_required()
+def get_scoring_weights():
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found', 'code': 'NOT_FOUND'}), 404
+
+    return jsonify({
+        'overrides': user.scoring_weights or {},
+        'weights': resolve_weights(user.scoring_weights)
+    })
+
+
+@user_features_bp.route('/scoring-weights', methods=['PUT'])
+@jwt_required()
+def update_scoring_weights():
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    if data is None:
+        return jsonify({'error': 'Request body is required', 'code': 'VALIDATION_ERROR'}), 400
+
+    try:
+        params = ScoringWeightsUpdate(**data)
+    except ValidationError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'code': 'VALIDATION_ERROR',
+            'details': [{'loc': list(err['loc']), 'msg': err['msg'], 'type': err['type']} for err in e.errors()]
+        }), 400
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found', 'code': 'NOT_FOUND'}), 404
+
+    try:
+        user.scoring_weights = params.model_dump(exclude_none=True) or None
+        db.session.commit()
+        return jsonify({
+            'overrides': user.scoring_weights or {},
+            'weights': resolve_weights(user.scoring_weights)
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'code': 'INTERNAL_ERROR'}), 500
@@ -23,6 +23,7 @@ from .auth import (
 from .comparison import (
     CanonicalMaterialCreate,
     MaterialVariantCreate,
+    CanonicalMaterialListParams,
     MaterialComparisonResponse,
     PriceStatisticsResponse,
 )
@@ -31,6 +32,7 @@ from .user_features import (
     SavedSearchUpdate,
     FavoriteCreate,
     FavoriteUpdate,
+    ScoringWeightsUpdate,
 )
 from .bom import (
     BOMCreate,
@@ -39,6 +41,7 @@ from .bom import (
     BOMItemUpdate,
     BOMItemReorder,
     BOMDuplicate,
+    BOMOptimize,
 )
 
 __all__ = [
@@ -58,16 +61,19 @@ __all__ = [
     "UserResponse",
     "CanonicalMaterialCreate",
     "MaterialVariantCreate",
+    "CanonicalMaterialListParams",
     "MaterialComparisonResponse",
     "PriceStatisticsResponse",
     "SavedSearchCreate",
     "SavedSearchUpdate",
     "FavoriteCreate",
     "FavoriteUpdate",
+    "ScoringWeightsUpdate",
     "BOMCreate",
     "BOMUpdate",
     "BOMItemCreate",
     "BOMItemUpdate",
     "BOMItemReorder",
     "BOMDuplicate",
+    "BOMOptimize",
 ]
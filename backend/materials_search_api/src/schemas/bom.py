@@ -35,3 +35,10 @@ class BOMItemReorder(BaseModel):
 
 class BOMDuplicate(BaseModel):
     new_name: Optional[str] = Field(None, min_length=1, max_length=200)
+
+
+class BOMOptimize(BaseModel):
+    max_lead_time_days: Optional[int] = Field(None, ge=0)
+    max_suppliers: Optional[int] = Field(None, ge=1)
+    availability: Optional[List[str]] = None
+    respect_minimum_order: bool = True
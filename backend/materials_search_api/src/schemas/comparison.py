@@ -1,5 +1,19 @@
-from pydantic import BaseModel, field_validator
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
+from src.schemas.material import SortOrder
+
+
+class CanonicalSortBy(str, Enum):
+    name = "name"
+    variant_count = "variant_count"
+    min_price = "min_price"
+    max_price = "max_price"
+    avg_price = "avg_price"
+    price_spread = "price_spread"
+    price_spread_percent = "price_spread_percent"
+    last_updated = "last_updated"
 
 
 class CanonicalMaterialCreate(BaseModel):
@@ -24,6 +38,31 @@ class CanonicalMaterialCreate(BaseModel):
         return v.strip()
 
 
+class CanonicalMaterialListParams(BaseModel):
+    category: Optional[str] = Field(default=None, max_length=100)
+    subcategory: Optional[str] = Field(default=None, max_length=100)
+    min_variant_count: Optional[int] = Field(default=None, ge=0)
+    max_variant_count: Optional[int] = Field(default=None, ge=0)
+    min_price_spread: Optional[float] = Field(default=None, ge=0)
+    min_price_spread_percent: Optional[float] = Field(default=None, ge=0)
+    updated_since: Optional[datetime] = Field(
+        default=None,
+        description="Only canonicals with a variant updated at or after this time"
+    )
+    sort_by: CanonicalSortBy = Field(default=CanonicalSortBy.name)
+    sort_order: SortOrder = Field(default=SortOrder.asc)
+    page: int = Field(default=1, ge=1)
+    per_page: int = Field(default=20, ge=1, le=100)
+    cursor: Optional[str] = Field(
+        default=None,
+        description="Cursor for keyset pagination (base64 encoded)"
+    )
+    use_cursor: bool = Field(
+        default=False,
+        description="Use keyset pagination instead of offset"
+    )
+
+
 class MaterialVariantCreate(BaseModel):
     supplier_id: int
     price: float
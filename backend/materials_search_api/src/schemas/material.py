@@ -13,6 +13,7 @@ class MaterialSortBy(str, Enum):
     price = "price"
     lead_time = "lead_time_days"
     availability = "availability"
+    unit_price = "normalized_unit_price"
 
 
 class SustainabilityRating(str, Enum):
@@ -62,6 +63,11 @@ class MaterialSearchParams(BaseModel):
         default=None,
         description="Filter by sustainability rating (A/B/C/D)"
     )
+    comparable_unit: Optional[str] = Field(
+        default=None,
+        max_length=20,
+        description="Only materials priced in this comparable unit (SF, LF, EA, ...)"
+    )
     sort_by: Optional[MaterialSortBy] = Field(
         default=MaterialSortBy.name,
         description="Sort field"
@@ -116,6 +122,8 @@ class MaterialResponse(BaseModel):
     specifications: Optional[Dict[str, Any]]
     price: Optional[float]
     unit: Optional[str]
+    normalized_unit: Optional[str] = None
+    normalized_unit_price: Optional[float] = None
     supplier_id: int
     supplier_name: Optional[str]
     availability: str
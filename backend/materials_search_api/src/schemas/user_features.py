@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any
 
 
@@ -44,6 +44,15 @@ class FavoriteUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class ScoringWeightsUpdate(BaseModel):
+    """Best-value weight overrides; omitted or null components use the defaults."""
+    price: Optional[float] = Field(default=None, ge=0, le=100)
+    unit_price: Optional[float] = Field(default=None, ge=0, le=100)
+    lead_time: Optional[float] = Field(default=None, ge=0, le=100)
+    availability: Optional[float] = Field(default=None, ge=0, le=100)
+    rating: Optional[float] = Field(default=None, ge=0, le=100)
+
+
 class SavedSearchResponse(BaseModel):
     id: int
     user_id: int
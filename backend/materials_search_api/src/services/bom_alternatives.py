@@ -0,0 +1,276 @@
+import hashlib
+import json
+import numpy as np
+from sqlalchemy import func
+from src.models.user import db
+from src.models.material import Material, Supplier, PriceHistory
+from src.models.bom import BOMItem
+from src.models.comparison import MaterialVariant, CanonicalComparison
+from src.cache import shared_cache_get, shared_cache_set, CACHE_TIMEOUTS
+from src.services.comparison import refresh_canonical_comparisons, SIMILAR_MATERIALS_LIMIT
+from src.services.similarity import get_similarity_index
+from src.services.scoring import score_offers, scoring_weights_for
+from src.services.units import unit_code
+
+
+def _as_float(value):
+    return float('nan') if value is None else float(value)
+
+
+def load_bom_lines(bom_id):
+    """BOM items with their material's current offer and canonical material, in one query."""
+    rows = db.session.query(
+        BOMItem.id, BOMItem.material_id, BOMItem.quantity, BOMItem.unit_price_snapshot,
+        Material.name, Material.category, Material.unit, Material.price, Material.specifications,
+        Material.supplier_id, Material.lead_time_days, Material.availability, Material.minimum_order,
+        Material.normalized_unit, Material.normalized_unit_price,
+        Supplier.name.label('supplier_name'), Supplier.rating.label('supplier_rating'),
+        MaterialVariant.canonical_material_id
+    ).join(Material, Material.id == BOMItem.material_id).join(
+        Supplier, Supplier.id == Material.supplier_id
+    ).outerjoin(
+        MaterialVariant, MaterialVariant.material_id == Material.id
+    ).filter(BOMItem.bom_id == bom_id).order_by(BOMItem.sort_order, BOMItem.id).all()
+
+    lines, seen = [], set()
+    for row in rows:
+        if row.id not in seen:
+            seen.add(row.id)
+            lines.append(row)
+    return lines
+
+
+def _price_version():
+    """
+    Changes whenever anything an offer is built from changes: a recorded
+    price, a material, supplier or variant added or edited (availability,
+    lead time, rating, ...), or a comparison marked stale or refreshed.
+    """
+    return tuple(db.session.query(
+        db.session.query(func.max(PriceHistory.id)).scalar_subquery(),
+        db.session.query(func.max(Material.id)).scalar_subquery(),
+        db.session.query(func.max(Material.updated_at)).scalar_subquery(),
+        db.session.query(func.max(Supplier.updated_at)).scalar_subquery(),
+        db.session.query(func.max(MaterialVariant.id)).scalar_subquery(),
+        db.session.query(func.max(MaterialVariant.last_updated)).scalar_subquery(),
+        db.session.query(func.max(CanonicalComparison.refreshed_at)).scalar_subquery(),
+        db.session.query(func.count(CanonicalComparison.canonical_material_id)).filter(
+            CanonicalComparison.is_stale.is_(True)
+        ).scalar_subquery()
+    ).one())
+
+
+def _cache_key(bom_id, lines, weights):
+    items = [(line.id, line.material_id, line.quantity, line.price) for line in lines]
+    digest = hashlib.sha1(json.dumps([items, _price_version(), weights], default=str, sort_keys=True).encode()).hexdigest()
+    return f"bom_alternatives:{bom_id}:{digest}"
+
+
+def _canonical_offers(canonical_ids):
+    """Comparison entries per canonical material, from the materialized comparisons."""
+    # Only the comparisons column is read; the other JSON columns are not decoded.
+    query = db.session.query(
+        CanonicalComparison.canonical_material_id, CanonicalComparison.comparisons, CanonicalComparison.is_stale
+    ).filter(CanonicalComparison.canonical_material_id.in_(canonical_ids))
+    records = query.all()
+    outdated = set(canonical_ids) - {r.canonical_material_id for r in records if not r.is_stale}
+    if outdated:
+        refresh_canonical_comparisons(outdated)
+        records = query.all()
+    return {
+        record.canonical_material_id: [
+            {
+                'material_id': c['material_id'],
+                'supplier_id': c['supplier']['id'] if c['supplier'] else None,
+                'supplier_name': c['supplier']['name'] if c['supplier'] else None,
+                'supplier_rating': c['supplier'].get('rating') if c['supplier'] else None,
+                'price': c['price'],
+                'unit': c['unit'],
+                'normalized_unit': c.get('normalized_unit'),
+                'normalized_unit_price': c.get('normalized_unit_price'),
+                'lead_time_days': c['lead_time_days'],
+                'availability': c['availability'],
+                'minimum_order': c['minimum_order']
+            }
+            for c in record.comparisons
+        ]
+        for record in records
+    }
+
+
+def _similar_offers(lines):
+    """Nearest catalog materials for lines without a canonical material; one query loads them all."""
+    if not lines:
+        return {}
+    index = get_similarity_index()
+    matches = {}
+    for line in lines:
+        vector = index.vector(line.material_id)
+        if vector is None:
+            vector = index.query_vector(line.name, line.specifications, line.unit, line.price)
+        matches[line.id] = [material_id for material_id, _ in index.search(
+            *vector, k=SIMILAR_MATERIALS_LIMIT, category=line.category, exclude=line.material_id
+        )]
+
+    wanted = {material_id for ids in matches.values() for material_id in ids}
+    offers = {}
+    if wanted:
+        for row in db.session.query(
+            Material.id, Material.price, Material.unit, Material.lead_time_days, Material.availability,
+            Material.minimum_order, Material.normalized_unit, Material.normalized_unit_price,
+            Material.supplier_id, Supplier.name, Supplier.rating
+        ).join(Supplier, Supplier.id == Material.supplier_id).filter(Material.id.in_(wanted)):
+            offers[row.id] = {
+                'material_id': row.id,
+                'supplier_id': row.supplier_id,
+                'supplier_name': row.name,
+                'supplier_rating': row.rating,
+                'price': row.price,
+                'unit': row.unit,
+                'normalized_unit': row.normalized_unit,
+                'normalized_unit_price': row.normalized_unit_price,
+                'lead_time_days': row.lead_time_days,
+                'availability': row.availability,
+                'minimum_order': row.minimum_order
+            }
+    return {line_id: [offers[m] for m in ids if m in offers] for line_id, ids in matches.items()}
+
+
+def _current_offer(line):
+    return {
+        'material_id': line.material_id,
+        'supplier_id': line.supplier_id,
+        'supplier_name': line.supplier_name,
+        'supplier_rating': line.supplier_rating,
+        'price': line.price,
+        'unit': line.unit,
+        'normalized_unit': line.normalized_unit,
+        'normalized_unit_price': line.normalized_unit_price,
+        'lead_time_days': line.lead_time_days,
+        'availability': line.availability,
+        'minimum_order': line.minimum_order
+    }
+
+
+def gather_line_offers(lines):
+    """
+    Each line's current offer followed by its alternatives, in the line's unit.
+
+    Lines whose material belongs to a canonical material compare against its
+    variants; the rest against their nearest materials in the category, as
+    /materials/<id>/compare does. Offers quoted in another unit are dropped,
+    since their prices are not comparable.
+    """
+    canonical_ids = {line.canonical_material_id for line in lines if line.canonical_material_id}
+    by_canonical = _canonical_offers(canonical_ids) if canonical_ids else {}
+    similar = _similar_offers([line for line in lines if not line.canonical_material_id])
+
+    offers = []
+    for line in lines:
+        if line.canonical_material_id:
+            candidates = by_canonical.get(line.canonical_material_id, [])
+        else:
+            candidates = similar.get(line.id, [])
+        unit = unit_code(line.unit)
+        offers.append([_current_offer(line)] + [
+            c for c in candidates
+            if c['material_id'] != line.material_id and c['price'] is not None and unit_code(c['unit']) == unit
+        ])
+    return offers
+
+
+def _offer_summary(offer, line, baseline, reason=None):
+    summary = {**offer, 'is_current': offer['material_id'] == line.material_id}
+    if offer['price'] is not None and baseline is not None:
+        summary['unit_savings'] = round(baseline - offer['price'], 4)
+        summary['line_savings'] = round((baseline - offer['price']) * line.quantity, 2)
+    if reason is not None:
+        summary['reason'] = reason
+    return summary
+
+
+def get_bom_alternatives(bom):
+    """
+    Cheapest and best-value offer for every BOM line, with potential savings.
+
+    Candidates for all lines are gathered with a handful of set-based
+    queries and scored together: offers are flattened into arrays with one
+    contiguous group per line, scoring.score_offers scores them in one pass
+    with the BOM owner's and project's weights, and per-line winners come
+    from a single lexsort. Savings are measured
+    against each material's current price (the price snapshot when it has
+    none). Results are cached under the BOM's items and the catalog's price
+    version, so any price, catalog or supplier change produces a new key.
+    """
+    lines = load_bom_lines(bom.id)
+    weights = scoring_weights_for(bom.user_id, bom.project_id)
+    cache_key = _cache_key(bom.id, lines, weights)
+    cached = shared_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    offers = gather_line_offers(lines)
+    counts = np.fromiter((len(o) for o in offers), dtype=np.int64, count=len(offers))
+    flat = [offer for line_offers in offers for offer in line_offers]
+    groups = np.repeat(np.arange(len(lines)), counts)
+    starts = np.cumsum(counts) - counts
+    prices = np.fromiter((_as_float(o['price']) for o in flat), dtype=np.float64, count=len(flat))
+    lead_times = np.fromiter((_as_float(o['lead_time_days']) for o in flat), dtype=np.float64, count=len(flat))
+    scores = score_offers(flat, groups=groups, weights=weights)
+
+    result_lines = []
+    totals = {'total_cost': 0.0, 'optimized_total': 0.0, 'potential_savings': 0.0, 'lines_with_savings': 0}
+    if flat:
+        position = np.arange(len(flat))
+        order = np.lexsort((position, -scores, groups))
+        best = order[np.searchsorted(groups[order], np.arange(len(lines)))]
+        sortable_prices = np.where(np.isnan(prices), np.inf, prices)
+        order = np.lexsort((position, sortable_prices, groups))
+        cheapest = order[np.searchsorted(groups[order], np.arange(len(lines)))]
+        min_price = np.fmin.reduceat(prices, starts)
+        min_lead = np.fmin.reduceat(lead_times, starts)
+
+        for i, line in enumerate(lines):
+            baseline = line.price if line.price is not None else line.unit_price_snapshot
+            b, c = flat[best[i]], flat[cheapest[i]]
+
+            reasons = []
+            if b['price'] is not None and b['price'] == min_price[i]:
+                reasons.append('Lowest price')
+            if b['lead_time_days'] is not None and b['lead_time_days'] == min_lead[i]:
+                reasons.append('Fastest delivery')
+            if b['availability'] == 'in_stock':
+                reasons.append('Available now')
+
+            line_total = (baseline or 0) * line.quantity
+            savings = max((baseline - c['price']) * line.quantity, 0.0) if baseline is not None and c['price'] is not None else 0.0
+            totals['total_cost'] += line_total
+            totals['optimized_total'] += line_total - savings
+            totals['potential_savings'] += savings
+            totals['lines_with_savings'] += savings > 0
+
+            result_lines.append({
+                'item_id': line.id,
+                'material_id': line.material_id,
+                'material_name': line.name,
+                'quantity': line.quantity,
+                'unit': line.unit,
+                'unit_price': baseline,
+                'line_total': round(line_total, 2),
+                'alternatives_count': int(counts[i]) - 1,
+                'best_value': {
+                    **_offer_summary(b, line, baseline, ', '.join(reasons) or 'Best overall value'),
+                    'score': round(float(scores[best[i]]), 2)
+                },
+                'cheapest': _offer_summary(c, line, baseline),
+                'potential_savings': round(savings, 2)
+            })
+
+    result = {
+        'bom_id': bom.id,
+        'scoring_weights': weights,
+        'lines': result_lines,
+        **{key: round(value, 2) if isinstance(value, float) else value for key, value in totals.items()}
+    }
+    shared_cache_set(cache_key, result, CACHE_TIMEOUTS['bom_alternatives'])
+    return result
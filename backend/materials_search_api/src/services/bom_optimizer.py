@@ -0,0 +1,287 @@
+import time
+from itertools import combinations
+from math import comb
+import numpy as np
+from src.services.bom_alternatives import load_bom_lines, gather_line_offers
+
+# Exhaustive search over supplier subsets is used while it takes at most this
+# many line x subset evaluations; larger instances use greedy + local search.
+EXACT_MAX_EVALUATIONS = 5_000_000
+# Cost cells gathered per NumPy pass of the exhaustive search.
+EXACT_CHUNK_CELLS = 2_000_000
+LOCAL_SEARCH_MAX_ROUNDS = 200
+LOCAL_SEARCH_STARTS = 8
+LOCAL_SEARCH_TIME_LIMIT = 10.0
+# Cost of leaving a line without a supplier. Large enough that the solver only
+# does it when the constraints leave no choice; real costs are recomputed at the end.
+UNCOVERED_PENALTY = 1e12
+DEFAULT_EXCLUDED_AVAILABILITY = frozenset({'out_of_stock'})
+
+
+def _availability_key(value):
+    return (value or '').strip().lower().replace(' ', '_')
+
+
+def _purchase_quantity(offer, quantity, respect_minimum_order):
+    minimum = offer.get('minimum_order') or 0
+    return max(quantity, minimum) if respect_minimum_order else quantity
+
+
+def _offer_allowed(offer, max_lead_time_days, availability):
+    if offer['price'] is None:
+        return False
+    if max_lead_time_days is not None and (
+        offer['lead_time_days'] is None or offer['lead_time_days'] > max_lead_time_days
+    ):
+        return False
+    key = _availability_key(offer['availability'])
+    if availability is not None:
+        return key in availability
+    return key not in DEFAULT_EXCLUDED_AVAILABILITY
+
+
+def build_cost_matrix(lines, offers, max_lead_time_days=None, availability=None, respect_minimum_order=True):
+    """
+    Lines x suppliers matrix of the cheapest allowed cost, plus the offer behind each cell.
+
+    A line's cost from a supplier is its cheapest allowed offer from that
+    supplier, bought in at least its minimum order quantity. Cells without
+    an allowed offer hold UNCOVERED_PENALTY and offer index -1.
+    """
+    if availability is not None:
+        availability = {_availability_key(a) for a in availability}
+
+    flat, line_index, supplier_keys, costs = [], [], [], []
+    for i, (line, line_offers) in enumerate(zip(lines, offers)):
+        for offer in line_offers:
+            if not _offer_allowed(offer, max_lead_time_days, availability):
+                continue
+            flat.append(offer)
+            line_index.append(i)
+            supplier_keys.append(offer['supplier_id'])
+            costs.append(offer['price'] * _purchase_quantity(offer, line.quantity, respect_minimum_order))
+
+    suppliers = sorted(set(supplier_keys), key=lambda s: (s is None, s or 0))
+    cost = np.full((len(lines), len(suppliers)), UNCOVERED_PENALTY)
+    choice = np.full((len(lines), len(suppliers)), -1, dtype=np.int64)
+    if flat:
+        column_of = {s: j for j, s in enumerate(suppliers)}
+        rows = np.asarray(line_index, dtype=np.int64)
+        columns = np.fromiter((column_of[s] for s in supplier_keys), dtype=np.int64, count=len(flat))
+        costs = np.asarray(costs, dtype=np.float64)
+        # Keep the current material on ties so equal-cost lines do not churn.
+        is_current = np.fromiter(
+            (o['material_id'] == lines[i].material_id for o, i in zip(flat, line_index)), dtype=bool, count=len(flat)
+        )
+        order = np.lexsort((~is_current, costs, columns, rows))
+        cell = rows[order] * len(suppliers) + columns[order]
+        first = order[np.r_[True, cell[1:] != cell[:-1]]]
+        cost[rows[first], columns[first]] = costs[first]
+        choice[rows[first], columns[first]] = first
+    return cost, choice, suppliers, flat
+
+
+def _set_cost(cost, chosen):
+    return cost[:, chosen].min(axis=1).sum()
+
+
+def _solve_exact(cost, max_suppliers):
+    """Cheapest supplier subset of exactly max_suppliers columns (more never costs less)."""
+    best_cost, best_subset = None, None
+    subsets = combinations(range(cost.shape[1]), max_suppliers)
+    chunk_size = max(EXACT_CHUNK_CELLS // (cost.shape[0] * max_suppliers), 1)
+    while True:
+        chunk = np.array([s for _, s in zip(range(chunk_size), subsets)], dtype=np.int64)
+        if not len(chunk):
+            return list(best_subset)
+        totals = cost[:, chunk].min(axis=2).sum(axis=0)
+        k = int(np.argmin(totals))
+        if best_cost is None or totals[k] < best_cost:
+            best_cost, best_subset = totals[k], chunk[k]
+
+
+def _best_two(cost, chosen):
+    sub = cost[:, chosen]
+    if len(chosen) == 1:
+        return sub[:, 0], np.full(len(sub), UNCOVERED_PENALTY), np.zeros(len(sub), dtype=np.int64)
+    top = np.argpartition(sub, 1, axis=1)[:, :2]
+    pair = np.take_along_axis(sub, top, axis=1)
+    swap = pair[:, 0] > pair[:, 1]
+    best_position = np.where(swap, top[:, 1], top[:, 0])
+    return pair.min(axis=1), pair.max(axis=1), best_position
+
+
+def _greedy_drop(cost, max_suppliers):
+    # Start from every supplier and drop the one whose removal costs least.
+    chosen = list(range(cost.shape[1]))
+    while len(chosen) > max_suppliers:
+        best, second, position = _best_two(cost, chosen)
+        increase = np.bincount(position, weights=second - best, minlength=len(chosen))
+        chosen.pop(int(np.argmin(increase)))
+    return chosen
+
+
+def _greedy_add(cost, max_suppliers, first=None):
+    # Start from `first` (or none) and add the supplier that lowers the total most.
+    chosen = [] if first is None else [first]
+    current = np.full(cost.shape[0], UNCOVERED_PENALTY) if first is None else cost[:, first].copy()
+    while len(chosen) < max_suppliers:
+        totals = np.minimum(current[:, None], cost).sum(axis=0)
+        totals[chosen] = np.inf
+        column = int(np.argmin(totals))
+        chosen.append(column)
+        current = np.minimum(current, cost[:, column])
+    return chosen
+
+
+def _improve_by_swaps(cost, chosen, deadline):
+    # Apply the best single swap of a chosen supplier for an unchosen one while it helps.
+    chosen = list(chosen)
+    current = _set_cost(cost, chosen)
+    for _ in range(LOCAL_SEARCH_MAX_ROUNDS):
+        if time.monotonic() > deadline:
+            break
+        outside = np.setdiff1d(np.arange(cost.shape[1]), chosen)
+        if not len(outside):
+            break
+        best, second, position = _best_two(cost, chosen)
+        move = None
+        for k in range(len(chosen)):
+            without = np.where(position == k, second, best)
+            totals = np.minimum(without[:, None], cost[:, outside]).sum(axis=0)
+            j = int(np.argmin(totals))
+            if move is None or totals[j] < move[0]:
+                move = (totals[j], k, int(outside[j]))
+        # Relative tolerance: totals that include uncovered lines are ~1e12 or more.
+        if move[0] >= current - max(abs(current) * 1e-12, 1e-6):
+            break
+        current, k, column = move
+        chosen[k] = column
+    return chosen, current
+
+
+def _solve_local_search(cost, max_suppliers, deadline):
+    """
+    Greedy construction followed by swap-based local search over supplier subsets.
+
+    Starts are built by dropping, from the full supplier set, the supplier
+    whose removal raises the cost least (using each line's best and
+    second-best columns), and by adding the supplier that lowers it most,
+    seeded with each of the LOCAL_SEARCH_STARTS best single suppliers. Each
+    start is improved by best-improvement swaps of one chosen supplier for
+    an unchosen one until none helps or the deadline passes; the cheapest
+    result wins.
+    """
+    seeds = np.argsort(cost.sum(axis=0), kind='stable')[:LOCAL_SEARCH_STARTS]
+    starts = [_greedy_drop(cost, max_suppliers)] + [_greedy_add(cost, max_suppliers, int(seed)) for seed in seeds]
+    best = None
+    for start in starts:
+        if best is not None and time.monotonic() > deadline:
+            break
+        result = _improve_by_swaps(cost, start, deadline)
+        if best is None or result[1] < best[1]:
+            best = result
+    return best[0]
+
+
+def optimize_supplier_assignment(lines, offers, max_lead_time_days=None, max_suppliers=None,
+                                 availability=None, respect_minimum_order=True,
+                                 time_limit=LOCAL_SEARCH_TIME_LIMIT):
+    """
+    Cheapest offer per BOM line under lead-time, availability, minimum-order
+    and supplier-count constraints.
+
+    Per-offer constraints are filters, so without a supplier cap each line
+    simply takes its cheapest allowed offer. With a cap the problem is
+    choosing which suppliers to use: small instances enumerate every subset
+    of max_suppliers suppliers (exact), larger ones use greedy + local search.
+    Returns the index of each line's chosen offer into the allowed offers
+    (-1 when no allowed offer fits), those offers, the method and the number
+    of suppliers considered.
+    """
+    cost, choice, suppliers, flat = build_cost_matrix(
+        lines, offers, max_lead_time_days, availability, respect_minimum_order
+    )
+    n_suppliers = len(suppliers)
+    if not n_suppliers:
+        return [-1] * len(lines), flat, 'exact', 0
+
+    if max_suppliers is None or n_suppliers <= max_suppliers:
+        chosen, method = list(range(n_suppliers)), 'exact'
+    elif comb(n_suppliers, max_suppliers) * len(lines) <= EXACT_MAX_EVALUATIONS:
+        chosen, method = _solve_exact(cost, max_suppliers), 'exact'
+    else:
+        chosen = _solve_local_search(cost, max_suppliers, time.monotonic() + time_limit)
+        method = 'local_search'
+
+    columns = np.asarray(chosen, dtype=np.int64)
+    best = columns[np.argmin(cost[:, columns], axis=1)]
+    picks = choice[np.arange(len(lines)), best]
+    return picks.tolist(), flat, method, n_suppliers
+
+
+def optimize_bom(bom_id, max_lead_time_days=None, max_suppliers=None, availability=None,
+                 respect_minimum_order=True):
+    """Optimized assignment for a BOM with per-line costs and the delta against its current materials."""
+    started = time.monotonic()
+    lines = load_bom_lines(bom_id)
+    offers = gather_line_offers(lines)
+    picks, flat, method, n_suppliers = optimize_supplier_assignment(
+        lines, offers, max_lead_time_days, max_suppliers, availability, respect_minimum_order
+    )
+
+    assignments = []
+    current_total = optimized_total = 0.0
+    unassigned = []
+    suppliers_used = set()
+    for line, line_offers, pick in zip(lines, offers, picks):
+        current = line_offers[0]
+        current_price = current['price'] if current['price'] is not None else line.unit_price_snapshot
+        current_cost = (current_price or 0) * _purchase_quantity(current, line.quantity, respect_minimum_order)
+        current_total += current_cost
+
+        if pick < 0:
+            unassigned.append(line.id)
+            optimized_total += current_cost
+            assignments.append({
+                'item_id': line.id,
+                'material_id': line.material_id,
+                'assigned': False,
+                'current_line_cost': round(current_cost, 2)
+            })
+            continue
+
+        offer = flat[pick]
+        quantity = _purchase_quantity(offer, line.quantity, respect_minimum_order)
+        line_cost = offer['price'] * quantity
+        optimized_total += line_cost
+        suppliers_used.add(offer['supplier_id'])
+        assignments.append({
+            'item_id': line.id,
+            'material_id': offer['material_id'],
+            'supplier_id': offer['supplier_id'],
+            'supplier_name': offer['supplier_name'],
+            'unit_price': offer['price'],
+            'quantity': line.quantity,
+            'purchase_quantity': quantity,
+            'lead_time_days': offer['lead_time_days'],
+            'availability': offer['availability'],
+            'line_cost': round(line_cost, 2),
+            'current_line_cost': round(current_cost, 2),
+            'changed': offer['material_id'] != line.material_id,
+            'assigned': True
+        })
+
+    return {
+        'bom_id': bom_id,
+        'method': method,
+        'suppliers_considered': n_suppliers,
+        'suppliers_used': len(suppliers_used),
+        'current_total': round(current_total, 2),
+        'optimized_total': round(optimized_total, 2),
+        'cost_delta': round(optimized_total - current_total, 2),
+        'lines_changed': sum(1 for a in assignments if a.get('changed')),
+        'unassigned_item_ids': unassigned,
+        'assignments': assignments,
+        'seconds': round(time.monotonic() - started, 3)
+    }
@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import func, delete
+from src.models.user import db
+from src.models.comparison import CanonicalMaterial, MaterialVariant, CanonicalMaterialStats
+
+# Canonical ids per GROUP BY and bulk replace.
+STATS_REFRESH_BATCH_SIZE = 1000
+
+
+def refresh_canonical_stats(canonical_ids):
+    """
+    Recompute the listing statistics of the given canonical materials.
+
+    One GROUP BY over their variants per batch; rows are replaced in bulk,
+    so this is cheap enough to run after every write that touches variants.
+    Returns the number of rows written.
+    """
+    canonical_ids = list(set(canonical_ids))
+    written = 0
+    for start in range(0, len(canonical_ids), STATS_REFRESH_BATCH_SIZE):
+        batch = canonical_ids[start:start + STATS_REFRESH_BATCH_SIZE]
+        aggregates = {
+            row.canonical_material_id: row for row in db.session.query(
+                MaterialVariant.canonical_material_id,
+                func.count(MaterialVariant.id).label('variant_count'),
+                func.min(MaterialVariant.price).label('min_price'),
+                func.max(MaterialVariant.price).label('max_price'),
+                func.avg(MaterialVariant.price).label('avg_price'),
+                func.max(MaterialVariant.last_updated).label('last_updated')
+            ).filter(MaterialVariant.canonical_material_id.in_(batch)).group_by(MaterialVariant.canonical_material_id)
+        }
+        rows = []
+        for canonical_id, created_at in db.session.query(CanonicalMaterial.id, CanonicalMaterial.created_at).filter(
+            CanonicalMaterial.id.in_(batch)
+        ):
+            stats = aggregates.get(canonical_id)
+            min_price = float(stats.min_price or 0) if stats else 0.0
+            max_price = float(stats.max_price or 0) if stats else 0.0
+            rows.append({
+                'canonical_material_id': canonical_id,
+                'variant_count': stats.variant_count if stats else 0,
+                'min_price': min_price,
+                'max_price': max_price,
+                'avg_price': float(stats.avg_price or 0) if stats else 0.0,
+                'price_spread': round(max_price - min_price, 4),
+                'price_spread_percent': round((max_price - min_price) / min_price * 100, 4) if min_price > 0 else 0.0,
+                'last_updated': (stats.last_updated if stats else None) or created_at or datetime.utcnow()
+            })
+        db.session.execute(delete(CanonicalMaterialStats).where(
+            CanonicalMaterialStats.canonical_material_id.in_(batch)
+        ))
+        db.session.bulk_insert_mappings(CanonicalMaterialStats, rows)
+        db.session.commit()
+        written += len(rows)
+    return written
+
+
+def refresh_missing_canonical_stats(batch_size=STATS_REFRESH_BATCH_SIZE):
+    """Create statistics for canonical materials that have none, e.g. rows written before the table existed."""
+    written = 0
+    while True:
+        canonical_ids = [row.id for row in db.session.query(CanonicalMaterial.id).outerjoin(
+            CanonicalMaterialStats, CanonicalMaterialStats.canonical_material_id == CanonicalMaterial.id
+        ).filter(CanonicalMaterialStats.canonical_material_id.is_(None)).order_by(CanonicalMaterial.id).limit(batch_size)]
+        if not canonical_ids:
+            return written
+        written += refresh_canonical_stats(canonical_ids)
@@ -1,48 +1,75 @@
-from sqlalchemy import func
+from datetime import datetime
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import joinedload
 from src.models.user import db
 from src.models.material import Material, Supplier
-from src.models.comparison import CanonicalMaterial, MaterialVariant
+from src.models.comparison import CanonicalMaterial, MaterialVariant, CanonicalComparison
+from src.services.similarity import similar_material_ids
+from src.services.units import apply_normalized_price
+from src.services.scoring import score_offers
+from src.services.canonical_stats import refresh_canonical_stats
 
+SIMILAR_MATERIALS_LIMIT = 10
+COMPARISON_REFRESH_BATCH_SIZE = 500
 
-def get_material_comparison(material_id):
-    material = Material.query.get(material_id)
+
+def get_material_comparison(material_id, weights=None):
+    """Price comparison for a material; `weights` override the best-value scoring defaults."""
+    material = Material.query.options(
+        joinedload(Material.supplier), joinedload(Material.variant)
+    ).filter(Material.id == material_id).first()
     if not material:
         return None
 
     if material.variant:
-        canonical = material.variant.canonical
-        variants = MaterialVariant.query.filter(
-            MaterialVariant.canonical_material_id == canonical.id
-        ).all()
-    else:
-        variants = find_similar_materials(material)
-
-    if not variants:
+        record = get_canonical_comparison(material.variant.canonical_material_id)
         return {
             'material': material.to_dict(),
-            'comparisons': [],
-            'price_range': {'min': material.price, 'max': material.price, 'avg': material.price},
-            'best_value': None
+            'comparisons': record.comparisons,
+            'price_range': record.price_range,
+            # The stored best value uses the default weights.
+            'best_value': determine_best_value(record.comparisons, weights) if weights else record.best_value
         }
 
-    comparisons = []
-    prices = []
-
-    for variant in variants:
-        if variant.price is not None:
-            prices.append(variant.price)
-        comparisons.append({
-            'supplier': variant.supplier.to_dict() if variant.supplier else None,
-            'price': variant.price,
-            'unit': variant.unit,
-            'lead_time_days': variant.lead_time_days,
-            'availability': variant.availability,
-            'minimum_order': variant.minimum_order,
-            'material_id': variant.material_id,
-            'last_updated': variant.last_updated.isoformat() if variant.last_updated else None
-        })
-
-    comparisons.sort(key=lambda x: x['price'] if x['price'] is not None else float('inf'))
+    variants = find_similar_materials(material)
+    return {'material': material.to_dict(), **summarize_variants(variants, weights)}
+
+
+def _comparison_entry(variant):
+    return {
+        'supplier': variant.supplier.to_dict() if variant.supplier else None,
+        'price': variant.price,
+        'unit': variant.unit,
+        'normalized_unit': variant.normalized_unit,
+        'normalized_unit_price': variant.normalized_unit_price,
+        'lead_time_days': variant.lead_time_days,
+        'availability': variant.availability,
+        'minimum_order': variant.minimum_order,
+        'material_id': variant.material_id,
+        'last_updated': variant.last_updated.isoformat() if variant.last_updated else None
+    }
+
+
+def _price_sort_key(price):
+    return price if price is not None else float('inf')
+
+
+def summarize_variants(variants, weights=None):
+    """
+    Comparisons sorted by price, their price range and the best value.
+
+    When every offer converts to the same comparable unit they are ordered by
+    normalized unit price, so a 4x8 sheet and a 4x12 sheet rank by price per SF.
+    """
+    comparisons = [_comparison_entry(variant) for variant in variants]
+    price_key = 'price'
+    if len({c['normalized_unit'] for c in comparisons}) == 1 and all(
+        c['normalized_unit_price'] is not None for c in comparisons
+    ):
+        price_key = 'normalized_unit_price'
+    comparisons.sort(key=lambda x: _price_sort_key(x[price_key]))
+    prices = [c['price'] for c in comparisons if c['price'] is not None]
 
     if prices:
         price_range = {
@@ -53,30 +80,140 @@ def get_material_comparison(material_id):
     else:
         price_range = {'min': None, 'max': None, 'avg': None}
 
-    best_value = determine_best_value(comparisons)
-
     return {
-        'material': material.to_dict(),
         'comparisons': comparisons,
         'price_range': price_range,
-        'best_value': best_value
+        'best_value': determine_best_value(comparisons, weights)
     }
 
 
-def find_similar_materials(material):
-    similar = Material.query.filter(
-        Material.category == material.category,
-        Material.id != material.id
-    ).all()
+def _build_comparison(canonical, variants, now):
+    variants = sorted(variants, key=lambda v: (_price_sort_key(v.price), v.id))
+    summary = summarize_variants(variants)
+    prices = [v.price for v in variants if v.price is not None]
+    return {
+        'canonical_material_id': canonical.id,
+        'canonical': canonical.to_dict(variant_count=len(variants)),
+        'variants': [v.to_dict() for v in variants],
+        'comparisons': summary['comparisons'],
+        'price_range': summary['price_range'],
+        'price_statistics': {
+            'min_price': float(min(prices)) if prices else 0,
+            'max_price': float(max(prices)) if prices else 0,
+            'avg_price': float(sum(prices) / len(prices)) if prices else 0,
+            'variant_count': len(variants)
+        },
+        'best_value': summary['best_value'],
+        'is_stale': False,
+        'refreshed_at': now
+    }
+
+
+def refresh_canonical_comparisons(canonical_ids):
+    """
+    Rebuild the materialized comparisons of the given canonical materials.
+
+    Variants and their suppliers are loaded in one query for the whole
+    batch, and existing rows are updated in place. Returns the number of
+    rows written.
+    """
+    canonical_ids = list(set(canonical_ids))
+    if not canonical_ids:
+        return 0
+
+    canonicals = CanonicalMaterial.query.filter(CanonicalMaterial.id.in_(canonical_ids)).all()
+    variants_by_canonical = {}
+    for variant in MaterialVariant.query.options(joinedload(MaterialVariant.supplier)).filter(
+        MaterialVariant.canonical_material_id.in_(canonical_ids)
+    ):
+        variants_by_canonical.setdefault(variant.canonical_material_id, []).append(variant)
+
+    existing = {
+        row.canonical_material_id: row
+        for row in CanonicalComparison.query.filter(CanonicalComparison.canonical_material_id.in_(canonical_ids))
+    }
+    now = datetime.utcnow()
+    for canonical in canonicals:
+        values = _build_comparison(canonical, variants_by_canonical.get(canonical.id, []), now)
+        row = existing.get(canonical.id)
+        if row is None:
+            db.session.add(CanonicalComparison(**values))
+        else:
+            for key, value in values.items():
+                setattr(row, key, value)
+    db.session.commit()
+    refresh_canonical_stats(canonical_ids)
+    return len(canonicals)
+
+
+def refresh_stale_comparisons(batch_size=COMPARISON_REFRESH_BATCH_SIZE):
+    """Rebuild every stale comparison and create missing ones, a batch at a time."""
+    refreshed = 0
+    while True:
+        canonical_ids = [row.id for row in db.session.query(CanonicalMaterial.id).outerjoin(
+            CanonicalComparison, CanonicalComparison.canonical_material_id == CanonicalMaterial.id
+        ).filter(or_(
+            CanonicalComparison.canonical_material_id.is_(None),
+            CanonicalComparison.is_stale == True
+        )).order_by(CanonicalMaterial.id).limit(batch_size)]
+        if not canonical_ids:
+            return refreshed
+        refreshed += refresh_canonical_comparisons(canonical_ids)
+
+
+def mark_comparisons_stale(canonical_ids=None, supplier_id=None, material_ids=None):
+    """
+    Flag comparisons for a rebuild: by canonical id, every one listing a
+    supplier's variants, or every one listing variants of the given materials.
+    """
+    query = CanonicalComparison.query
+    if supplier_id is not None:
+        query = query.filter(CanonicalComparison.canonical_material_id.in_(
+            db.session.query(MaterialVariant.canonical_material_id).filter(MaterialVariant.supplier_id == supplier_id)
+        ))
+    elif material_ids is not None:
+        query = query.filter(CanonicalComparison.canonical_material_id.in_(
+            db.session.query(MaterialVariant.canonical_material_id).filter(
+                MaterialVariant.material_id.in_(list(material_ids))
+            )
+        ))
+    elif canonical_ids is not None:
+        query = query.filter(CanonicalComparison.canonical_material_id.in_(list(canonical_ids)))
+    return query.update({CanonicalComparison.is_stale: True}, synchronize_session=False)
+
+
+def get_canonical_comparison(canonical_id):
+    """The materialized comparison, rebuilt first if missing or stale; None for an unknown id."""
+    record = CanonicalComparison.query.get(canonical_id)
+    if record is None or record.is_stale:
+        if not refresh_canonical_comparisons([canonical_id]):
+            return None
+        record = CanonicalComparison.query.get(canonical_id)
+    return record
+
+
+def find_similar_materials(material, limit=SIMILAR_MATERIALS_LIMIT):
+    """The `limit` nearest materials in the category by the similarity index, plus the material itself."""
+    matches = similar_material_ids(material, k=limit)
+    by_id = {
+        m.id: m for m in Material.query.options(joinedload(Material.supplier)).filter(
+            Material.id.in_([material_id for material_id, _ in matches])
+        )
+    }
 
     variants = []
-    for m in similar:
+    for material_id, _ in matches:
+        m = by_id.get(material_id)
+        if m is None:
+            continue
         variants.append(MaterialVariant(
             supplier_id=m.supplier_id,
             supplier=m.supplier,
             material_id=m.id,
             price=m.price,
             unit=m.unit,
+            normalized_unit=m.normalized_unit,
+            normalized_unit_price=m.normalized_unit_price,
             lead_time_days=m.lead_time_days,
             availability=m.availability,
             minimum_order=m.minimum_order
@@ -88,6 +225,8 @@ def find_similar_materials(material):
         material_id=material.id,
         price=material.price,
         unit=material.unit,
+        normalized_unit=material.normalized_unit,
+        normalized_unit_price=material.normalized_unit_price,
         lead_time_days=material.lead_time_days,
         availability=material.availability,
         minimum_order=material.minimum_order
@@ -96,36 +235,13 @@ def find_similar_materials(material):
     return variants
 
 
-def determine_best_value(comparisons):
+def determine_best_value(comparisons, weights=None):
     if not comparisons:
         return None
 
-    scored = []
-    for c in comparisons:
-        score = 0
-        price = c.get('price') or 0
-        lead_time = c.get('lead_time_days') or 999
-        availability = c.get('availability') or ''
-
-        if price and price > 0:
-            score += 50 * (1 / price)
-
-        if lead_time and lead_time < 7:
-            score += 30
-        elif lead_time and lead_time < 14:
-            score += 20
-        elif lead_time and lead_time < 30:
-            score += 10
-
-        if availability == 'in_stock':
-            score += 20
-        elif availability == 'limited_stock':
-            score += 10
-
-        scored.append((score, c))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    best = scored[0][1]
+    scores = score_offers(comparisons, weights=weights)
+    best_index = int(np.argmax(scores))
+    best = comparisons[best_index]
 
     reasons = []
     valid_prices = [c.get('price') for c in comparisons if c.get('price') is not None]
@@ -137,10 +253,14 @@ def determine_best_value(comparisons):
         reasons.append('Fastest delivery')
     if best.get('availability') == 'in_stock':
         reasons.append('Available now')
+    ratings = [c['supplier'].get('rating') for c in comparisons if c.get('supplier') and c['supplier'].get('rating')]
+    if ratings and best.get('supplier') and best['supplier'].get('rating') == max(ratings):
+        reasons.append('Top-rated supplier')
 
     return {
         'supplier_id': best.get('supplier', {}).get('id') if best.get('supplier') else None,
         'material_id': best.get('material_id'),
+        'score': round(float(scores[best_index]), 2),
         'reason': ', '.join(reasons) if reasons else 'Best overall value'
     }
 
@@ -155,6 +275,7 @@ def create_canonical_material(name, category, subcategory=None, specifications=N
     )
     db.session.add(canonical)
     db.session.commit()
+    refresh_canonical_stats([canonical.id])
     return canonical
 
 
@@ -170,8 +291,15 @@ def add_variant_to_canonical(canonical_id, supplier_id, price, unit, material_id
         availability=availability,
         minimum_order=minimum_order
     )
+    # Package sizes come from the listed material's specs, else the canonical's.
+    owner = Material if material_id else CanonicalMaterial
+    specifications = db.session.query(owner.specifications).filter(
+        owner.id == (material_id or canonical_id)
+    ).scalar()
+    apply_normalized_price(variant, specifications)
     db.session.add(variant)
     db.session.commit()
+    refresh_canonical_comparisons([canonical_id])
     return variant
 
 
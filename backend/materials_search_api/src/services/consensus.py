@@ -0,0 +1,235 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select, func, delete
+from src.models.user import db
+from src.models.material import Material, PriceHistory, PriceSource, MaterialPriceConsensus
+from src.services.units import normalized_price_fields, unit_conversion
+from src.services.comparison import mark_comparisons_stale
+from src.services.entity_resolution import refresh_resolver_variants
+
+# Sources further than this many robust standard deviations (1.4826 * MAD)
+# from the median are dropped before averaging.
+OUTLIER_THRESHOLD = 3.0
+# When most sources agree exactly (MAD == 0), anything more than this fraction
+# away from the median counts as an outlier.
+OUTLIER_MIN_RELATIVE_DEVIATION = 0.10
+PRICE_CHANGE_EPSILON = 0.005
+
+
+def _load_sources(material_ids=None, provider_id=None):
+    # Only the newest valid row per offer counts; older rows of an offer that
+    # changed price are still valid until they expire.
+    latest = select(func.max(PriceSource.id)).where(PriceSource.is_valid == True)
+    if material_ids is not None:
+        latest = latest.where(PriceSource.material_id.in_(material_ids))
+    if provider_id is not None:
+        touched = select(PriceSource.material_id).where(
+            PriceSource.provider_id == provider_id,
+            PriceSource.is_valid == True
+        ).distinct()
+        latest = latest.where(PriceSource.material_id.in_(touched))
+    latest = latest.group_by(PriceSource.material_id, PriceSource.provider_id, PriceSource.external_id)
+
+    rows = db.session.execute(
+        select(
+            PriceSource.material_id, PriceSource.price, PriceSource.confidence_score,
+            PriceSource.unit, Material.unit, Material.specifications
+        )
+        .join(Material, Material.id == PriceSource.material_id)
+        .where(PriceSource.id.in_(latest), PriceSource.price > 0)
+    ).all()
+
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    factors = {}
+
+    def factor(row):
+        key = (row[0], row[3])
+        if key not in factors:
+            factors[key] = _unit_factor(row[3], row[4], row[5])
+        return factors[key]
+
+    material = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    price = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    weight = np.fromiter((r[2] if r[2] is not None else 1.0 for r in rows), dtype=np.float64, count=len(rows))
+    price *= np.fromiter((factor(r) for r in rows), dtype=np.float64, count=len(rows))
+    # Sources quoted in a unit that cannot be converted to the material's are dropped.
+    convertible = ~np.isnan(price)
+    return material[convertible], price[convertible], weight[convertible]
+
+
+def _unit_factor(source_unit, material_unit, specifications):
+    """
+    Multiplier taking a source's price per `source_unit` to a price per the
+    material's unit; NaN when the two units do not measure the same thing.
+    A source or material without a unit is taken to quote the same unit.
+    """
+    if not source_unit or not material_unit:
+        return 1.0
+    source_base, source_factor = unit_conversion(source_unit, specifications)
+    material_base, material_factor = unit_conversion(material_unit, specifications)
+    if source_base != material_base:
+        return np.nan
+    return material_factor / source_factor
+
+
+def _group_median(values, group, starts, counts):
+    """Median of `values` within each group; rows must be grouped contiguously."""
+    order = np.lexsort((values, group))
+    ordered = values[order]
+    lower = ordered[starts + (counts - 1) // 2]
+    upper = ordered[starts + counts // 2]
+    return (lower + upper) / 2
+
+
+def compute_consensus(material, price, weight):
+    """
+    Confidence-weighted, outlier-robust consensus for every material at once.
+
+    Arrays hold one row per price source. Rows are grouped by material with a
+    single sort; the median and MAD per group come from index arithmetic on
+    the sorted arrays, and weighted sums use np.bincount, so there is no
+    Python loop over materials.
+    """
+    order = np.argsort(material, kind='stable')
+    material, price, weight = material[order], price[order], weight[order]
+
+    material_ids, starts, counts = np.unique(material, return_index=True, return_counts=True)
+    group = np.repeat(np.arange(len(material_ids)), counts)
+
+    median = _group_median(price, group, starts, counts)
+    deviation = np.abs(price - median[group])
+    mad = _group_median(deviation, group, starts, counts)
+
+    tolerance = np.maximum(OUTLIER_THRESHOLD * 1.4826 * mad, OUTLIER_MIN_RELATIVE_DEVIATION * median)
+    inlier = deviation <= tolerance[group]
+    n_groups = len(material_ids)
+
+    inlier_weight = np.where(inlier, weight, 0.0)
+    weight_sum = np.bincount(group, weights=inlier_weight, minlength=n_groups)
+    weighted_sum = np.bincount(group, weights=inlier_weight * price, minlength=n_groups)
+    consensus = np.divide(weighted_sum, weight_sum, out=median.copy(), where=weight_sum > 0)
+
+    inlier_count = np.bincount(group, weights=inlier, minlength=n_groups)
+    mean_confidence = np.divide(weight_sum, inlier_count, out=np.zeros(n_groups), where=inlier_count > 0)
+    spread = np.sqrt(np.divide(
+        np.bincount(group, weights=inlier_weight * (price - consensus[group]) ** 2, minlength=n_groups),
+        weight_sum, out=np.zeros(n_groups), where=weight_sum > 0
+    ))
+    cv = np.divide(spread, consensus, out=np.zeros(n_groups), where=consensus > 0)
+    # Trust grows with the number of agreeing sources and shrinks with their dispersion.
+    confidence = np.clip(mean_confidence, 0, 1) * (1 - 0.5 ** inlier_count) / (1 + cv)
+
+    return {
+        'material_id': material_ids,
+        'consensus_price': consensus,
+        'median_price': median,
+        'mean_price': np.bincount(group, weights=price, minlength=n_groups) / counts,
+        'min_price': np.minimum.reduceat(price, starts),
+        'max_price': np.maximum.reduceat(price, starts),
+        'mad': mad,
+        'source_count': counts,
+        'outlier_count': counts - inlier_count.astype(np.int64),
+        'confidence': confidence
+    }
+
+
+def refresh_price_consensus(material_ids=None, provider_id=None, source='consensus'):
+    """
+    Recompute consensus rows, update Material.price and append price history.
+
+    Scope is every material with valid price sources, or only `material_ids`,
+    or only materials priced by `provider_id`. Everything is written with bulk
+    statements in one transaction.
+    """
+    material, price, weight = _load_sources(material_ids, provider_id)
+    now = datetime.utcnow()
+
+    if material_ids is None and provider_id is None:
+        # A full refresh also drops consensus for materials left without sources.
+        db.session.execute(delete(MaterialPriceConsensus).where(
+            MaterialPriceConsensus.material_id.notin_(np.unique(material).tolist())
+        ))
+
+    if not len(material):
+        db.session.commit()
+        return {'materials': 0, 'prices_updated': 0}
+
+    stats = compute_consensus(material, price, weight)
+    ids = stats['material_id'].tolist()
+
+    rows = []
+    for i, material_id in enumerate(ids):
+        rows.append({
+            'material_id': material_id,
+            'consensus_price': round(float(stats['consensus_price'][i]), 4),
+            'median_price': round(float(stats['median_price'][i]), 4),
+            'mean_price': round(float(stats['mean_price'][i]), 4),
+            'min_price': float(stats['min_price'][i]),
+            'max_price': float(stats['max_price'][i]),
+            'mad': round(float(stats['mad'][i]), 4),
+            'source_count': int(stats['source_count'][i]),
+            'outlier_count': int(stats['outlier_count'][i]),
+            'confidence': round(float(stats['confidence'][i]), 4),
+            'computed_at': now
+        })
+
+    db.session.execute(delete(MaterialPriceConsensus).where(MaterialPriceConsensus.material_id.in_(ids)))
+    db.session.bulk_insert_mappings(MaterialPriceConsensus, rows)
+
+    current = {
+        row.id: row for row in db.session.query(
+            Material.id, Material.price, Material.unit, Material.specifications
+        ).filter(Material.id.in_(ids))
+    }
+    price_updates = []
+    history = []
+    for row in rows:
+        new_price = round(row['consensus_price'], 2)
+        material = current.get(row['material_id'])
+        if material is None:
+            continue
+        if material.price is not None and abs(material.price - new_price) < PRICE_CHANGE_EPSILON:
+            continue
+        price_updates.append({
+            'id': row['material_id'],
+            'price': new_price,
+            **normalized_price_fields(new_price, material.unit, material.specifications)
+        })
+        history.append({'material_id': row['material_id'], 'price': new_price, 'recorded_at': now, 'source': source})
+
+    if price_updates:
+        db.session.bulk_update_mappings(Material, price_updates)
+        db.session.bulk_insert_mappings(PriceHistory, history)
+        updated_ids = [update['id'] for update in price_updates]
+        refresh_resolver_variants(updated_ids)
+        mark_comparisons_stale(material_ids=updated_ids)
+
+    db.session.commit()
+    return {'materials': len(rows), 'prices_updated': len(price_updates)}
+
+
+def summarize_sources(material, sources):
+    """
+    compute_consensus over an explicit list of PriceSource rows, such as a
+    filtered listing, in the material's unit; None when none of them count.
+    """
+    rows = [
+        (source.price * _unit_factor(source.unit, material.unit, material.specifications),
+         source.confidence_score if source.confidence_score is not None else 1.0)
+        for source in sources if source.price and source.price > 0
+    ]
+    rows = [(price, weight) for price, weight in rows if not np.isnan(price)]
+    if not rows:
+        return None
+    stats = compute_consensus(
+        np.full(len(rows), material.id, dtype=np.int64),
+        np.array([price for price, _ in rows]),
+        np.array([weight for _, weight in rows])
+    )
+    return {key: values[0].item() for key, values in stats.items()}
+
+
+def get_price_consensus(material_id):
+    return db.session.get(MaterialPriceConsensus, material_id)
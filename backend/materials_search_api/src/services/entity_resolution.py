@@ -0,0 +1,309 @@
+import re
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from src.models.user import db
+from src.models.material import Material
+from src.models.comparison import CanonicalMaterial, MaterialVariant, CanonicalComparison
+from src.services.units import normalized_price_fields, unit_code
+from src.services.canonical_stats import refresh_canonical_stats
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 4
+# Estimated Jaccard similarity two materials need to be grouped; LSH with
+# 16 bands of 4 rows surfaces pairs from about 0.5 up, verification cuts here.
+SIMILARITY_THRESHOLD = 0.7
+# Shingles hashed per NumPy pass; bounds memory at NUM_PERM * 8 bytes each.
+MINHASH_CHUNK_SHINGLES = 100_000
+MIN_CLUSTER_SIZE = 2
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_BAND_MIX = (_rng.randint(1, 1 << 31, size=LSH_ROWS).astype(np.uint64) << np.uint64(32)) | np.uint64(1)
+
+_TOKEN_RE = re.compile(r'[a-z]+|[0-9]+(?:\.[0-9]+)?')
+_TOKEN_SYNONYMS = {
+    'inch': 'in', 'inches': 'in', 'feet': 'ft', 'foot': 'ft',
+    'pounds': 'lb', 'pound': 'lb', 'lbs': 'lb', 'gallon': 'gal', 'gallons': 'gal',
+    'millimeter': 'mm', 'millimeters': 'mm', 'meter': 'm', 'meters': 'm',
+    'galv': 'galvanized', 'ss': 'stainless', 'pc': 'ea', 'pcs': 'ea', 'each': 'ea',
+}
+
+
+def normalize_text(text):
+    tokens = _TOKEN_RE.findall((text or '').lower().replace('"', ' in ').replace("'", ' ft '))
+    return ' '.join(_TOKEN_SYNONYMS.get(token, token) for token in tokens)
+
+
+def numeric_key(name):
+    """The numbers in a name, in order: sizes and gauges that must agree exactly."""
+    return ' '.join(format(float(token), 'g') for token in _TOKEN_RE.findall((name or '').lower()) if token[0].isdigit())
+
+
+def material_signature_text(name, specifications):
+    """Normalized name plus sorted key=value spec tokens, the text that gets shingled."""
+    specs = ' '.join(
+        f"{normalize_text(str(key))} {normalize_text(str(value))}"
+        for key, value in sorted((specifications or {}).items())
+        if isinstance(value, (str, int, float))
+    )
+    return f"{normalize_text(name)} {specs}".strip()
+
+
+def _shingles(texts, size=SHINGLE_SIZE):
+    """
+    Byte 4-gram shingles of every text, packed into integers, plus the start
+    offset of each text's shingles; the texts are processed as one buffer.
+    """
+    encoded = [f" {text} ".ljust(size).encode() for text in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    counts = lengths - size + 1
+    # Positions of shingles that start and end inside the same text.
+    starts = np.repeat(np.cumsum(lengths) - lengths, counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    shingles = np.zeros(len(starts), dtype=np.uint64)
+    for k in range(size):
+        shingles = (shingles << np.uint64(8)) | buffer[starts + k]
+    return shingles, np.cumsum(counts) - counts
+
+
+def minhash_signatures(texts):
+    """
+    MinHash signatures (len(texts) x NUM_PERM) over character 4-gram shingles.
+
+    Shingles of a whole chunk of texts are permuted with one broadcast and
+    per-text minima come from np.minimum.reduceat over the text offsets, so
+    there is no Python loop per shingle or per permutation.
+    """
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    chunk_size = max(MINHASH_CHUNK_SHINGLES // 64, 1)
+    for start in range(0, len(texts), chunk_size):
+        shingles, offsets = _shingles(texts[start:start + chunk_size])
+        permuted = (_PERM_A[:, None] * (shingles[None, :] % _MERSENNE_PRIME) + _PERM_B[:, None]) % _MERSENNE_PRIME
+        signatures[start:start + len(offsets)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def _connected_components(n, left, right):
+    # Min-label propagation with pointer jumping; a handful of vectorised rounds.
+    labels = np.arange(n)
+    while True:
+        previous = labels
+        lowest = np.minimum(labels[left], labels[right])
+        labels = labels.copy()
+        np.minimum.at(labels, left, lowest)
+        np.minimum.at(labels, right, lowest)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_block(signatures, threshold=SIMILARITY_THRESHOLD):
+    """
+    Group near-duplicate rows of one block with LSH banding.
+
+    Rows sharing a band bucket are candidates; each is checked against the
+    bucket's first member and its predecessor (so work stays linear in bucket
+    size) by the share of agreeing MinHash values, and accepted pairs are
+    joined into connected components. Returns a cluster label per row.
+    """
+    n = len(signatures)
+    pairs = []
+    for band in range(LSH_BANDS):
+        rows = signatures[:, band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        # One 64-bit key per band; a rare collision only adds a candidate
+        # that verification then rejects.
+        keys = np.bitwise_xor.reduce(rows * _BAND_MIX, axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]) + 1
+        if not len(same):
+            continue
+        bucket_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        first = order[bucket_start[np.searchsorted(bucket_start, same, side='right') - 1]]
+        for left, right in ((first, order[same]), (order[same - 1], order[same])):
+            accepted = (signatures[left] == signatures[right]).mean(axis=1) >= threshold
+            pairs.append((left[accepted], right[accepted]))
+
+    if not pairs:
+        return np.arange(n)
+    return _connected_components(n, np.concatenate([p[0] for p in pairs]), np.concatenate([p[1] for p in pairs]))
+
+
+def _load_materials():
+    variant_of = dict(db.session.query(MaterialVariant.material_id, MaterialVariant.canonical_material_id).filter(
+        MaterialVariant.material_id.isnot(None)
+    ).all())
+    blocks = {}
+    for row in db.session.query(
+        Material.id, Material.name, Material.category, Material.subcategory, Material.unit,
+        Material.specifications, Material.supplier_id, Material.price, Material.lead_time_days,
+        Material.availability, Material.minimum_order
+    ).yield_per(5000):
+        key = ((row.category or '').strip().lower(), unit_code(row.unit), numeric_key(row.name))
+        blocks.setdefault(key, []).append((row, variant_of.get(row.id)))
+    return blocks
+
+
+def _common_specifications(rows):
+    specs = [row.specifications or {} for row in rows]
+    common = dict(specs[0])
+    for spec in specs[1:]:
+        common = {key: value for key, value in common.items() if spec.get(key) == value}
+    return common or None
+
+
+# Variant fields the resolver copies from the variant's material.
+_RESOLVER_VARIANT_FIELDS = (
+    'price', 'unit', 'normalized_unit', 'normalized_unit_price', 'lead_time_days', 'availability', 'minimum_order'
+)
+
+
+def refresh_resolver_variants(material_ids=None, now=None):
+    """
+    Bring the resolver's variants in line with their materials.
+
+    Covers every resolver variant, or those of `material_ids`. Only variants
+    whose copied fields changed are rewritten, in one bulk update; returns
+    the canonical ids of the variants that changed. The caller commits.
+    """
+    now = now or datetime.utcnow()
+    query = db.session.query(
+        MaterialVariant.id, MaterialVariant.canonical_material_id, MaterialVariant.price,
+        MaterialVariant.unit, MaterialVariant.normalized_unit, MaterialVariant.normalized_unit_price,
+        MaterialVariant.lead_time_days, MaterialVariant.availability, MaterialVariant.minimum_order,
+        Material.price.label('material_price'), Material.unit.label('material_unit'),
+        Material.specifications, Material.lead_time_days.label('material_lead_time_days'),
+        Material.availability.label('material_availability'),
+        Material.minimum_order.label('material_minimum_order')
+    ).join(Material, Material.id == MaterialVariant.material_id).filter(
+        MaterialVariant.source == 'resolver'
+    )
+    if material_ids is not None:
+        query = query.filter(MaterialVariant.material_id.in_(list(material_ids)))
+
+    updates = []
+    changed = set()
+    for row in query.yield_per(5000):
+        fields = {
+            'price': row.material_price or 0.0,
+            'unit': row.material_unit,
+            **normalized_price_fields(row.material_price or 0.0, row.material_unit, row.specifications),
+            'lead_time_days': row.material_lead_time_days,
+            'availability': row.material_availability,
+            'minimum_order': row.material_minimum_order
+        }
+        if all(getattr(row, field) == fields[field] for field in _RESOLVER_VARIANT_FIELDS):
+            continue
+        updates.append({'id': row.id, **fields, 'last_updated': now})
+        changed.add(row.canonical_material_id)
+    if updates:
+        db.session.bulk_update_mappings(MaterialVariant, updates)
+    return changed
+
+
+def resolve_canonical_materials(threshold=SIMILARITY_THRESHOLD):
+    """
+    Batch entity resolution over the whole catalog.
+
+    Materials are blocked by (category, normalized unit, numbers in the name),
+    so only plausible duplicates are ever compared and a 2 in pipe never
+    groups with a 3 in one however similar the rest of the name is. Within a
+    block, names and specs are normalized, shingled into character 4-grams
+    and MinHashed; LSH banding proposes candidate pairs and their signature
+    agreement decides. Each cluster of MIN_CLUSTER_SIZE or more joins the
+    canonical material most of its existing variants already belong to, or a
+    new one. Existing variants (including hand-made ones) are never moved;
+    only materials without a variant are added, but variants the resolver
+    made earlier are refreshed from their materials' current price,
+    availability, lead time and minimum order. Rows are written in bulk per
+    run, the materialized comparisons of canonicals that grew or whose
+    variants changed are flagged stale and the listing statistics of every
+    canonical touched are recomputed.
+    """
+    started = datetime.utcnow()
+    refreshed = refresh_resolver_variants(now=started)
+    blocks = _load_materials()
+    new_canonicals = []
+    pending_variants = []
+    totals = {'materials': 0, 'blocks': len(blocks), 'clusters': 0, 'canonicals_created': 0, 'variants_created': 0}
+
+    for members in blocks.values():
+        totals['materials'] += len(members)
+        if len(members) < MIN_CLUSTER_SIZE:
+            continue
+
+        signatures = minhash_signatures([material_signature_text(row.name, row.specifications) for row, _ in members])
+        labels = cluster_block(signatures, threshold)
+
+        clusters = {}
+        for index, label in enumerate(labels):
+            clusters.setdefault(label, []).append(members[index])
+
+        for cluster in clusters.values():
+            if len(cluster) < MIN_CLUSTER_SIZE:
+                continue
+            unassigned = [row for row, canonical_id in cluster if canonical_id is None]
+            if not unassigned:
+                continue
+            totals['clusters'] += 1
+
+            existing = Counter(canonical_id for _, canonical_id in cluster if canonical_id is not None)
+            if existing:
+                canonical = existing.most_common(1)[0][0]
+            else:
+                rows = [row for row, _ in cluster]
+                names = Counter(row.name for row in rows)
+                canonical = CanonicalMaterial(
+                    name=min(names, key=lambda name: (-names[name], len(name), name)),
+                    category=rows[0].category,
+                    subcategory=Counter(row.subcategory for row in rows).most_common(1)[0][0],
+                    specifications=_common_specifications(rows),
+                    description=f'Grouped from {len(rows)} matching materials'
+                )
+                new_canonicals.append(canonical)
+            pending_variants.extend((canonical, row) for row in unassigned)
+
+    db.session.add_all(new_canonicals)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    variant_rows = [
+        {
+            'canonical_material_id': canonical if isinstance(canonical, int) else canonical.id,
+            'supplier_id': row.supplier_id,
+            'material_id': row.id,
+            'price': row.price or 0.0,
+            'unit': row.unit,
+            **normalized_price_fields(row.price or 0.0, row.unit, row.specifications),
+            'lead_time_days': row.lead_time_days,
+            'availability': row.availability,
+            'minimum_order': row.minimum_order,
+            'source': 'resolver',
+            'last_updated': now
+        }
+        for canonical, row in pending_variants
+    ]
+    if variant_rows:
+        db.session.bulk_insert_mappings(MaterialVariant, variant_rows)
+    # Existing canonicals that gained or refreshed variants; new ones have no comparison yet.
+    grown = {canonical for canonical, _ in pending_variants if isinstance(canonical, int)} | refreshed
+    if grown:
+        CanonicalComparison.query.filter(CanonicalComparison.canonical_material_id.in_(grown)).update(
+            {CanonicalComparison.is_stale: True}, synchronize_session=False
+        )
+    db.session.commit()
+    # Listing statistics are cheap to recompute, so they are current as soon as the run ends.
+    refresh_canonical_stats(grown | {canonical.id for canonical in new_canonicals})
+
+    totals['canonicals_created'] = len(new_canonicals)
+    totals['variants_created'] = len(variant_rows)
+    totals['canonicals_refreshed'] = len(refreshed)
+    totals['seconds'] = round((datetime.utcnow() - started).total_seconds(), 3)
+    return totals
@@ -0,0 +1,321 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from flask import current_app
+from typing import List, Dict, Any, Optional
+from src.models.user import db
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.material import PriceSource, SyncJob, ProviderMaterialMap
+from src.integrations.base import DataProviderAdapter, MaterialPrice, SyncCheckpoint
+from src.services.sync_lock import check_lease
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_QUEUE_SIZE = 2000
+PRICE_TTL_HOURS = 24
+
+_END_OF_STREAM = object()
+
+# Raw fields that describe the offer itself; anything else in raw_data (ranks,
+# timestamps, tracking ids) changes between fetches without the price moving.
+HASHED_RAW_FIELDS = ('price', 'unit', 'sku', 'availability', 'in_stock', 'stock', 'extracted_price')
+
+
+def chunk_key(chunk: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(chunk or {}, sort_keys=True)
+
+
+def get_checkpoint(sync_job_id: int, key: str) -> Optional[Dict[str, Any]]:
+    sync_job = SyncJob.query.get(sync_job_id)
+    return (sync_job.checkpoint or {}).get(key)
+
+
+def save_checkpoint(sync_job_id: int, key: str, checkpoint: Optional[Dict[str, Any]]):
+    # Chunks of one job update the same JSON column, so serialise on the row.
+    sync_job = SyncJob.query.filter_by(id=sync_job_id).with_for_update().one()
+    checkpoints = dict(sync_job.checkpoint or {})
+    if checkpoint is None:
+        checkpoints.pop(key, None)
+    else:
+        checkpoints[key] = checkpoint
+    sync_job.checkpoint = checkpoints
+    db.session.commit()
+
+
+def price_content_hash(price_data: MaterialPrice) -> str:
+    raw = price_data.raw_data or {}
+    content = {
+        'name': price_data.name,
+        'price': round(price_data.price, 4),
+        'unit': price_data.unit,
+        'currency': price_data.currency,
+        'source_url': price_data.source_url,
+        'raw': {field: raw[field] for field in HASHED_RAW_FIELDS if field in raw}
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _insert_ignoring_duplicates(model, rows):
+    # Concurrent chunks can meet the same new item; the first insert wins.
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    db.session.execute(insert(model).on_conflict_do_nothing(), rows)
+
+
+def queue_unmatched_items(provider_id: int, items: List[MaterialPrice], known: Dict[str, int], now: datetime):
+    """
+    Park items without a catalog match in provider_material_map for the matcher.
+
+    New items get a 'pending' row; items already waiting just get their latest
+    offer and last_seen_at refreshed, so a match writes the newest price.
+    """
+    new_rows = []
+    updates = []
+    for price_data in items:
+        payload = asdict(price_data)
+        if price_data.external_id in known:
+            updates.append({
+                'id': known[price_data.external_id],
+                'pending_price': payload,
+                'last_seen_at': now
+            })
+        else:
+            new_rows.append({
+                'provider_id': provider_id,
+                'external_id': price_data.external_id,
+                'status': 'pending',
+                'provider_name': price_data.name,
+                'category': price_data.category,
+                'pending_price': payload,
+                'match_attempts': 0,
+                'last_seen_at': now,
+                'created_at': now
+            })
+
+    if new_rows:
+        _insert_ignoring_duplicates(ProviderMaterialMap, new_rows)
+    if updates:
+        db.session.bulk_update_mappings(ProviderMaterialMap, updates)
+
+
+def write_price_batch(provider_id: int, batch: List[MaterialPrice]) -> Dict[str, int]:
+    """
+    Write one batch of provider prices.
+
+    Items resolve to materials through provider_material_map, one indexed
+    lookup per batch; items with no mapping yet are queued there for the
+    batch matcher instead of being dropped.
+
+    Repeated external_ids within the batch count once, as received, and
+    the extra copies as duplicates, so received = written + unchanged +
+    unmatched.
+
+    Each item's content hash is compared with the newest valid row stored for
+    its (provider_id, external_id). Items whose hash and material are unchanged
+    only get their expires_at pushed out, in a single UPDATE per batch; only
+    new or changed items are inserted.
+    """
+    # Later duplicates of an external_id within the batch win.
+    batch_items = {price.external_id: price for price in batch}
+    external_ids = list(batch_items)
+
+    material_ids = {}
+    waiting = {}
+    for row in db.session.query(
+        ProviderMaterialMap.id, ProviderMaterialMap.external_id, ProviderMaterialMap.material_id
+    ).filter(
+        ProviderMaterialMap.provider_id == provider_id,
+        ProviderMaterialMap.external_id.in_(external_ids)
+    ):
+        if row.material_id is None:
+            waiting[row.external_id] = row.id
+        else:
+            material_ids[row.external_id] = row.material_id
+
+    current = {}
+    for row in db.session.query(
+        PriceSource.id, PriceSource.external_id, PriceSource.material_id, PriceSource.content_hash
+    ).filter(
+        PriceSource.provider_id == provider_id,
+        PriceSource.external_id.in_(external_ids),
+        PriceSource.is_valid == True
+    ).order_by(PriceSource.id):
+        current[row.external_id] = row
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=PRICE_TTL_HOURS)
+    rows = []
+    unchanged_ids = []
+    unmatched = []
+    for price_data in batch_items.values():
+        material_id = material_ids.get(price_data.external_id)
+        if material_id is None:
+            unmatched.append(price_data)
+            continue
+
+        content_hash = price_content_hash(price_data)
+        existing = current.get(price_data.external_id)
+        if existing and existing.content_hash == content_hash and existing.material_id == material_id:
+            unchanged_ids.append(existing.id)
+            continue
+
+        rows.append({
+            'material_id': material_id,
+            'provider_id': provider_id,
+            'external_id': price_data.external_id,
+            'price': price_data.price,
+            'unit': price_data.unit,
+            'currency': price_data.currency,
+            'confidence_score': price_data.confidence_score,
+            'source_url': price_data.source_url,
+            'raw_data': price_data.raw_data,
+            'content_hash': content_hash,
+            'fetched_at': now,
+            'expires_at': expires_at,
+            'is_valid': True
+        })
+
+    if rows:
+        db.session.bulk_insert_mappings(PriceSource, rows)
+
+    if unchanged_ids:
+        PriceSource.query.filter(PriceSource.id.in_(unchanged_ids)).update(
+            {PriceSource.expires_at: expires_at},
+            synchronize_session=False
+        )
+
+    if unmatched:
+        queue_unmatched_items(provider_id, unmatched, waiting, now)
+
+    return {
+        'received': len(batch_items),
+        'duplicates': len(batch) - len(batch_items),
+        'written': len(rows),
+        'unchanged': len(unchanged_ids),
+        'unmatched': len(unmatched)
+    }
+
+
+def _write_batch_in_context(app, provider_id: int, sync_job_id: Optional[int], batch: List[MaterialPrice]):
+    # Runs on an executor thread, so it gets its own app context and session.
+    with app.app_context():
+        counts = write_price_batch(provider_id, batch)
+        if sync_job_id is not None:
+            SyncJob.query.filter_by(id=sync_job_id).update(
+                {SyncJob.items_processed: SyncJob.items_processed + counts['received']},
+                synchronize_session=False
+            )
+        db.session.commit()
+        return counts
+
+
+async def write_price_batch_async(
+    provider_id: int,
+    batch: List[MaterialPrice],
+    sync_job_id: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    write_price_batch and commit, off the event loop.
+
+    The write runs on the loop's default executor in its own session, so the
+    adapter keeps fetching while the database works; `sync_job_id`, when
+    given, gets its items_processed bumped in the same transaction.
+    """
+    app = current_app._get_current_object()
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _write_batch_in_context, app, provider_id, sync_job_id, batch
+    )
+
+
+async def stream_prices_to_db(
+    adapter: DataProviderAdapter,
+    provider_id: int,
+    sync_job_id: int,
+    chunk: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    lease_state: Optional[Dict[str, bool]] = None
+) -> Dict[str, Any]:
+    """
+    Run the fetch -> write pipeline for one provider.
+
+    The adapter's iter_prices feeds a bounded queue and the writer drains it in
+    fixed-size batches, committing after each one. Batches are written on an
+    executor thread (write_price_batch_async), so fetching continues while a
+    batch is written. When the writer falls behind, the full queue blocks the
+    producer, so memory stays proportional to queue_size + batch_size no
+    matter how large the catalog is.
+
+    Progress is added to SyncJob.items_processed with an atomic increment, so
+    several chunks of the same job can stream concurrently.
+
+    When the adapter yields a SyncCheckpoint the pending batch is flushed and
+    the checkpoint is stored on the job under this chunk's key. A retry, or a
+    later job that inherited the checkpoint, resumes from it; the key is
+    removed once the chunk finishes.
+
+    `lease_state` is the state from the job's lease_heartbeat; when it reports
+    the lease lost, LeaseLost is raised before the next batch or checkpoint is
+    written, so a job that was superseded stops writing.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    key = chunk_key(chunk)
+    resume_from = get_checkpoint(sync_job_id, key)
+    totals = {'received': 0, 'duplicates': 0, 'written': 0, 'unchanged': 0, 'unmatched': 0, 'batches': 0}
+    written_before = (resume_from or {}).get('items_written', 0)
+    has_checkpoint = resume_from is not None
+
+    async def produce():
+        try:
+            async for price in adapter.iter_prices(limit=limit, checkpoint=resume_from, **(chunk or {})):
+                await queue.put(price)
+        except Exception:
+            await queue.put(_END_OF_STREAM)
+            raise
+        await queue.put(_END_OF_STREAM)
+
+    async def flush(batch):
+        if not batch:
+            return
+        check_lease(lease_state)
+        counts = await write_price_batch_async(provider_id, batch, sync_job_id)
+        for field in ('received', 'duplicates', 'written', 'unchanged', 'unmatched'):
+            totals[field] += counts[field]
+        totals['batches'] += 1
+
+    producer = asyncio.create_task(produce())
+    batch: List[MaterialPrice] = []
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, SyncCheckpoint):
+                await flush(batch)
+                batch = []
+                check_lease(lease_state)
+                save_checkpoint(sync_job_id, key, {
+                    **asdict(item),
+                    'items_written': written_before + totals['written']
+                })
+                has_checkpoint = True
+                continue
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+
+        await flush(batch)
+
+        await producer
+        if has_checkpoint:
+            save_checkpoint(sync_job_id, key, None)
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+    totals['failed'] = adapter.items_failed
+    totals['resumed'] = resume_from is not None
+    return totals
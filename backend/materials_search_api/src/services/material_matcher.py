@@ -0,0 +1,190 @@
+import re
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func
+from src.models.user import db
+from src.models.material import Material, PriceSource, ProviderMaterialMap
+from src.integrations.base import MaterialPrice
+from src.services.ingestion import write_price_batch
+
+# Minimum token Jaccard similarity for a fuzzy name match.
+MATCH_THRESHOLD = 0.75
+MATCH_BATCH_SIZE = 1000
+# Candidates scored exactly per item, taken from the token-overlap counts.
+MAX_CANDIDATES = 50
+# Tokens on more than this share of the catalog are skipped when gathering
+# candidates (they still count towards the similarity score).
+COMMON_TOKEN_SHARE = 0.2
+
+_TOKEN_RE = re.compile(r'[a-z]+|[0-9]+(?:\.[0-9]+)?')
+_STOPWORDS = frozenset({'a', 'an', 'and', 'for', 'in', 'of', 'the', 'with', 'x'})
+
+
+def name_tokens(name):
+    return frozenset(_TOKEN_RE.findall((name or '').lower())) - _STOPWORDS
+
+
+def normalize_name(name):
+    return ' '.join(_TOKEN_RE.findall((name or '').lower()))
+
+
+class CatalogIndex:
+    """
+    In-memory name index over the material catalog, built once per matcher run.
+
+    Exact matches go through a dict of normalized names; fuzzy matches gather
+    candidates from an inverted token index and score them by token Jaccard
+    similarity, preferring materials in the item's category.
+    """
+
+    def __init__(self, materials):
+        self.by_name = {}
+        self.tokens = {}
+        self.category = {}
+        self.postings = {}
+        for material_id, name, category in materials:
+            self.by_name.setdefault(normalize_name(name), material_id)
+            tokens = name_tokens(name)
+            self.tokens[material_id] = tokens
+            self.category[material_id] = (category or '').lower()
+            for token in tokens:
+                self.postings.setdefault(token, []).append(material_id)
+        self.common_limit = max(int(len(self.tokens) * COMMON_TOKEN_SHARE), 1)
+
+    @classmethod
+    def load(cls):
+        return cls(db.session.query(Material.id, Material.name, Material.category).all())
+
+    def match(self, name, category=None):
+        """Return (material_id, method, score) or None."""
+        material_id = self.by_name.get(normalize_name(name))
+        if material_id is not None:
+            return material_id, 'name', 1.0
+
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        selective = [t for t in tokens if len(self.postings.get(t, ())) <= self.common_limit]
+        overlap = Counter()
+        for token in selective or tokens:
+            overlap.update(self.postings.get(token, ()))
+
+        category = (category or '').lower()
+        best = None
+        for candidate, _ in overlap.most_common(MAX_CANDIDATES):
+            candidate_tokens = self.tokens[candidate]
+            shared = len(tokens & candidate_tokens)
+            score = shared / (len(tokens) + len(candidate_tokens) - shared)
+            rank = (score, bool(category) and self.category[candidate] == category, -candidate)
+            if best is None or rank > best[0]:
+                best = (rank, candidate, score)
+
+        if best and best[2] >= MATCH_THRESHOLD:
+            return best[1], 'tokens', round(best[2], 4)
+        return None
+
+
+def _previous_matches(provider_id, external_ids):
+    # Items priced before the map existed keep the material they were stored under.
+    latest = db.session.query(func.max(PriceSource.id)).filter(
+        PriceSource.provider_id == provider_id,
+        PriceSource.external_id.in_(external_ids)
+    ).group_by(PriceSource.external_id)
+    return dict(
+        db.session.query(PriceSource.external_id, PriceSource.material_id)
+        .filter(PriceSource.id.in_(latest)).all()
+    )
+
+
+def match_pending_items(provider_id=None, rematch=False, batch_size=MATCH_BATCH_SIZE, index=None):
+    """
+    Resolve queued provider items to catalog materials in batches.
+
+    Works through 'pending' map rows (and 'unmatched' ones when `rematch`,
+    e.g. after a catalog import). Matched rows get their material, and the
+    offer parked on them is written as a price source; rows without a match
+    become 'unmatched'. Returns counts and the ids of materials that gained
+    prices, for a consensus refresh.
+    """
+    index = index or CatalogIndex.load()
+    statuses = ['pending', 'unmatched'] if rematch else ['pending']
+    totals = {'matched': 0, 'unmatched': 0, 'prices_written': 0}
+    material_ids = set()
+    last_id = 0
+
+    while True:
+        query = ProviderMaterialMap.query.filter(
+            ProviderMaterialMap.status.in_(statuses),
+            ProviderMaterialMap.id > last_id
+        )
+        if provider_id is not None:
+            query = query.filter(ProviderMaterialMap.provider_id == provider_id)
+        rows = query.order_by(ProviderMaterialMap.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        now = datetime.utcnow()
+
+        previous = {}
+        for pid in {row.provider_id for row in rows}:
+            ids = [row.external_id for row in rows if row.provider_id == pid]
+            previous.update({(pid, eid): mid for eid, mid in _previous_matches(pid, ids).items()})
+
+        updates = []
+        offers = {}
+        for row in rows:
+            material_id = previous.get((row.provider_id, row.external_id))
+            match = (material_id, 'history', 1.0) if material_id else index.match(row.provider_name, row.category)
+            attempts = (row.match_attempts or 0) + 1
+            if match is None:
+                updates.append({'id': row.id, 'status': 'unmatched', 'match_attempts': attempts})
+                totals['unmatched'] += 1
+                continue
+
+            material_id, method, score = match
+            updates.append({
+                'id': row.id,
+                'material_id': material_id,
+                'status': 'matched',
+                'match_method': method,
+                'match_score': score,
+                'match_attempts': attempts,
+                'matched_at': now,
+                'pending_price': None
+            })
+            totals['matched'] += 1
+            material_ids.add(material_id)
+            if row.pending_price:
+                offers.setdefault(row.provider_id, []).append(MaterialPrice(**row.pending_price))
+
+        db.session.bulk_update_mappings(ProviderMaterialMap, updates)
+        for pid, prices in offers.items():
+            totals['prices_written'] += write_price_batch(pid, prices)['written']
+        db.session.commit()
+
+    totals['material_ids'] = sorted(material_ids)
+    return totals
+
+
+def assign_material(entry, material_id):
+    """Manually map an item; its parked offer is written and prices stored under another material are retired."""
+    PriceSource.query.filter(
+        PriceSource.provider_id == entry.provider_id,
+        PriceSource.external_id == entry.external_id,
+        PriceSource.material_id != material_id,
+        PriceSource.is_valid == True
+    ).update({PriceSource.is_valid: False}, synchronize_session=False)
+
+    offer = entry.pending_price
+    entry.material_id = material_id
+    entry.status = 'matched'
+    entry.match_method = 'manual'
+    entry.match_score = 1.0
+    entry.matched_at = datetime.utcnow()
+    entry.pending_price = None
+    db.session.flush()
+
+    if offer:
+        write_price_batch(entry.provider_id, [MaterialPrice(**offer)])
+    db.session.commit()
+    return entry
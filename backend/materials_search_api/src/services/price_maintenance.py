@@ -0,0 +1,132 @@
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete
+from src.models.user import db
+from src.models.material import Material, PriceSource, PriceSourceArchive
+from src.services.units import normalized_price_fields
+
+DEFAULT_CLEANUP_BATCH_SIZE = 5000
+ARCHIVED_COLUMNS = (
+    'id', 'material_id', 'provider_id', 'external_id', 'price', 'unit', 'currency',
+    'confidence_score', 'source_url', 'raw_data', 'content_hash', 'fetched_at', 'expires_at'
+)
+
+
+def _metrics(rows, batches, started):
+    seconds = time.monotonic() - started
+    return {
+        'rows': rows,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None
+    }
+
+
+def expire_prices(batch_size=DEFAULT_CLEANUP_BATCH_SIZE, now=None):
+    """
+    Mark expired price sources invalid with UPDATE ... WHERE id IN (SELECT ... LIMIT n),
+    committing after each batch so no single transaction holds long row locks.
+    """
+    now = now or datetime.utcnow()
+    started = time.monotonic()
+    rows = batches = 0
+
+    while True:
+        ids = select(PriceSource.id).where(
+            PriceSource.expires_at < now,
+            PriceSource.is_valid == True
+        ).limit(batch_size).scalar_subquery()
+
+        result = db.session.execute(
+            update(PriceSource)
+            .where(PriceSource.id.in_(ids))
+            .values(is_valid=False)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        rows += result.rowcount
+        batches += 1
+        if result.rowcount < batch_size:
+            break
+
+    return _metrics(rows, batches, started)
+
+
+def archive_invalid_prices(older_than_days, batch_size=DEFAULT_CLEANUP_BATCH_SIZE, now=None):
+    """
+    Move invalid price sources that expired more than `older_than_days` ago into
+    price_source_archives, one compressed archive row per batch, and delete them.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    started = time.monotonic()
+    rows = batches = 0
+    columns = [getattr(PriceSource, name) for name in ARCHIVED_COLUMNS]
+
+    while True:
+        batch = db.session.execute(
+            select(*columns).where(
+                PriceSource.is_valid == False,
+                PriceSource.expires_at < cutoff
+            ).order_by(PriceSource.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+
+        records = [dict(zip(ARCHIVED_COLUMNS, row)) for row in batch]
+        fetched = [r['fetched_at'] for r in records if r['fetched_at']]
+        payload = '\n'.join(json.dumps(r, default=str) for r in records)
+
+        db.session.add(PriceSourceArchive(
+            first_price_source_id=records[0]['id'],
+            last_price_source_id=records[-1]['id'],
+            row_count=len(records),
+            oldest_fetched_at=min(fetched) if fetched else None,
+            newest_fetched_at=max(fetched) if fetched else None,
+            payload=zlib.compress(payload.encode(), 6)
+        ))
+        db.session.execute(
+            delete(PriceSource)
+            .where(PriceSource.id.in_([r['id'] for r in records]))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        rows += len(records)
+        batches += 1
+        if len(records) < batch_size:
+            break
+
+    return _metrics(rows, batches, started)
+
+
+def read_archive(archive):
+    return [json.loads(line) for line in zlib.decompress(archive.payload).decode().splitlines()]
+
+
+def backfill_normalized_prices(full: bool = False, batch_size: int = 1000) -> int:
+    """
+    Store normalized prices for materials that lack them, or for all when `full`.
+
+    Covers rows written by paths that bypass the models (imports, seed data)
+    and a recompute after the registry changes. Returns rows updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        query = db.session.query(Material.id, Material.price, Material.unit, Material.specifications).filter(
+            Material.id > last_id
+        )
+        if not full:
+            query = query.filter(Material.price.isnot(None), Material.normalized_unit_price.is_(None))
+        rows = query.order_by(Material.id).limit(batch_size).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+        db.session.bulk_update_mappings(Material, [
+            {'id': row.id, **normalized_price_fields(row.price, row.unit, row.specifications)} for row in rows
+        ])
+        db.session.commit()
+        updated += len(rows)
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.material import DataProvider
+
+OUTCOME_WINDOW = 20
+MIN_OUTCOMES = 4
+FAILURE_RATE_THRESHOLD = 0.5
+DEFAULT_COOLDOWN_SECONDS = 300
+MAX_COOLDOWN_SECONDS = 6 * 3600
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _latency_bucket(latency_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return f'le_{bound}'
+    return 'gt_30000'
+
+
+def cooldown_seconds(provider):
+    # Each consecutive re-open doubles the wait before the next probe.
+    base = (provider.config or {}).get('circuit_cooldown_seconds', DEFAULT_COOLDOWN_SECONDS)
+    reopen_count = (provider.health or {}).get('reopen_count', 0)
+    return min(base * 2 ** reopen_count, MAX_COOLDOWN_SECONDS)
+
+
+def is_provider_available(provider):
+    """Whether regular syncs may run: closed circuits and the half-open trial."""
+    return (provider.circuit_state or 'closed') != 'open'
+
+
+def available_providers(providers):
+    return [provider for provider in providers if is_provider_available(provider)]
+
+
+def due_for_probe(provider, now=None):
+    if provider.circuit_state != 'open' or not provider.circuit_opened_at:
+        return False
+    now = now or datetime.utcnow()
+    return now - provider.circuit_opened_at >= timedelta(seconds=cooldown_seconds(provider))
+
+
+def _set_state(provider, health, state, now):
+    if state == 'open':
+        if provider.circuit_state in ('open', 'half_open'):
+            health['reopen_count'] = health.get('reopen_count', 0) + 1
+        provider.circuit_opened_at = now
+    elif state == 'closed':
+        health['reopen_count'] = 0
+        health['outcomes'] = []
+        provider.circuit_opened_at = None
+    if provider.circuit_state != state:
+        health['last_transition'] = {'from': provider.circuit_state or 'closed', 'to': state, 'at': now.isoformat()}
+    provider.circuit_state = state
+
+
+def record_provider_outcome(provider_id, success, latencies_ms=(), errors=None, error=None):
+    """
+    Fold one task's result into the provider's health and circuit state.
+
+    The last OUTCOME_WINDOW task outcomes form the failure-rate window; once
+    it holds MIN_OUTCOMES and at least FAILURE_RATE_THRESHOLD of them failed,
+    the circuit opens. In half-open state a single outcome decides: success
+    closes the circuit, failure re-opens it with a longer cooldown. Request
+    latencies and error counts are accumulated into cumulative histograms.
+    """
+    now = datetime.utcnow()
+    # Chunks of one sync report concurrently, so serialise on the provider row.
+    provider = DataProvider.query.filter_by(id=provider_id).with_for_update().one()
+    health = dict(provider.health or {})
+
+    outcomes = (health.get('outcomes') or []) + [1 if success else 0]
+    health['outcomes'] = outcomes[-OUTCOME_WINDOW:]
+
+    latency_histogram = dict(health.get('latency_ms') or {})
+    for latency in latencies_ms:
+        bucket = _latency_bucket(latency)
+        latency_histogram[bucket] = latency_histogram.get(bucket, 0) + 1
+    health['latency_ms'] = latency_histogram
+
+    error_histogram = dict(health.get('errors') or {})
+    for key, count in (errors or {}).items():
+        error_histogram[key] = error_histogram.get(key, 0) + count
+    if error is not None:
+        key = type(error).__name__
+        error_histogram[key] = error_histogram.get(key, 0) + 1
+        health['last_error'] = {'type': key, 'message': str(error)[:500], 'at': now.isoformat()}
+    health['errors'] = error_histogram
+
+    window = health['outcomes']
+    failure_rate = 1 - sum(window) / len(window)
+    health['failure_rate'] = round(failure_rate, 3)
+    health['requests'] = health.get('requests', 0) + len(latencies_ms)
+
+    state = provider.circuit_state or 'closed'
+    if state == 'half_open':
+        _set_state(provider, health, 'closed' if success else 'open', now)
+    elif state == 'closed' and len(window) >= MIN_OUTCOMES and failure_rate >= FAILURE_RATE_THRESHOLD:
+        _set_state(provider, health, 'open', now)
+
+    provider.health = health
+    db.session.commit()
+    return provider.circuit_state
+
+
+def record_probe_result(provider_id, healthy, error=None):
+    """A passing probe lets one trial sync through (half-open); a failing one keeps the circuit open."""
+    now = datetime.utcnow()
+    provider = DataProvider.query.filter_by(id=provider_id).with_for_update().one()
+    health = dict(provider.health or {})
+    health['last_probe'] = {'healthy': healthy, 'at': now.isoformat()}
+    if error is not None:
+        health['last_error'] = {'type': type(error).__name__, 'message': str(error)[:500], 'at': now.isoformat()}
+
+    if healthy:
+        _set_state(provider, health, 'half_open', now)
+    else:
+        _set_state(provider, health, 'open', now)
+
+    provider.health = health
+    db.session.commit()
+    return provider.circuit_state
@@ -0,0 +1,216 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select, func, delete
+from src.models.user import db
+from src.models.material import Material, PriceHistory, PriceSource, MaterialRefreshSchedule
+
+VOLATILITY_WINDOW_DAYS = 30
+MIN_RETURNS = 3
+DEFAULT_VOLATILITY = 0.01
+# (minimum daily volatility, refresh interval in hours), checked top-down.
+VOLATILITY_TIERS = (
+    (0.05, 1),
+    (0.02, 6),
+    (0.005, 24),
+    (0.0, 168),
+)
+# Share of each provider's rate limit the scheduler may spend per run; the
+# rest is left for full catalog syncs and interactive lookups.
+SCHEDULER_BUDGET_SHARE = 0.5
+SCHEDULER_PERIOD_SECONDS = 3600
+CATEGORY_SYNC_MIN_ITEMS = 25
+
+
+def compute_volatility(window_days=VOLATILITY_WINDOW_DAYS, now=None):
+    """
+    Daily volatility per material from price_history.
+
+    Volatility is the root mean square of log price changes, each scaled to a
+    one-day horizon by sqrt(elapsed days), computed for every material in one
+    sorted NumPy pass. Returns {material_id: (volatility, number of changes)}.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=window_days)
+    rows = db.session.execute(
+        select(PriceHistory.material_id, PriceHistory.price, PriceHistory.recorded_at)
+        .where(PriceHistory.recorded_at >= cutoff, PriceHistory.price > 0)
+        .order_by(PriceHistory.material_id, PriceHistory.recorded_at)
+    ).all()
+    if len(rows) < 2:
+        return {}
+
+    material = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    price = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+    seconds = np.fromiter((r[2].timestamp() for r in rows), dtype=np.float64, count=len(rows))
+
+    same = material[1:] == material[:-1]
+    elapsed_days = np.maximum((seconds[1:] - seconds[:-1]) / 86400, 1 / 24)
+    returns = np.log(price[1:] / price[:-1]) / np.sqrt(elapsed_days)
+    group = material[1:][same]
+    returns = returns[same]
+    if not len(group):
+        return {}
+
+    material_ids, inverse, counts = np.unique(group, return_inverse=True, return_counts=True)
+    volatility = np.sqrt(np.bincount(inverse, weights=returns ** 2) / counts)
+    return {int(m): (float(v), int(n)) for m, v, n in zip(material_ids, volatility, counts)}
+
+
+def refresh_interval_hours(volatility):
+    for threshold, hours in VOLATILITY_TIERS:
+        if volatility >= threshold:
+            return hours
+    return VOLATILITY_TIERS[-1][1]
+
+
+def rebuild_refresh_schedule(now=None):
+    """
+    Recompute volatility and refresh interval for every material.
+
+    Materials with fewer than MIN_RETURNS price changes inherit the median
+    volatility of their category, or DEFAULT_VOLATILITY. next_refresh_at is
+    the last refresh (or last provider fetch) plus the new interval.
+    """
+    now = now or datetime.utcnow()
+    measured = compute_volatility(now=now)
+
+    materials = db.session.query(Material.id, Material.category).all()
+    last_fetched = dict(
+        db.session.query(PriceSource.material_id, func.max(PriceSource.fetched_at))
+        .group_by(PriceSource.material_id).all()
+    )
+    last_refreshed = dict(
+        db.session.query(MaterialRefreshSchedule.material_id, MaterialRefreshSchedule.last_refreshed_at).all()
+    )
+
+    by_category = {}
+    for material_id, category in materials:
+        vol, n = measured.get(material_id, (None, 0))
+        if n >= MIN_RETURNS:
+            by_category.setdefault(category, []).append(vol)
+    category_volatility = {c: float(np.median(v)) for c, v in by_category.items()}
+
+    rows = []
+    for material_id, category in materials:
+        vol, n = measured.get(material_id, (None, 0))
+        if n >= MIN_RETURNS:
+            source = 'material'
+        elif category in category_volatility:
+            vol, source = category_volatility[category], 'category'
+        else:
+            vol, source = DEFAULT_VOLATILITY, 'default'
+
+        interval = refresh_interval_hours(vol)
+        refreshed_at = last_refreshed.get(material_id) or last_fetched.get(material_id)
+        rows.append({
+            'material_id': material_id,
+            'volatility': round(vol, 6),
+            'volatility_source': source,
+            'refresh_interval_hours': interval,
+            'last_refreshed_at': refreshed_at,
+            'next_refresh_at': (refreshed_at + timedelta(hours=interval)) if refreshed_at else now,
+            'updated_at': now
+        })
+
+    db.session.execute(delete(MaterialRefreshSchedule))
+    db.session.bulk_insert_mappings(MaterialRefreshSchedule, rows)
+    db.session.commit()
+    return {'materials': len(rows), 'measured': sum(1 for r in rows if r['volatility_source'] == 'material')}
+
+
+def provider_request_budget(provider):
+    period = provider.rate_limit_period or 3600
+    requests = provider.rate_limit_requests or 0
+    return int(requests * min(SCHEDULER_PERIOD_SECONDS / period, 1.0) * SCHEDULER_BUDGET_SHARE)
+
+
+def plan_refreshes(providers, now=None):
+    """
+    Pick the due materials each provider should refresh this run.
+
+    Due materials are ranked by staleness (time since last refresh divided by
+    their interval), so fast movers that are overdue come first. Each provider
+    spends at most its request budget: one request per targeted
+    fetch_single_price, or `category_sync_cost` requests for a category sync
+    when at least `category_sync_min_items` of its due items share a category.
+    Returns {provider_id: {'external_ids': [...], 'categories': [...], 'material_ids': [...]}}.
+    """
+    now = now or datetime.utcnow()
+    due = db.session.query(
+        MaterialRefreshSchedule.material_id,
+        MaterialRefreshSchedule.refresh_interval_hours,
+        MaterialRefreshSchedule.last_refreshed_at,
+        Material.category
+    ).join(Material, Material.id == MaterialRefreshSchedule.material_id).filter(
+        MaterialRefreshSchedule.next_refresh_at <= now
+    ).all()
+    if not due:
+        return {}
+
+    def staleness(row):
+        if row.last_refreshed_at is None:
+            return float('inf')
+        return (now - row.last_refreshed_at).total_seconds() / 3600 / row.refresh_interval_hours
+
+    due = sorted(due, key=staleness, reverse=True)
+    due_ids = [row.material_id for row in due]
+    provider_ids = [provider.id for provider in providers]
+
+    offers = {}
+    for provider_id, material_id, external_id in db.session.query(
+        PriceSource.provider_id, PriceSource.material_id, PriceSource.external_id
+    ).filter(
+        PriceSource.material_id.in_(due_ids),
+        PriceSource.provider_id.in_(provider_ids),
+        PriceSource.external_id.isnot(None)
+    ).distinct():
+        offers.setdefault(provider_id, {}).setdefault(material_id, external_id)
+
+    plans = {}
+    for provider in providers:
+        provider_offers = offers.get(provider.id)
+        if not provider_offers:
+            continue
+
+        budget = provider_request_budget(provider)
+        min_items = provider.config.get('category_sync_min_items', CATEGORY_SYNC_MIN_ITEMS)
+        category_cost = provider.config.get('category_sync_cost', provider.config.get('max_pages', 5))
+
+        ranked = [row for row in due if row.material_id in provider_offers]
+        category_counts = {}
+        for row in ranked:
+            category_counts[row.category] = category_counts.get(row.category, 0) + 1
+
+        plan = {'external_ids': [], 'categories': [], 'material_ids': []}
+        for row in ranked:
+            if budget <= 0:
+                break
+            if row.category in plan['categories']:
+                plan['material_ids'].append(row.material_id)
+                continue
+            count = category_counts[row.category]
+            if count >= min_items and count > category_cost and budget >= category_cost:
+                plan['categories'].append(row.category)
+                budget -= category_cost
+            else:
+                plan['external_ids'].append(provider_offers[row.material_id])
+                budget -= 1
+            plan['material_ids'].append(row.material_id)
+
+        if plan['material_ids']:
+            plans[provider.id] = plan
+
+    return plans
+
+
+def mark_refreshed(material_ids, now=None):
+    now = now or datetime.utcnow()
+    schedules = MaterialRefreshSchedule.query.filter(MaterialRefreshSchedule.material_id.in_(material_ids)).all()
+    db.session.bulk_update_mappings(MaterialRefreshSchedule, [
+        {
+            'material_id': schedule.material_id,
+            'last_refreshed_at': now,
+            'next_refresh_at': now + timedelta(hours=schedule.refresh_interval_hours)
+        }
+        for schedule in schedules
+    ])
+    db.session.commit()
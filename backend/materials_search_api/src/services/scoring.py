@@ -0,0 +1,150 @@
+import numpy as np
+from src.models.user import db, User
+from src.models.material import Project
+
+# Relative importance of each component; scores are scaled to 0-100 whatever
+# the weights add up to. Users and projects override any subset of them.
+DEFAULT_WEIGHTS = {
+    'price': 35.0,
+    'unit_price': 15.0,
+    'lead_time': 25.0,
+    'availability': 15.0,
+    'rating': 10.0,
+}
+# (deliveries faster than this many days, lead-time component), fastest first.
+LEAD_TIME_BUCKETS = ((7, 1.0), (14, 2 / 3), (30, 1 / 3))
+AVAILABILITY_POINTS = {'in_stock': 1.0, 'limited_stock': 0.5}
+MAX_SUPPLIER_RATING = 5.0
+
+
+def resolve_weights(*overrides):
+    """DEFAULT_WEIGHTS with each override applied in turn; None values and unknown keys are ignored."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for override in overrides:
+        for key, value in (override or {}).items():
+            if key in weights and value is not None:
+                weights[key] = float(value)
+    if sum(weights.values()) <= 0:
+        return dict(DEFAULT_WEIGHTS)
+    return weights
+
+
+def scoring_weights_for(user_id=None, project_id=None):
+    """
+    Weights for a request: defaults, then the user's, then the project's.
+
+    A project only applies when it belongs to `user_id`; without a user the
+    project is ignored, so anonymous callers cannot read other users' weights.
+    """
+    if not user_id:
+        return resolve_weights()
+    user_weights = db.session.query(User.scoring_weights).filter(User.id == user_id).scalar()
+    project_weights = None
+    if project_id:
+        project_weights = db.session.query(Project.scoring_weights).filter(
+            Project.id == project_id, Project.user_id == user_id
+        ).scalar()
+    return resolve_weights(user_weights, project_weights)
+
+
+def _floats(values, n):
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=n)
+
+
+def _codes(values, n):
+    """Integer code per value and the distinct values; the per-row work is one C-level dict lookup."""
+    values = list(values)
+    distinct = list(set(values))
+    lookup = {value: i for i, value in enumerate(distinct)}
+    return np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=n), distinct
+
+
+def _ratio_to_best(values, keys):
+    """best / value within each key, where lower is better; missing or non-positive values get 0."""
+    valid = values > 0
+    if not valid.any():
+        return np.zeros(len(values))
+    _, inverse = np.unique(keys, return_inverse=True)
+    best = np.full(inverse.max() + 1, np.inf)
+    np.minimum.at(best, inverse[valid], values[valid])
+    return np.where(valid, best[inverse] / np.where(valid, values, 1.0), 0.0)
+
+
+def score_candidates(prices, lead_times=None, availability=None, ratings=None,
+                     unit_prices=None, units=None, groups=None, weights=None):
+    """
+    Best-value score (0-100) for any number of candidates at once.
+
+    Each component is in [0, 1]: price and unit price are the cheapest
+    price in the candidate's group over its own (unit prices only compare
+    within one normalized unit), lead time follows LEAD_TIME_BUCKETS,
+    availability AVAILABILITY_POINTS and rating is supplier rating over
+    MAX_SUPPLIER_RATING. Missing values score 0. `groups` holds an integer
+    group per candidate (e.g. the BOM line) so many comparisons are scored
+    in one pass; the score is the weighted mean of the components.
+    """
+    weights = resolve_weights(weights)
+    prices = np.asarray(prices, dtype=np.float64)
+    n = len(prices)
+    if not n:
+        return np.zeros(0)
+    groups = np.zeros(n, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+
+    total = weights['price'] * _ratio_to_best(prices, groups)
+
+    if weights['unit_price'] and unit_prices is not None:
+        unit_prices = np.asarray(unit_prices, dtype=np.float64)
+        if units is None:
+            keys = groups
+        else:
+            unit_codes, distinct = _codes(units, n)
+            keys = groups * len(distinct) + unit_codes
+        total += weights['unit_price'] * _ratio_to_best(unit_prices, keys)
+
+    if weights['lead_time'] and lead_times is not None:
+        lead_times = np.asarray(lead_times, dtype=np.float64)
+        # A zero lead time is treated as unknown, as the catalog uses it for "not quoted".
+        known = ~np.isnan(lead_times) & (lead_times > 0)
+        total += weights['lead_time'] * np.where(known, np.select(
+            [lead_times < days for days, _ in LEAD_TIME_BUCKETS], [points for _, points in LEAD_TIME_BUCKETS], 0.0
+        ), 0.0)
+
+    if weights['availability'] and availability is not None:
+        # Availability has a handful of distinct spellings; look each up once.
+        codes, distinct = _codes(availability, n)
+        points = np.array([
+            AVAILABILITY_POINTS.get((a or '').strip().lower().replace(' ', '_'), 0.0) for a in distinct
+        ])
+        total += weights['availability'] * points[codes]
+
+    if weights['rating'] and ratings is not None:
+        ratings = np.asarray(ratings, dtype=np.float64)
+        total += weights['rating'] * np.clip(np.nan_to_num(ratings) / MAX_SUPPLIER_RATING, 0.0, 1.0)
+
+    return total * (100.0 / sum(weights.values()))
+
+
+def _supplier_rating(offer):
+    if 'supplier_rating' in offer:
+        return offer['supplier_rating']
+    return (offer.get('supplier') or {}).get('rating')
+
+
+def score_offers(offers, groups=None, weights=None):
+    """
+    score_candidates over offer dicts: comparison entries or BOM offers.
+
+    Reads price, lead_time_days, availability, normalized_unit_price,
+    normalized_unit and supplier_rating (or supplier['rating']).
+    """
+    n = len(offers)
+    return score_candidates(
+        _floats((o.get('price') for o in offers), n),
+        lead_times=_floats((o.get('lead_time_days') for o in offers), n),
+        availability=[o.get('availability') for o in offers],
+        ratings=_floats((_supplier_rating(o) for o in offers), n),
+        unit_prices=_floats((o.get('normalized_unit_price') for o in offers), n),
+        units=[o.get('normalized_unit') for o in offers],
+        groups=groups,
+        weights=weights
+    )
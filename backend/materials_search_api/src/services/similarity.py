@@ -0,0 +1,222 @@
+import math
+import threading
+import time
+import zlib
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from src.models.user import db
+from src.models.material import Material
+from src.services.entity_resolution import normalize_text
+from src.services.units import unit_code
+
+HASH_DIM = 1 << 18
+# The in-process index is rebuilt when the catalog grows or shrinks, or at
+# least this often so price and name edits are picked up.
+SIMILARITY_INDEX_TTL = 900
+# Rebuilds run in the background and start at most this often, however fast
+# the catalog changes.
+SIMILARITY_INDEX_MIN_REBUILD_SECONDS = 60
+SPEC_WEIGHT = 0.7
+UNIT_WEIGHT = 0.5
+PRICE_WEIGHT = 0.6
+# Width of a log-price bucket: neighbouring buckets differ by ~25%.
+PRICE_BUCKET_WIDTH = math.log(1.25)
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode()) % HASH_DIM
+
+
+def material_features(name, specifications, unit, price):
+    """
+    Hashed feature -> raw weight for one material.
+
+    Name unigrams and bigrams count once per occurrence; spec key=value
+    pairs, the normalized unit and a log-price bucket (with half weight on
+    its neighbours, so close prices still overlap) carry fixed weights. IDF
+    is applied by the index.
+    """
+    features = {}
+
+    def add(feature, weight):
+        key = _hash(feature)
+        features[key] = features.get(key, 0.0) + weight
+
+    tokens = normalize_text(name).split()
+    for token in tokens:
+        add(f"t:{token}", 1.0)
+    for left, right in zip(tokens, tokens[1:]):
+        add(f"b:{left} {right}", 1.0)
+    for key, value in (specifications or {}).items():
+        if isinstance(value, (str, int, float)):
+            add(f"s:{normalize_text(str(key))}={normalize_text(str(value))}", SPEC_WEIGHT)
+    code = unit_code(unit)
+    if code:
+        add(f"u:{code}", UNIT_WEIGHT)
+    if price and price > 0:
+        bucket = math.floor(math.log(price) / PRICE_BUCKET_WIDTH)
+        add(f"p:{bucket}", PRICE_WEIGHT)
+        add(f"p:{bucket - 1}", PRICE_WEIGHT / 2)
+        add(f"p:{bucket + 1}", PRICE_WEIGHT / 2)
+    return features
+
+
+class SimilarityIndex:
+    """
+    Hashed TF-IDF vectors for the whole catalog, searched through postings.
+
+    Rows are L2-normalized, so a query's cosine score against every material
+    is one np.bincount over the postings of the query's few features; top-k
+    is an np.argpartition. No ORM objects are created until the k winners
+    are loaded.
+    """
+
+    def __init__(self, rows):
+        n = len(rows)
+        self.ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=n)
+        self.position = {int(material_id): i for i, material_id in enumerate(self.ids)}
+        categories = {}
+        self.category = np.fromiter(
+            (categories.setdefault(row.category, len(categories)) for row in rows), dtype=np.int32, count=n
+        )
+        self.category_codes = categories
+
+        per_row = [material_features(row.name, row.specifications, row.unit, row.price) for row in rows]
+        lengths = np.fromiter((len(f) for f in per_row), dtype=np.int64, count=n)
+        self.indptr = np.concatenate([[0], np.cumsum(lengths)])
+        self.features = np.fromiter((k for f in per_row for k in f), dtype=np.int64, count=int(self.indptr[-1]))
+        weights = np.fromiter((w for f in per_row for w in f.values()), dtype=np.float64, count=int(self.indptr[-1]))
+        owners = np.repeat(np.arange(n), lengths)
+
+        document_frequency = np.bincount(self.features, minlength=HASH_DIM)
+        self.idf = np.log((1 + n) / (1 + document_frequency)) + 1.0
+        weights = weights * self.idf[self.features]
+        norms = np.sqrt(np.bincount(owners, weights=weights ** 2, minlength=n))
+        self.weights = (weights / np.where(norms > 0, norms, 1.0)[owners]).astype(np.float32)
+
+        order = np.argsort(self.features, kind='stable')
+        self.posting_docs = owners[order].astype(np.int32)
+        self.posting_weights = self.weights[order]
+        self.posting_start = np.searchsorted(self.features[order], np.arange(HASH_DIM + 1))
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls):
+        rows = db.session.query(
+            Material.id, Material.name, Material.category, Material.unit, Material.price, Material.specifications
+        ).order_by(Material.id).yield_per(5000).all()
+        return cls(rows)
+
+    def vector(self, material_id):
+        i = self.position.get(material_id)
+        if i is None:
+            return None
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.features[start:end], self.weights[start:end]
+
+    def query_vector(self, name, specifications=None, unit=None, price=None):
+        raw = material_features(name, specifications, unit, price)
+        features = np.fromiter(raw.keys(), dtype=np.int64, count=len(raw))
+        weights = np.fromiter(raw.values(), dtype=np.float64, count=len(raw)) * self.idf[features]
+        norm = np.sqrt((weights ** 2).sum())
+        return features, (weights / norm if norm > 0 else weights).astype(np.float32)
+
+    def search(self, features, weights, k=10, category=None, exclude=None):
+        """Top-k (material_id, cosine score) for a query vector, best first."""
+        n = len(self.ids)
+        if not n or not len(features):
+            return []
+        starts, ends = self.posting_start[features], self.posting_start[features + 1]
+        counts = ends - starts
+        if not counts.sum():
+            return []
+        # Flatten the postings of every query feature into one index array.
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        contributions = self.posting_weights[offsets] * np.repeat(weights, counts)
+        scores = np.bincount(self.posting_docs[offsets], weights=contributions, minlength=n)
+
+        if category is not None:
+            code = self.category_codes.get(category)
+            if code is None:
+                return []
+            scores[self.category != code] = 0
+        if exclude is not None and exclude in self.position:
+            scores[self.position[exclude]] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.ids[i]), round(float(scores[i]), 4)) for i in candidates]
+
+
+_index = None
+_index_signature = None
+_index_lock = threading.Lock()
+_rebuilding = False
+
+
+def _catalog_signature():
+    return tuple(db.session.query(func.count(Material.id), func.max(Material.id)).one())
+
+
+def rebuild_similarity_index():
+    """Build a fresh index and swap it in; requests keep using the old one meanwhile."""
+    global _index, _index_signature
+    signature = _catalog_signature()
+    index = SimilarityIndex.build()
+    with _index_lock:
+        _index, _index_signature = index, signature
+    return index
+
+
+def _rebuild_in_background(app):
+    global _rebuilding
+    try:
+        with app.app_context():
+            rebuild_similarity_index()
+    finally:
+        _rebuilding = False
+
+
+def get_similarity_index():
+    """
+    The process-wide index.
+
+    Only the first call builds it inline. Afterwards, when the catalog
+    changed size or the TTL passed, a background thread rebuilds it (at most
+    one at a time, SIMILARITY_INDEX_MIN_REBUILD_SECONDS apart) and requests
+    are served from the previous index until the new one is swapped in.
+    """
+    global _rebuilding
+    index = _index
+    if index is None:
+        return rebuild_similarity_index()
+
+    age = time.monotonic() - index.built_at
+    if _rebuilding or age < SIMILARITY_INDEX_MIN_REBUILD_SECONDS:
+        return index
+    if age > SIMILARITY_INDEX_TTL or _catalog_signature() != _index_signature:
+        with _index_lock:
+            if _rebuilding:
+                return index
+            _rebuilding = True
+        threading.Thread(
+            target=_rebuild_in_background, args=(current_app._get_current_object(),),
+            name='similarity-index-rebuild', daemon=True
+        ).start()
+    return index
+
+
+def similar_material_ids(material, k=10, same_category=True):
+    """Ids and scores of the k materials most similar to `material`."""
+    index = get_similarity_index()
+    vector = index.vector(material.id)
+    if vector is None:
+        vector = index.query_vector(material.name, material.specifications, material.unit, material.price)
+    return index.search(
+        *vector, k=k,
+        category=material.category if same_category else None,
+        exclude=material.id
+    )
@@ -2,6 +2,7 @@ from datetime import datetime
 from sqlalchemy import func
 from src.models.user import db
 from src.models.material import Supplier, SupplierReview
+from src.services.comparison import mark_comparisons_stale
 
 
 def create_review(supplier_id, user_id, rating, title=None, content=None,
@@ -127,6 +128,8 @@ def update_supplier_aggregate_ratings(supplier_id):
     if supplier:
         supplier.rating = stats['avg_rating'] or 0.0
         supplier.total_reviews = stats['total_reviews']
+        # Materialized comparisons embed the supplier's rating.
+        mark_comparisons_stale(supplier_id=supplier_id)
         db.session.commit()
 
 
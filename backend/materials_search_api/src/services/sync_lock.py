@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# A sync holds its provider's lease for LEASE_TTL_SECONDS at a time and extends
+# it every HEARTBEAT_SECONDS while it runs, so a crashed worker blocks the
+# provider for at most one TTL.
+LEASE_TTL_SECONDS = int(os.environ.get('SYNC_LEASE_TTL_SECONDS', 120))
+HEARTBEAT_SECONDS = LEASE_TTL_SECONDS / 3
+
+# Compare-and-extend / compare-and-delete so only the owner touches its lease.
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLost(RuntimeError):
+    """The sync's lease expired or was taken over; it must stop writing."""
+
+
+class _LocalLeases:
+    """In-process stand-in for Redis when REDIS_URL is not set (development, tests)."""
+
+    def __init__(self):
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._leases.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry
+        self._leases.pop(key, None)
+        return None
+
+    def acquire(self, key, owner, ttl):
+        with self._lock:
+            if self._live(key):
+                return False
+            self._leases[key] = (owner, time.monotonic() + ttl)
+            return True
+
+    def extend(self, key, owner, ttl):
+        with self._lock:
+            entry = self._live(key)
+            if not entry or entry[0] != owner:
+                return False
+            self._leases[key] = (owner, time.monotonic() + ttl)
+            return True
+
+    def release(self, key, owner):
+        with self._lock:
+            entry = self._live(key)
+            if not entry or entry[0] != owner:
+                return False
+            del self._leases[key]
+            return True
+
+    def owner(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+
+class _RedisLeases:
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._extend = self._redis.register_script(_EXTEND_SCRIPT)
+        self._release = self._redis.register_script(_RELEASE_SCRIPT)
+
+    def acquire(self, key, owner, ttl):
+        return bool(self._redis.set(key, owner, nx=True, px=int(ttl * 1000)))
+
+    def extend(self, key, owner, ttl):
+        return bool(self._extend(keys=[key], args=[owner, int(ttl * 1000)]))
+
+    def release(self, key, owner):
+        return bool(self._release(keys=[key], args=[owner]))
+
+    def owner(self, key):
+        return self._redis.get(key)
+
+
+_backend = None
+
+
+def _leases():
+    global _backend
+    if _backend is None:
+        redis_url = os.environ.get('REDIS_URL')
+        _backend = _RedisLeases(redis_url) if redis_url else _LocalLeases()
+    return _backend
+
+
+def _lease_key(provider_id: int) -> str:
+    return f"materials_sync_lease:{provider_id}"
+
+
+def acquire_provider_lease(provider_id: int, sync_job_id: int, ttl: float = LEASE_TTL_SECONDS) -> bool:
+    """Take the provider's sync lease for `sync_job_id`; False when another job holds it."""
+    return _leases().acquire(_lease_key(provider_id), str(sync_job_id), ttl)
+
+
+def extend_provider_lease(provider_id: int, sync_job_id: int, ttl: float = LEASE_TTL_SECONDS) -> bool:
+    """Heartbeat; False when the lease expired or now belongs to another job."""
+    return _leases().extend(_lease_key(provider_id), str(sync_job_id), ttl)
+
+
+def release_provider_lease(provider_id: int, sync_job_id: int) -> bool:
+    return _leases().release(_lease_key(provider_id), str(sync_job_id))
+
+
+def hold_provider_lease(provider_id: int, sync_job_id: int, ttl: float = LEASE_TTL_SECONDS) -> bool:
+    """Extend the lease if `sync_job_id` still holds it, else take it if it is free."""
+    return extend_provider_lease(provider_id, sync_job_id, ttl) or acquire_provider_lease(provider_id, sync_job_id, ttl)
+
+
+def running_sync_job_id(provider_id: int) -> Optional[int]:
+    """ID of the SyncJob currently holding the provider's lease, if any."""
+    owner = _leases().owner(_lease_key(provider_id))
+    return int(owner) if owner else None
+
+
+@contextmanager
+def lease_heartbeat(
+    provider_id: int,
+    sync_job_id: int,
+    ttl: float = LEASE_TTL_SECONDS,
+    interval: float = HEARTBEAT_SECONDS
+):
+    """
+    Keep extending the lease from a background thread while the body runs.
+
+    Sync work blocks the task's thread on the worker event loop, so the
+    heartbeat cannot run inline. The yielded state's 'lost' flag is set if an
+    extension fails, i.e. the lease expired and may have been taken over;
+    writers pass the state to check_lease before each write.
+    """
+    state = {'lost': False}
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(interval):
+            if not extend_provider_lease(provider_id, sync_job_id, ttl):
+                state['lost'] = True
+                return
+
+    thread = threading.Thread(target=beat, name=f'sync-lease-{provider_id}', daemon=True)
+    thread.start()
+    try:
+        yield state
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def check_lease(state: Optional[dict]):
+    """Raise LeaseLost when a lease_heartbeat state reports the lease gone."""
+    if state is not None and state['lost']:
+        raise LeaseLost('Sync lease lost; another job may own the provider')
@@ -0,0 +1,195 @@
+import re
+from typing import Optional, Tuple
+
+# Canonical unit codes and the spellings that map to them.
+UNIT_ALIASES = {
+    'EA': ('ea', 'each', 'pc', 'pcs', 'piece', 'pieces', 'unit', 'units', 'ct', 'count'),
+    'LF': ('lf', 'lin ft', 'linear ft', 'linear foot', 'linear feet', 'ft', 'foot', 'feet'),
+    'IN': ('in', 'inch', 'inches'),
+    'YD': ('yd', 'yard', 'yards', 'lin yd'),
+    'M': ('m', 'meter', 'meters', 'metre', 'metres'),
+    'SF': ('sf', 'sq ft', 'sqft', 'square foot', 'square feet', 'ft2'),
+    'SY': ('sy', 'sq yd', 'square yard', 'square yards', 'yd2'),
+    'SQ': ('sq', 'square', 'squares'),
+    'M2': ('m2', 'sq m', 'square meter', 'square meters'),
+    'CF': ('cf', 'cu ft', 'cubic foot', 'cubic feet', 'ft3'),
+    'CY': ('cy', 'cu yd', 'cubic yard', 'cubic yards', 'yd3'),
+    'GAL': ('gal', 'gallon', 'gallons'),
+    'QT': ('qt', 'quart', 'quarts'),
+    'L': ('l', 'liter', 'liters', 'litre', 'litres'),
+    'LB': ('lb', 'lbs', 'pound', 'pounds'),
+    'TON': ('ton', 'tons', 'tn'),
+    'KG': ('kg', 'kilogram', 'kilograms'),
+    'BF': ('bf', 'board foot', 'board feet'),
+    'SHT': ('sht', 'sheet', 'sheets'),
+    'BAG': ('bag', 'bags'),
+    'BOX': ('box', 'boxes', 'bx'),
+    'CS': ('cs', 'case', 'cases'),
+    'BDL': ('bdl', 'bundle', 'bundles'),
+    'ROLL': ('roll', 'rolls', 'rl'),
+    'PLT': ('plt', 'pallet', 'pallets'),
+    'PKG': ('pkg', 'pack', 'package', 'packages'),
+}
+
+# Measured units: the comparable base unit and how many base units one unit is.
+# Liquid measures compare per gallon and bulk volumes per cubic yard, as the
+# trade prices them.
+CONVERSIONS = {
+    'EA': ('EA', 1.0),
+    'LF': ('LF', 1.0), 'IN': ('LF', 1 / 12), 'YD': ('LF', 3.0), 'M': ('LF', 3.28084),
+    'SF': ('SF', 1.0), 'SY': ('SF', 9.0), 'SQ': ('SF', 100.0), 'M2': ('SF', 10.7639),
+    'CF': ('CY', 1 / 27), 'CY': ('CY', 1.0),
+    'GAL': ('GAL', 1.0), 'QT': ('GAL', 0.25), 'L': ('GAL', 0.264172),
+    'LB': ('LB', 1.0), 'TON': ('LB', 2000.0), 'KG': ('LB', 2.20462),
+    'BF': ('BF', 1.0),
+}
+
+# Package units convert only with a per-material size from `specifications`:
+# (spec key, unit the value is measured in), tried in order.
+PACKAGE_SPEC_KEYS = {
+    'SHT': (('sheet_area_sqft', 'SF'), ('area_sqft', 'SF'), ('coverage_sqft', 'SF')),
+    'BDL': (('coverage_sqft', 'SF'), ('pieces_per_bundle', 'EA'), ('pieces', 'EA')),
+    'BAG': (('bag_weight_lb', 'LB'), ('weight_lb', 'LB'), ('yield_cuft', 'CF'), ('yield_cuyd', 'CY')),
+    'BOX': (('quantity_per_box', 'EA'), ('pieces_per_box', 'EA'), ('coverage_sqft', 'SF')),
+    'CS': (('units_per_case', 'EA'), ('quantity_per_case', 'EA')),
+    'ROLL': (('roll_length_ft', 'LF'), ('coverage_sqft', 'SF')),
+    'PLT': (('units_per_pallet', 'EA'), ('coverage_sqft', 'SF')),
+    'PKG': (('quantity_per_package', 'EA'), ('pieces', 'EA')),
+}
+# Spec keys holding sheet dimensions such as "4x8" or "48 in x 96 in".
+SHEET_DIMENSION_KEYS = ('dimensions', 'size', 'sheet_size')
+
+_ALIAS_TO_CODE = {alias: code for code, aliases in UNIT_ALIASES.items() for alias in aliases}
+_ALIAS_TO_CODE.update({code.lower(): code for code in UNIT_ALIASES})
+_PER_UNIT_RE = re.compile(r'(?:/|\bper\s+)\s*([a-z][a-z0-9]*)(?:\s+([a-z][a-z0-9]*))?')
+# Words in a product name that say how it is sold ("Drywall Sheet", "Mortar Mix Bag").
+_PACKAGE_WORD_RE = re.compile(
+    r'\b(sheets?|bags?|box(?:es)?|cases?|bundles?|rolls?|pallets?|gallons?)\b'
+)
+_DIMENSIONS_RE = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(in|inch|inches|"|ft|feet|\')?\s*[x×]\s*(\d+(?:\.\d+)?)\s*(in|inch|inches|"|ft|feet|\')?'
+)
+
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', (text or '').lower().replace('.', ' ')).strip()
+
+
+def unit_code(unit: Optional[str]) -> Optional[str]:
+    """Canonical code for a unit spelling ('sq. ft' -> 'SF'), or None when unknown."""
+    return _ALIAS_TO_CODE.get(_clean(unit))
+
+
+def parse_unit(unit_text: Optional[str], name: str = '', default: str = 'EA') -> str:
+    """
+    Unit code from a provider's unit field and product name.
+
+    The unit field is tried as a whole first, then "/sq ft" and "per sheet"
+    phrases in the unit field and the name, then package words ("sheet",
+    "bundle", ...) in either.
+    """
+    code = unit_code(unit_text)
+    if code:
+        return code
+
+    for text in (_clean(unit_text), _clean(name)):
+        for match in _PER_UNIT_RE.finditer(text):
+            first, second = match.groups()
+            code = (second and _ALIAS_TO_CODE.get(f'{first} {second}')) or _ALIAS_TO_CODE.get(first)
+            if code:
+                return code
+
+    for text in (_clean(unit_text), _clean(name)):
+        match = _PACKAGE_WORD_RE.search(text)
+        if match:
+            return _ALIAS_TO_CODE[match.group(1)]
+    return default
+
+
+def _positive_number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _sheet_area_sqft(text):
+    match = _DIMENSIONS_RE.search(str(text).lower())
+    if not match:
+        return None
+    width, width_unit, length, length_unit = match.groups()
+    width, length = float(width), float(length)
+    inches = (width_unit or length_unit or '') in ('in', 'inch', 'inches', '"') or (
+        not width_unit and not length_unit and max(width, length) > 16
+    )
+    area = width * length
+    return area / 144 if inches else area
+
+
+def _package_size(code, specifications):
+    specs = specifications or {}
+    for key, unit in PACKAGE_SPEC_KEYS.get(code, ()):
+        amount = _positive_number(specs.get(key))
+        if amount:
+            base, factor = CONVERSIONS[unit]
+            return base, amount * factor
+    if code == 'SHT':
+        for key in SHEET_DIMENSION_KEYS:
+            if specs.get(key):
+                area = _sheet_area_sqft(specs[key])
+                if area:
+                    return 'SF', area
+    return None
+
+
+def unit_conversion(unit: Optional[str], specifications: Optional[dict] = None) -> Tuple[Optional[str], float]:
+    """
+    (comparable unit, comparable units per listed unit) for a material.
+
+    An explicit `unit_conversion` spec ({'unit': 'SF', 'factor': 32}) wins;
+    measured units convert through CONVERSIONS; package units need a size
+    from PACKAGE_SPEC_KEYS or, for sheets, their dimensions. Anything else,
+    including spellings the registry does not know, compares only with
+    itself (factor 1). A missing unit gives (None, 1).
+    """
+    override = (specifications or {}).get('unit_conversion')
+    if isinstance(override, dict):
+        target, factor = unit_code(override.get('unit')), _positive_number(override.get('factor'))
+        if target and factor:
+            base, base_factor = CONVERSIONS.get(target, (target, 1.0))
+            return base, factor * base_factor
+
+    code = unit_code(unit)
+    if code is None:
+        cleaned = _clean(unit)
+        return (cleaned.upper()[:10] or None), 1.0
+    if code in CONVERSIONS:
+        return CONVERSIONS[code]
+    return _package_size(code, specifications) or (code, 1.0)
+
+
+def normalized_unit_price(price: Optional[float], unit: Optional[str],
+                          specifications: Optional[dict] = None) -> Tuple[Optional[str], Optional[float]]:
+    """(comparable unit, price per comparable unit); the price is None when it cannot be compared."""
+    base, factor = unit_conversion(unit, specifications)
+    if price is None or base is None:
+        return base, None
+    return base, round(price / factor, 6)
+
+
+def apply_normalized_price(record, specifications=None):
+    """Set normalized_unit/normalized_unit_price on a Material or MaterialVariant before it is saved."""
+    if specifications is None:
+        specifications = getattr(record, 'specifications', None)
+    record.normalized_unit, record.normalized_unit_price = normalized_unit_price(
+        record.price, record.unit, specifications
+    )
+    return record
+
+
+def normalized_price_fields(price, unit, specifications=None):
+    """The same values as a mapping, for bulk inserts and updates."""
+    normalized_unit, normalized_price = normalized_unit_price(price, unit, specifications)
+    return {'normalized_unit': normalized_unit, 'normalized_unit_price': normalized_price}
+
@@ -1,13 +1,33 @@
 from .sync_tasks import (
     sync_provider,
+    sync_provider_chunk,
+    finalize_sync_job,
+    fail_chunked_sync_job,
+    update_price_consensus,
+    match_provider_items,
+    resolve_canonical_materials_task,
+    refresh_canonical_comparisons_task,
+    normalize_unit_prices,
     sync_volatile_materials,
+    refresh_provider_prices,
     sync_full_catalog,
+    probe_open_circuits,
     cleanup_expired_prices
 )
 
 __all__ = [
     'sync_provider',
+    'sync_provider_chunk',
+    'finalize_sync_job',
+    'fail_chunked_sync_job',
+    'update_price_consensus',
+    'match_provider_items',
+    'resolve_canonical_materials_task',
+    'refresh_canonical_comparisons_task',
+    'normalize_unit_prices',
     'sync_volatile_materials',
+    'refresh_provider_prices',
     'sync_full_catalog',
+    'probe_open_circuits',
     'cleanup_expired_prices'
 ]
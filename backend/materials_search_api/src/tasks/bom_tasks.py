@@ -0,0 +1,29 @@
+from datetime import datetime
+from src.celery_app import celery_app
+from src.models.user import db
+from src.models.bom import BOMOptimizationJob
+from src.services.bom_optimizer import optimize_bom
+from src.tasks.sync_tasks import get_flask_app
+
+
+@celery_app.task
+def optimize_bom_task(job_id: int):
+    with get_flask_app().app_context():
+        job = BOMOptimizationJob.query.get(job_id)
+        if not job:
+            return {'error': f'Optimization job {job_id} not found'}
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            job.result = optimize_bom(job.bom_id, **(job.constraints or {}))
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.error_message = str(e)
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        return {'job_id': job.id, 'status': job.status}
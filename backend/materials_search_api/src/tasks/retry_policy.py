@@ -0,0 +1,55 @@
+import asyncio
+import random
+import httpx
+from src.models.user import db
+from src.models.material import DeadLetter
+from src.integrations.base import ProviderError
+
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+
+
+def is_retryable(exc):
+    if isinstance(exc, ProviderError):
+        return exc.retryable
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError))
+
+
+def is_provider_error(exc):
+    """
+    Whether `exc` came from the provider or the network on the way to it.
+
+    Only these count against the provider's circuit; a misconfigured adapter
+    or a database error says nothing about the provider's health.
+    """
+    return isinstance(exc, (ProviderError, httpx.HTTPError, asyncio.TimeoutError, TimeoutError, ConnectionError))
+
+
+def retry_countdown(exc, retries):
+    """
+    Seconds before the next attempt.
+
+    A provider's Retry-After wins when present. Otherwise it is exponential
+    backoff with full jitter: uniform in [0, base * 2**retries], capped, so
+    chunks that failed together do not retry in lockstep.
+    """
+    retry_after = getattr(exc, 'retry_after', None)
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_BASE_DELAY * 2 ** retries, RETRY_MAX_DELAY))
+
+
+def dead_letter(kind, provider_id, payload, exc=None, sync_job_id=None, attempts=1):
+    entry = DeadLetter(
+        kind=kind,
+        provider_id=provider_id,
+        sync_job_id=sync_job_id,
+        payload=payload,
+        error_type=type(exc).__name__ if exc is not None else None,
+        error_message=str(exc) if exc is not None else None,
+        status_code=getattr(exc, 'status_code', None),
+        attempts=attempts
+    )
+    db.session.add(entry)
+    db.session.commit()
+    return entry
@@ -1,10 +1,39 @@
-import asyncio
+import os
 from datetime import datetime, timedelta
-from src.celery_app import celery_app
+from celery import chord
+from celery.signals import worker_process_shutdown
+from src.celery_app import celery_app, DEFAULT_QUEUE
 from src.models.user import db
-from src.models.material import DataProvider, PriceSource, SyncJob, Material
-from src.integrations import get_provider_adapter
-from src.integrations.demo_provider import DemoProviderAdapter
+from src.models.material import DataProvider, SyncJob, PriceSource
+from src.integrations import get_provider_adapter, provider_registry
+from src.integrations.browser_pool import run_in_worker_loop, shutdown_worker_loop
+from src.services.ingestion import (
+    stream_prices_to_db, write_price_batch_async, DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE, PRICE_TTL_HOURS
+)
+from src.services.refresh_scheduler import rebuild_refresh_schedule, plan_refreshes, mark_refreshed
+from src.services.consensus import refresh_price_consensus
+from src.services.material_matcher import match_pending_items
+from src.services.entity_resolution import resolve_canonical_materials
+from src.services.comparison import refresh_stale_comparisons
+from src.services.canonical_stats import refresh_missing_canonical_stats
+from src.tasks.retry_policy import is_retryable, is_provider_error, retry_countdown, dead_letter
+from src.services.provider_health import (
+    is_provider_available, available_providers, due_for_probe, record_provider_outcome, record_probe_result
+)
+from src.services.sync_lock import (
+    acquire_provider_lease, extend_provider_lease, release_provider_lease, hold_provider_lease,
+    running_sync_job_id, lease_heartbeat, check_lease, LeaseLost
+)
+from src.services.price_maintenance import (
+    expire_prices, archive_invalid_prices, backfill_normalized_prices, DEFAULT_CLEANUP_BATCH_SIZE
+)
+
+SYNC_MAX_RETRIES = 3
+CHUNK_MAX_RETRIES = 3
+# Lease held by a chunked sync from dispatch until finalize_sync_job.
+CHORD_LEASE_TTL_SECONDS = 3600
+# Invalid prices older than this many days are archived and purged; 0 disables.
+PRICE_ARCHIVE_AFTER_DAYS = int(os.environ.get('PRICE_ARCHIVE_AFTER_DAYS', 0))
 
 
 def get_flask_app():
@@ -12,119 +41,657 @@ def get_flask_app():
     return app
 
 
-@celery_app.task(bind=True)
-def sync_provider(self, provider_id: int, job_type: str = 'full'):
+@worker_process_shutdown.connect
+def close_browser_pools(**kwargs):
+    shutdown_worker_loop()
+
+
+def build_adapter(provider):
+    config = {
+        'name': provider.name,
+        'base_url': provider.base_url,
+        'api_key': provider.api_key_encrypted,
+        'config': provider.config
+    }
+
+    adapter = get_provider_adapter(provider.name, config)
+    if not adapter:
+        raise ValueError(f"No adapter found for provider: {provider.name}")
+    return adapter
+
+
+def workload_queue(provider):
+    """Queue for background syncs of `provider`: 'browser' for Playwright scrapers, else 'api'."""
+    queue = (provider.config or {}).get('queue')
+    if queue:
+        return queue
+    adapter_class = provider_registry.get_adapter_class(provider.name)
+    return adapter_class.workload if adapter_class else DEFAULT_QUEUE
+
+
+def interactive_queue(provider):
+    """
+    Queue for a user-triggered sync of `provider`: 'interactive', except that
+    browser workloads stay on 'browser', whose workers have the shared memory
+    and process recycling Chromium needs.
+    """
+    queue = workload_queue(provider)
+    return queue if queue == 'browser' else 'interactive'
+
+
+def _current_queue(task):
+    # Work fanned out by a task stays on the queue it was delivered from, so an
+    # interactive sync's chunks are not queued behind background syncs.
+    return (task.request.delivery_info or {}).get('routing_key')
+
+
+def _start_sync_job(provider_id, job_type, resume=True, **fields):
+    """
+    Create a running SyncJob and take the provider's sync lease for it.
+
+    Returns None, without creating the job, when another job holds the lease;
+    the caller coalesces into that job instead of fetching the same prices twice.
+    """
+    sync_job = SyncJob(
+        provider_id=provider_id,
+        job_type=job_type,
+        status='running',
+        started_at=datetime.utcnow(),
+        **fields
+    )
+    if resume:
+        previous_job = SyncJob.query.filter_by(
+            provider_id=provider_id, job_type=job_type
+        ).order_by(SyncJob.id.desc()).first()
+        # Chunks the previous run left unfinished pick up where they stopped.
+        if previous_job and previous_job.checkpoint:
+            sync_job.checkpoint = dict(previous_job.checkpoint)
+            sync_job.resumed_from_id = previous_job.id
+    db.session.add(sync_job)
+    db.session.flush()
+
+    if not acquire_provider_lease(provider_id, sync_job.id):
+        db.session.rollback()
+        return None
+    db.session.commit()
+    return sync_job
+
+
+def _coalesced(provider_id):
+    return {'status': 'coalesced', 'sync_job_id': running_sync_job_id(provider_id)}
+
+
+def _supersede_sync_job(sync_job):
+    """Close a job whose provider lease now belongs to another sync."""
+    sync_job.status = 'coalesced'
+    sync_job.completed_at = datetime.utcnow()
+    sync_job.error_message = f'Superseded by sync job {running_sync_job_id(sync_job.provider_id)}'
+    db.session.commit()
+
+
+def _fail_sync_job(sync_job, error_message):
+    sync_job.status = 'failed'
+    sync_job.completed_at = datetime.utcnow()
+    sync_job.error_message = error_message
+    db.session.commit()
+
+
+def _material_ids_for(provider_id, external_ids):
+    """Materials priced by these provider items, through their stored price sources."""
+    if not external_ids:
+        return []
+    return [row[0] for row in db.session.query(PriceSource.material_id).filter(
+        PriceSource.provider_id == provider_id,
+        PriceSource.external_id.in_(external_ids)
+    ).distinct()]
+
+
+def _refreshed_material_ids(provider_id, material_ids, since):
+    """
+    Of `material_ids`, those with a price source from this provider written or
+    extended at or after `since`; both push expires_at to a full TTL from then.
+    """
+    if not material_ids:
+        return []
+    return [row[0] for row in db.session.query(PriceSource.material_id).filter(
+        PriceSource.provider_id == provider_id,
+        PriceSource.material_id.in_(material_ids),
+        PriceSource.is_valid == True,
+        PriceSource.expires_at >= since + timedelta(hours=PRICE_TTL_HOURS)
+    ).distinct()]
+
+
+def _record_outcome(provider_id, adapter, error=None):
+    if error is not None and not is_provider_error(error):
+        return
+    record_provider_outcome(
+        provider_id,
+        success=error is None,
+        latencies_ms=adapter.request_latencies_ms if adapter else (),
+        errors=adapter.request_errors if adapter else None,
+        error=error
+    )
+
+
+async def _run_pipeline(adapter, provider, sync_job_id, chunk=None, lease_state=None):
+    try:
+        return await stream_prices_to_db(
+            adapter,
+            provider.id,
+            sync_job_id,
+            chunk=chunk,
+            limit=provider.config.get('sync_limit', 100),
+            batch_size=provider.config.get('sync_batch_size', DEFAULT_BATCH_SIZE),
+            queue_size=provider.config.get('sync_queue_size', DEFAULT_QUEUE_SIZE),
+            lease_state=lease_state
+        )
+    finally:
+        await adapter.close()
+
+
+@celery_app.task(bind=True, max_retries=SYNC_MAX_RETRIES)
+def sync_provider(self, provider_id: int, job_type: str = 'full', sync_job_id: int = None):
     with get_flask_app().app_context():
         provider = DataProvider.query.get(provider_id)
         if not provider or not provider.is_active:
             return {'error': 'Provider not found or inactive'}
+        if not is_provider_available(provider):
+            if sync_job_id:
+                _fail_sync_job(SyncJob.query.get(sync_job_id), 'Provider circuit is open')
+            return {'error': 'Provider circuit is open', 'circuit_state': provider.circuit_state}
 
-        sync_job = SyncJob(
-            provider_id=provider_id,
-            job_type=job_type,
-            status='running',
-            started_at=datetime.utcnow()
-        )
-        db.session.add(sync_job)
-        db.session.commit()
+        if sync_job_id:
+            # A retry continues the same job, and with it the job's checkpoints,
+            # unless another sync took the provider while this one waited.
+            sync_job = SyncJob.query.get(sync_job_id)
+            if not acquire_provider_lease(provider_id, sync_job.id):
+                _supersede_sync_job(sync_job)
+                return _coalesced(provider_id)
+            sync_job.status = 'running'
+            db.session.commit()
+        else:
+            sync_job = _start_sync_job(provider_id, job_type)
+            if sync_job is None:
+                return _coalesced(provider_id)
 
+        adapter = None
         try:
-            config = {
-                'name': provider.name,
-                'base_url': provider.base_url,
-                'api_key': provider.api_key_encrypted,
-                'config': provider.config
-            }
-
-            adapter = get_provider_adapter(provider.name, config)
-            if not adapter:
-                raise ValueError(f"No adapter found for provider: {provider.name}")
-
-            result = asyncio.run(adapter.fetch_prices(limit=100))
-
-            if result.success and result.prices:
-                for price_data in result.prices:
-                    material = Material.query.filter_by(name=price_data.name).first()
-                    if material:
-                        price_source = PriceSource(
-                            material_id=material.id,
-                            provider_id=provider_id,
-                            external_id=price_data.external_id,
-                            price=price_data.price,
-                            unit=price_data.unit,
-                            currency=price_data.currency,
-                            confidence_score=price_data.confidence_score,
-                            source_url=price_data.source_url,
-                            raw_data=price_data.raw_data,
-                            fetched_at=datetime.utcnow(),
-                            expires_at=datetime.utcnow() + timedelta(hours=24)
-                        )
-                        db.session.add(price_source)
+            adapter = build_adapter(provider)
+            chunks = adapter.plan_chunks()
 
+            if len(chunks) > 1:
+                sync_job.chunks_total = len(chunks)
                 db.session.commit()
 
+                # The lease now covers the whole chord: chunks may sit in the
+                # queue before their heartbeats start, and finalize releases it.
+                extend_provider_lease(provider_id, sync_job.id, CHORD_LEASE_TTL_SECONDS)
+                queue = _current_queue(self) or workload_queue(provider)
+                finalize = finalize_sync_job.s(sync_job.id).set(queue=queue)
+                # A chunk that raises instead of reporting failure skips finalize.
+                finalize.link_error(fail_chunked_sync_job.s(sync_job.id))
+                chord(
+                    sync_provider_chunk.s(sync_job.id, index, chunk).set(queue=queue)
+                    for index, chunk in enumerate(chunks)
+                )(finalize)
+
+                return {
+                    'status': 'dispatched',
+                    'sync_job_id': sync_job.id,
+                    'chunks': len(chunks)
+                }
+
+            with lease_heartbeat(provider_id, sync_job.id) as lease:
+                result = run_in_worker_loop(_run_pipeline(adapter, provider, sync_job.id, chunks[0], lease))
+
             sync_job.status = 'completed'
             sync_job.completed_at = datetime.utcnow()
-            sync_job.items_processed = result.items_processed
-            sync_job.items_failed = result.items_failed
+            sync_job.items_processed = result['received']
+            sync_job.items_failed = result['failed']
+            sync_job.chunks_completed = 1
 
             provider.last_sync_at = datetime.utcnow()
             db.session.commit()
+            release_provider_lease(provider_id, sync_job.id)
+            _record_outcome(provider_id, adapter)
+            update_price_consensus.delay(provider_id)
+            if result['unmatched']:
+                match_provider_items.delay(provider_id)
 
             return {
                 'status': 'completed',
-                'items_processed': result.items_processed,
-                'items_failed': result.items_failed
+                'sync_job_id': sync_job.id,
+                'items_processed': result['received'],
+                'items_failed': result['failed'],
+                'items_duplicated': result['duplicates'],
+                'items_written': result['written'],
+                'items_unchanged': result['unchanged'],
+                'items_unmatched': result['unmatched']
             }
 
+        except LeaseLost:
+            # Another sync owns the provider now and writes these prices itself.
+            db.session.rollback()
+            release_provider_lease(provider_id, sync_job.id)
+            _supersede_sync_job(sync_job)
+            return _coalesced(provider_id)
+
         except Exception as e:
-            sync_job.status = 'failed'
-            sync_job.completed_at = datetime.utcnow()
-            sync_job.error_message = str(e)
-            db.session.commit()
+            db.session.rollback()
+            release_provider_lease(provider_id, sync_job.id)
+            _record_outcome(provider_id, adapter, e)
+
+            if is_retryable(e) and self.request.retries < self.max_retries:
+                sync_job.status = 'retrying'
+                sync_job.error_message = str(e)
+                db.session.commit()
+                raise self.retry(
+                    exc=e,
+                    countdown=retry_countdown(e, self.request.retries),
+                    args=(provider_id, job_type, sync_job.id),
+                    kwargs={}
+                )
+
+            _fail_sync_job(sync_job, str(e))
+            dead_letter(
+                'sync', provider_id, {'job_type': job_type},
+                exc=e, sync_job_id=sync_job.id, attempts=self.request.retries + 1
+            )
             raise
 
 
+@celery_app.task(bind=True, max_retries=CHUNK_MAX_RETRIES)
+def sync_provider_chunk(self, sync_job_id: int, chunk_index: int, chunk: dict, replay: bool = False):
+    with get_flask_app().app_context():
+        sync_job = SyncJob.query.get(sync_job_id)
+        provider = sync_job.provider
+
+        adapter = None
+        took_lease = False
+        try:
+            if not is_provider_available(provider):
+                # The breaker opened while this chord ran; give up instead of
+                # spending retries on a provider that is down.
+                raise RuntimeError('Provider circuit is open')
+            # A chunk that waited in the queue past the chord's lease TTL, or a
+            # replay after the job ended, (re-)takes the lease unless another
+            # sync has it by now.
+            took_lease = running_sync_job_id(provider.id) != sync_job_id
+            if not hold_provider_lease(provider.id, sync_job_id, CHORD_LEASE_TTL_SECONDS):
+                raise LeaseLost(f'Provider lease is held by sync job {running_sync_job_id(provider.id)}')
+            adapter = build_adapter(provider)
+            with lease_heartbeat(provider.id, sync_job_id, ttl=CHORD_LEASE_TTL_SECONDS) as lease:
+                result = run_in_worker_loop(_run_pipeline(adapter, provider, sync_job_id, chunk, lease))
+        except LeaseLost as e:
+            db.session.rollback()
+            if replay:
+                # The provider is busy with another sync; keep the chunk for a later replay.
+                dead_letter(
+                    'chunk', provider.id, {'chunk_index': chunk_index, 'chunk': chunk},
+                    exc=e, sync_job_id=sync_job_id, attempts=self.request.retries + 1
+                )
+                return {'chunk': chunk_index, 'status': 'failed', 'error': str(e)}
+            SyncJob.query.filter_by(id=sync_job_id).update(
+                {SyncJob.chunks_failed: SyncJob.chunks_failed + 1},
+                synchronize_session=False
+            )
+            db.session.commit()
+            # Not dead-lettered: the sync that took the lease covers this chunk.
+            return {'chunk': chunk_index, 'status': 'failed', 'error': str(e), 'superseded': True}
+        except Exception as e:
+            db.session.rollback()
+            if adapter is not None:
+                _record_outcome(provider.id, adapter, e)
+            if adapter is not None and is_retryable(e) and self.request.retries < self.max_retries:
+                raise self.retry(exc=e, countdown=retry_countdown(e, self.request.retries))
+
+            if not replay:
+                SyncJob.query.filter_by(id=sync_job_id).update(
+                    {SyncJob.chunks_failed: SyncJob.chunks_failed + 1},
+                    synchronize_session=False
+                )
+                db.session.commit()
+            dead_letter(
+                'chunk', provider.id, {'chunk_index': chunk_index, 'chunk': chunk},
+                exc=e, sync_job_id=sync_job_id, attempts=self.request.retries + 1
+            )
+            return {'chunk': chunk_index, 'status': 'failed', 'error': str(e)}
+        finally:
+            if replay and took_lease:
+                # A replayed chunk has no chord whose finalize would free the provider.
+                release_provider_lease(provider.id, sync_job_id)
+
+        _record_outcome(provider.id, adapter)
+        counters = {
+            SyncJob.chunks_completed: SyncJob.chunks_completed + 1,
+            SyncJob.items_failed: SyncJob.items_failed + result['failed']
+        }
+        if replay:
+            # A replayed chunk was already counted as failed by its chord.
+            counters[SyncJob.chunks_failed] = SyncJob.chunks_failed - 1
+        SyncJob.query.filter_by(id=sync_job_id).update(counters, synchronize_session=False)
+        db.session.commit()
+
+        return {'chunk': chunk_index, 'status': 'completed', **result}
+
+
+@celery_app.task
+def finalize_sync_job(chunk_results, sync_job_id: int):
+    with get_flask_app().app_context():
+        sync_job = SyncJob.query.get(sync_job_id)
+        completed = [r for r in chunk_results if r['status'] == 'completed']
+        failed = [r for r in chunk_results if r['status'] == 'failed']
+
+        # items_processed and items_failed were incremented atomically by each
+        # batch and chunk, including what failed chunks wrote before failing.
+        sync_job.completed_at = datetime.utcnow()
+        sync_job.status = 'completed' if completed else 'failed'
+        if any(r.get('superseded') for r in failed):
+            sync_job.status = 'coalesced'
+        if failed:
+            sync_job.error_message = '; '.join(f"chunk {r['chunk']}: {r['error']}" for r in failed)
+
+        if completed:
+            sync_job.provider.last_sync_at = datetime.utcnow()
+        db.session.commit()
+        release_provider_lease(sync_job.provider_id, sync_job_id)
+
+        if completed:
+            update_price_consensus.delay(sync_job.provider_id)
+        if any(r['unmatched'] for r in completed):
+            match_provider_items.delay(sync_job.provider_id)
+
+        return {
+            'status': sync_job.status,
+            'sync_job_id': sync_job_id,
+            'chunks_completed': len(completed),
+            'chunks_failed': len(failed),
+            'items_processed': sync_job.items_processed,
+            'items_failed': sync_job.items_failed
+        }
+
+
+@celery_app.task
+def fail_chunked_sync_job(request, exc, traceback, sync_job_id: int):
+    """Errback for a chunked sync's chord: fail the job and free the provider."""
+    with get_flask_app().app_context():
+        sync_job = SyncJob.query.get(sync_job_id)
+        if sync_job.status in ('running', 'retrying'):
+            _fail_sync_job(sync_job, f'Chunk raised {type(exc).__name__}: {exc}')
+        release_provider_lease(sync_job.provider_id, sync_job_id)
+
+
+@celery_app.task
+def update_price_consensus(provider_id: int = None):
+    with get_flask_app().app_context():
+        return refresh_price_consensus(provider_id=provider_id)
+
+
+@celery_app.task
+def match_provider_items(provider_id: int = None, rematch: bool = False):
+    with get_flask_app().app_context():
+        result = match_pending_items(provider_id=provider_id, rematch=rematch)
+        if result['material_ids']:
+            refresh_price_consensus(material_ids=result['material_ids'])
+        return {**result, 'material_ids': len(result['material_ids'])}
+
+
+@celery_app.task
+def resolve_canonical_materials_task():
+    with get_flask_app().app_context():
+        result = resolve_canonical_materials()
+        result['comparisons_refreshed'] = refresh_stale_comparisons()
+        return result
+
+
+@celery_app.task
+def refresh_canonical_comparisons_task():
+    with get_flask_app().app_context():
+        return {'refreshed': refresh_stale_comparisons(), 'stats_created': refresh_missing_canonical_stats()}
+
+
+@celery_app.task
+def normalize_unit_prices(full: bool = False):
+    with get_flask_app().app_context():
+        return {'updated': backfill_normalized_prices(full=full)}
+
+
 @celery_app.task
 def sync_volatile_materials():
     with get_flask_app().app_context():
-        providers = DataProvider.query.filter_by(is_active=True).all()
-        volatile_categories = ['Steel', 'Lumber']
+        rebuild_refresh_schedule()
+        providers = available_providers(DataProvider.query.filter_by(is_active=True).all())
+        plans = plan_refreshes(providers)
 
-        for provider in providers:
-            if provider.config.get('supports_volatile', False):
-                sync_provider.delay(provider.id, 'incremental')
+        queues = {provider.id: workload_queue(provider) for provider in providers}
+        for provider_id, plan in plans.items():
+            refresh_provider_prices.apply_async(
+                (provider_id, plan['external_ids'], plan['categories'], plan['material_ids']),
+                queue=queues[provider_id]
+            )
+
+        return {
+            'message': f'Queued targeted refreshes for {len(plans)} providers',
+            'materials': sum(len(plan['material_ids']) for plan in plans.values()),
+            'single_fetches': sum(len(plan['external_ids']) for plan in plans.values()),
+            'category_syncs': sum(len(plan['categories']) for plan in plans.values())
+        }
 
-        return {'message': f'Queued {len(providers)} providers for volatile sync'}
+
+async def _refresh_prices(adapter, provider, sync_job_id, external_ids, categories, lease_state=None):
+    try:
+        fetched = await adapter.fetch_single_prices(external_ids) if external_ids else []
+        prices = [p for p in fetched if p]
+        failed_ids = [eid for eid, p in zip(external_ids, fetched) if not p]
+        totals = {
+            'received': 0, 'duplicates': 0, 'written': 0, 'unchanged': 0, 'unmatched': 0,
+            'failed': len(failed_ids), 'failed_ids': failed_ids
+        }
+        if prices:
+            check_lease(lease_state)
+            counts = await write_price_batch_async(provider.id, prices)
+            for key in ('received', 'duplicates', 'written', 'unchanged', 'unmatched'):
+                totals[key] += counts[key]
+
+        for category in categories:
+            result = await stream_prices_to_db(
+                adapter, provider.id, sync_job_id,
+                chunk={'category': category},
+                limit=provider.config.get('sync_limit', 100),
+                lease_state=lease_state
+            )
+            for key in ('received', 'duplicates', 'written', 'unchanged', 'unmatched', 'failed'):
+                totals[key] += result[key]
+        return totals
+    finally:
+        await adapter.close()
+
+
+@celery_app.task(bind=True, max_retries=SYNC_MAX_RETRIES)
+def refresh_provider_prices(self, provider_id: int, external_ids: list, categories: list, material_ids: list,
+                            sync_job_id: int = None):
+    with get_flask_app().app_context():
+        provider = DataProvider.query.get(provider_id)
+        if not is_provider_available(provider):
+            if sync_job_id:
+                _fail_sync_job(SyncJob.query.get(sync_job_id), 'Provider circuit is open')
+            return {'error': 'Provider circuit is open', 'circuit_state': provider.circuit_state}
+
+        if sync_job_id:
+            # A retry continues the same job, as in sync_provider.
+            sync_job = SyncJob.query.get(sync_job_id)
+            if not acquire_provider_lease(provider_id, sync_job.id):
+                _supersede_sync_job(sync_job)
+                return _coalesced(provider_id)
+            sync_job.status = 'running'
+            db.session.commit()
+        else:
+            sync_job = _start_sync_job(
+                provider_id, 'incremental', resume=False,
+                chunks_total=len(categories) + (1 if external_ids else 0)
+            )
+            if sync_job is None:
+                # A running sync of this provider refreshes these prices anyway.
+                return _coalesced(provider_id)
+
+        adapter = None
+        started_at = datetime.utcnow()
+        try:
+            adapter = build_adapter(provider)
+            with lease_heartbeat(provider_id, sync_job.id) as lease:
+                result = run_in_worker_loop(_refresh_prices(
+                    adapter, provider, sync_job.id, external_ids, categories, lease
+                ))
+        except LeaseLost:
+            db.session.rollback()
+            release_provider_lease(provider_id, sync_job.id)
+            _supersede_sync_job(sync_job)
+            return _coalesced(provider_id)
+        except Exception as e:
+            db.session.rollback()
+            release_provider_lease(provider_id, sync_job.id)
+            _record_outcome(provider_id, adapter, e)
+
+            if is_retryable(e) and self.request.retries < self.max_retries:
+                sync_job.status = 'retrying'
+                sync_job.error_message = str(e)
+                db.session.commit()
+                raise self.retry(
+                    exc=e,
+                    countdown=retry_countdown(e, self.request.retries),
+                    args=(provider_id, external_ids, categories, material_ids, sync_job.id),
+                    kwargs={}
+                )
+
+            _fail_sync_job(sync_job, str(e))
+            dead_letter(
+                'refresh', provider_id,
+                {'external_ids': external_ids, 'categories': categories, 'material_ids': material_ids},
+                exc=e, sync_job_id=sync_job.id, attempts=self.request.retries + 1
+            )
+            raise
+
+        _record_outcome(provider_id, adapter)
+        sync_job.status = 'completed'
+        sync_job.completed_at = datetime.utcnow()
+        sync_job.items_processed = result['received']
+        sync_job.items_failed = result['failed']
+        sync_job.chunks_completed = sync_job.chunks_total
+        db.session.commit()
+        release_provider_lease(provider_id, sync_job.id)
+
+        failed_ids = result.pop('failed_ids')
+        if failed_ids:
+            # Items the provider could not price are kept for a targeted replay.
+            dead_letter(
+                'items', provider_id, {'external_ids': failed_ids},
+                sync_job_id=sync_job.id, attempts=self.request.retries + 1
+            )
+        if result['unmatched']:
+            match_provider_items.delay(provider_id)
+
+        # Only materials that got a price this run count as refreshed. The rest,
+        # including those whose item could not be priced or that a category
+        # sync did not return, stay due so the next plan retries them.
+        unrefreshed = set(_material_ids_for(provider_id, failed_ids))
+        mark_refreshed([
+            material_id for material_id in _refreshed_material_ids(provider_id, material_ids, started_at)
+            if material_id not in unrefreshed
+        ])
+        refresh_price_consensus(material_ids=material_ids)
+
+        return {'status': 'completed', 'sync_job_id': sync_job.id, **result}
 
 
 @celery_app.task
 def sync_full_catalog():
     with get_flask_app().app_context():
-        providers = DataProvider.query.filter_by(is_active=True).all()
+        providers = available_providers(DataProvider.query.filter_by(is_active=True).all())
 
         for provider in providers:
             hours_since_sync = 999
             if provider.last_sync_at:
                 hours_since_sync = (datetime.utcnow() - provider.last_sync_at).total_seconds() / 3600
 
-            if hours_since_sync >= provider.sync_interval_hours:
-                sync_provider.delay(provider.id, 'full')
+            if hours_since_sync >= provider.sync_interval_hours and not running_sync_job_id(provider.id):
+                sync_provider.apply_async((provider.id, 'full'), queue=workload_queue(provider))
 
         return {'message': f'Checked {len(providers)} providers for full sync'}
 
 
+async def _probe(adapter):
+    try:
+        return await adapter.validate_connection()
+    finally:
+        await adapter.close()
+
+
 @celery_app.task
-def cleanup_expired_prices():
+def probe_open_circuits():
     with get_flask_app().app_context():
-        expired = PriceSource.query.filter(
-            PriceSource.expires_at < datetime.utcnow(),
-            PriceSource.is_valid == True
-        ).all()
+        providers = DataProvider.query.filter_by(is_active=True, circuit_state='open').all()
+        results = {}
 
-        for price_source in expired:
-            price_source.is_valid = False
+        for provider in providers:
+            if not due_for_probe(provider):
+                continue
+            try:
+                healthy = run_in_worker_loop(_probe(build_adapter(provider)))
+                results[provider.name] = record_probe_result(provider.id, healthy)
+            except Exception as e:
+                db.session.rollback()
+                results[provider.name] = record_probe_result(provider.id, False, e)
 
-        db.session.commit()
+        return {'message': f'Probed {len(results)} open circuits', 'states': results}
+
+
+@celery_app.task
+def cleanup_expired_prices(batch_size: int = DEFAULT_CLEANUP_BATCH_SIZE, archive_after_days: int = None):
+    with get_flask_app().app_context():
+        if archive_after_days is None:
+            archive_after_days = PRICE_ARCHIVE_AFTER_DAYS
+
+        expired = expire_prices(batch_size)
+        result = {
+            'message': f"Marked {expired['rows']} price sources as invalid",
+            'expired': expired
+        }
+
+        if expired['rows']:
+            result['consensus'] = refresh_price_consensus()
+
+        if archive_after_days:
+            archived = archive_invalid_prices(archive_after_days, batch_size)
+            result['archived'] = archived
+            result['message'] += f", archived {archived['rows']}"
+
+        return result
+
+
+def replay_dead_letter(entry):
+    """Re-queue the task a dead letter came from and mark the entry replayed."""
+    payload = entry.payload or {}
+    queue = workload_queue(entry.provider)
+    if entry.kind == 'sync':
+        task = sync_provider.apply_async((entry.provider_id, payload.get('job_type', 'full')), queue=queue)
+    elif entry.kind == 'chunk':
+        task = sync_provider_chunk.apply_async(
+            (entry.sync_job_id, payload['chunk_index'], payload['chunk'], True), queue=queue
+        )
+    elif entry.kind == 'refresh':
+        task = refresh_provider_prices.apply_async((
+            entry.provider_id, payload.get('external_ids', []),
+            payload.get('categories', []), payload.get('material_ids', [])
+        ), queue=queue)
+    elif entry.kind == 'items':
+        external_ids = payload.get('external_ids', [])
+        material_ids = _material_ids_for(entry.provider_id, external_ids)
+        task = refresh_provider_prices.apply_async((entry.provider_id, external_ids, [], material_ids), queue=queue)
+    else:
+        raise ValueError(f"Unknown dead letter kind: {entry.kind}")
 
-        return {'message': f'Marked {len(expired)} price sources as invalid'}
+    entry.status = 'replayed'
+    entry.replay_task_id = task.id
+    entry.replayed_at = datetime.utcnow()
+    db.session.commit()
+    return task
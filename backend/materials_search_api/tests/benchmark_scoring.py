@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for best-value scoring (src/services/scoring.py)
+
+Scores synthetic candidates split into comparison groups of ~10 offers, as
+BOM alternatives does, at 1k to 100k candidates:
+- score_candidates on prepared NumPy arrays
+- score_offers on offer dicts (includes the dict -> array conversion)
+- a per-row Python loop computing the same score, for reference
+
+Runs without a database or a running backend:
+    python tests/benchmark_scoring.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.scoring import (  # noqa: E402
+    score_candidates, score_offers, resolve_weights,
+    LEAD_TIME_BUCKETS, AVAILABILITY_POINTS, MAX_SUPPLIER_RATING
+)
+
+GROUP_SIZE = 10
+UNITS = ['SF', 'LF', 'EA']
+AVAILABILITY = ['in_stock', 'limited_stock', 'out_of_stock', None]
+
+
+def make_offers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.round(rng.lognormal(3, 1, n), 2)
+    factors = rng.choice([1.0, 8.0, 32.0], n)
+    lead_times = rng.integers(0, 45, n)
+    ratings = np.round(rng.uniform(0, 5, n), 1)
+    units = rng.integers(0, len(UNITS), n)
+    availability = rng.integers(0, len(AVAILABILITY), n)
+    offers = [
+        {
+            'price': float(prices[i]),
+            'lead_time_days': int(lead_times[i]),
+            'availability': AVAILABILITY[availability[i]],
+            'supplier_rating': float(ratings[i]),
+            'normalized_unit': UNITS[units[i]],
+            'normalized_unit_price': round(float(prices[i] / factors[i]), 6)
+        }
+        for i in range(n)
+    ]
+    groups = np.arange(n) // GROUP_SIZE
+    return offers, groups
+
+
+def python_scores(offers, groups, weights=None):
+    """The same score, one offer at a time."""
+    weights = resolve_weights(weights)
+    best_price, best_unit_price = {}, {}
+    for offer, group in zip(offers, groups):
+        if offer['price'] and offer['price'] > 0:
+            best_price[group] = min(best_price.get(group, float('inf')), offer['price'])
+        key = (group, offer['normalized_unit'])
+        if offer['normalized_unit_price'] and offer['normalized_unit_price'] > 0:
+            best_unit_price[key] = min(best_unit_price.get(key, float('inf')), offer['normalized_unit_price'])
+
+    scores = []
+    for offer, group in zip(offers, groups):
+        total = 0.0
+        if offer['price'] and offer['price'] > 0:
+            total += weights['price'] * best_price[group] / offer['price']
+        unit_price = offer['normalized_unit_price']
+        if unit_price and unit_price > 0:
+            total += weights['unit_price'] * best_unit_price[(group, offer['normalized_unit'])] / unit_price
+        lead_time = offer['lead_time_days']
+        if lead_time:
+            for days, points in LEAD_TIME_BUCKETS:
+                if lead_time < days:
+                    total += weights['lead_time'] * points
+                    break
+        total += weights['availability'] * AVAILABILITY_POINTS.get(offer['availability'], 0.0)
+        rating = offer['supplier_rating'] or 0.0
+        total += weights['rating'] * min(max(rating / MAX_SUPPLIER_RATING, 0.0), 1.0)
+        scores.append(total * 100.0 / sum(weights.values()))
+    return scores
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'candidates':>10}  {'arrays ms':>10}  {'offers ms':>10}  {'python ms':>10}  {'speedup':>8}")
+    for n in args.sizes:
+        offers, groups = make_offers(n)
+        arrays = {
+            'lead_times': np.array([o['lead_time_days'] for o in offers], dtype=np.float64),
+            'availability': [o['availability'] for o in offers],
+            'ratings': np.array([o['supplier_rating'] for o in offers]),
+            'unit_prices': np.array([o['normalized_unit_price'] for o in offers]),
+            'units': [o['normalized_unit'] for o in offers],
+        }
+        prices = np.array([o['price'] for o in offers])
+
+        array_time, vectorized = timed(lambda: score_candidates(prices, groups=groups, **arrays), args.repeat)
+        offer_time, _ = timed(lambda: score_offers(offers, groups=groups), args.repeat)
+        python_time, reference = timed(lambda: python_scores(offers, groups), max(args.repeat // 2, 1))
+
+        assert np.allclose(vectorized, reference), 'vectorized and reference scores differ'
+        print(f"{n:>10}  {array_time * 1e3:>10.2f}  {offer_time * 1e3:>10.2f}  {python_time * 1e3:>10.2f}  "
+              f"{python_time / array_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Shared fixtures for the unit tests.
+
+The app runs with TestingConfig (in-memory SQLite), a fresh schema per test,
+rate limiting off and Celery tasks executed eagerly, so no Redis is needed.
+"""
+
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app as flask_app, limiter  # noqa: E402
+from src.celery_app import celery_app  # noqa: E402
+from src.models.user import db as _db  # noqa: E402
+from src.models.material import Supplier, DataProvider  # noqa: E402
+
+# e2e_test.py needs a running backend; benchmark_scoring.py is a script.
+collect_ignore = ['e2e_test.py', 'benchmark_scoring.py']
+
+
+@pytest.fixture(scope='session')
+def app():
+    limiter.enabled = False
+    celery_app.conf.task_always_eager = True
+    return flask_app
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        yield _db
+        _db.session.remove()
+
+
+@pytest.fixture
+def supplier(db):
+    supplier = Supplier(name='Acme Supply', rating=4.0)
+    db.session.add(supplier)
+    db.session.commit()
+    return supplier
+
+
+@pytest.fixture
+def provider(db):
+    provider = DataProvider(name='demo', provider_type='api', config={})
+    db.session.add(provider)
+    db.session.commit()
+    return provider
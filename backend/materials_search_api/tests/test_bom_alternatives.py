@@ -0,0 +1,66 @@
+import pytest
+
+from src.cache import cache
+from src.models.bom import BillOfMaterials, BOMItem
+from src.models.material import Material, Supplier
+from src.models.user import User
+from src.services.bom_alternatives import get_bom_alternatives
+from src.services.comparison import create_canonical_material, add_variant_to_canonical, mark_comparisons_stale
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(app):
+    with app.app_context():
+        cache.clear()
+
+
+@pytest.fixture
+def bom(db, supplier):
+    budget = Supplier(name='Budget Builders', rating=2.0)
+    user = User(username='buyer', email='buyer@example.com')
+    db.session.add_all([budget, user])
+    db.session.flush()
+    current = Material(name='Plywood 3/4 in 4x8', category='Lumber', unit='EA', price=40.0, supplier_id=supplier.id)
+    cheaper = Material(name='Plywood 3/4in 4x8', category='Lumber', unit='EA', price=30.0, supplier_id=budget.id,
+                       lead_time_days=20)
+    db.session.add_all([current, cheaper])
+    db.session.flush()
+    bom = BillOfMaterials(user_id=user.id, name='Deck')
+    db.session.add(bom)
+    db.session.flush()
+    db.session.add(BOMItem(bom_id=bom.id, material_id=current.id, quantity=10, unit_price_snapshot=38.0))
+    db.session.commit()
+
+    canonical = create_canonical_material('Plywood 3/4 in 4x8', 'Lumber')
+    for material in (current, cheaper):
+        add_variant_to_canonical(
+            canonical.id, material.supplier_id, material.price, material.unit, material_id=material.id,
+            lead_time_days=material.lead_time_days, availability='in_stock'
+        )
+    return bom
+
+
+def test_cheapest_offer_and_savings(db, bom):
+    result = get_bom_alternatives(bom)
+
+    line = result['lines'][0]
+    assert line['unit_price'] == 40.0
+    assert line['alternatives_count'] == 1
+    assert line['cheapest']['price'] == 30.0
+    assert line['cheapest']['line_savings'] == 100.0
+    assert result['potential_savings'] == 100.0
+    assert result['optimized_total'] == 300.0
+
+
+def test_results_are_cached_until_an_offer_changes(db, bom):
+    first = get_bom_alternatives(bom)
+    assert get_bom_alternatives(bom) == first
+
+    budget = Supplier.query.filter_by(name='Budget Builders').one()
+    budget.rating = 5.0
+    mark_comparisons_stale(supplier_id=budget.id)
+    db.session.commit()
+
+    second = get_bom_alternatives(bom)
+    assert second['lines'][0]['cheapest']['supplier_rating'] == 5.0
+    assert first['lines'][0]['cheapest']['supplier_rating'] == 2.0
@@ -0,0 +1,92 @@
+from itertools import combinations
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.services import bom_optimizer
+from src.services.bom_optimizer import (
+    UNCOVERED_PENALTY, build_cost_matrix, optimize_supplier_assignment,
+    _set_cost, _solve_exact, _solve_local_search
+)
+
+
+def _offer(material_id, supplier_id, price, lead_time_days=0, availability='in_stock', minimum_order=None):
+    return {
+        'material_id': material_id, 'supplier_id': supplier_id, 'price': price,
+        'lead_time_days': lead_time_days, 'availability': availability, 'minimum_order': minimum_order
+    }
+
+
+def _line(material_id, quantity=1):
+    return SimpleNamespace(material_id=material_id, quantity=quantity)
+
+
+def _brute_force(cost, k):
+    return min(_set_cost(cost, list(subset)) for subset in combinations(range(cost.shape[1]), k))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_exact_matches_brute_force(seed):
+    cost = np.random.RandomState(seed).uniform(1, 100, size=(30, 8))
+
+    for k in (1, 2, 3):
+        assert _set_cost(cost, _solve_exact(cost, k)) == pytest.approx(_brute_force(cost, k))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_local_search_reaches_the_exact_optimum_on_small_instances(seed):
+    rng = np.random.RandomState(seed)
+    cost = rng.uniform(1, 100, size=(40, 10))
+    cost[rng.uniform(size=cost.shape) < 0.3] = UNCOVERED_PENALTY
+
+    for k in (2, 3):
+        exact = _set_cost(cost, _solve_exact(cost, k))
+        local = _set_cost(cost, _solve_local_search(cost, k, deadline=float('inf')))
+        assert local == pytest.approx(exact)
+
+
+def test_cost_matrix_applies_minimum_order_and_filters():
+    lines = [_line(1, quantity=5), _line(2, quantity=1)]
+    offers = [
+        [_offer(1, 10, 2.0, minimum_order=50), _offer(3, 20, 4.0)],
+        [_offer(2, 10, 1.0, lead_time_days=30), _offer(4, 20, 9.0, availability='Out of Stock')],
+    ]
+
+    cost, choice, suppliers, flat = build_cost_matrix(lines, offers, max_lead_time_days=14)
+
+    assert suppliers == [10, 20]
+    assert cost[0].tolist() == [100.0, 20.0]
+    assert cost[1].tolist() == [UNCOVERED_PENALTY, UNCOVERED_PENALTY]
+    assert choice[1].tolist() == [-1, -1]
+    assert len(flat) == 2
+
+
+def test_supplier_cap_trades_price_for_fewer_suppliers():
+    lines = [_line(1), _line(2), _line(3)]
+    offers = [
+        [_offer(1, 10, 5.0), _offer(4, 20, 6.0), _offer(7, 30, 6.0)],
+        [_offer(2, 10, 5.0), _offer(5, 30, 4.0)],
+        [_offer(3, 20, 5.0), _offer(6, 30, 6.0)],
+    ]
+
+    uncapped, flat, method, considered = optimize_supplier_assignment(lines, offers)
+    capped, flat, _, _ = optimize_supplier_assignment(lines, offers, max_suppliers=1)
+
+    assert method == 'exact'
+    assert considered == 3
+    assert [flat[i]['price'] for i in uncapped] == [5.0, 4.0, 5.0]
+    assert [flat[i]['supplier_id'] for i in capped] == [30, 30, 30]
+    assert [flat[i]['price'] for i in capped] == [6.0, 4.0, 6.0]
+
+
+def test_large_instances_use_local_search(monkeypatch):
+    monkeypatch.setattr(bom_optimizer, 'EXACT_MAX_EVALUATIONS', 0)
+    lines = [_line(i) for i in range(6)]
+    offers = [[_offer(100 + s, s, float(1 + (i + s) % 4)) for s in range(5)] for i in range(6)]
+
+    picks, flat, method, _ = optimize_supplier_assignment(lines, offers, max_suppliers=2)
+
+    assert method == 'local_search'
+    assert all(i >= 0 for i in picks)
+    assert len({flat[i]['supplier_id'] for i in picks}) <= 2
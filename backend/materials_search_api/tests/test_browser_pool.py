@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+
+from src.integrations import browser_pool
+from src.integrations.browser_pool import (
+    BrowserPool, HostThrottle, run_in_worker_loop, get_shared_browser_pool, shutdown_worker_loop
+)
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.unrouted = 0
+
+    def is_closed(self):
+        return self.closed
+
+    async def unroute(self, pattern):
+        self.unrouted += 1
+
+
+class FakeContext:
+    def __init__(self):
+        self.page = FakePage()
+        self.closed = False
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, user_agent=None):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def browser():
+    return FakeBrowser()
+
+
+def _pool(browser, size):
+    pool = BrowserPool(size)
+    # A connected browser is reused as-is, so Playwright is never launched.
+    pool._browser = browser
+    return pool
+
+
+def test_pool_never_opens_more_contexts_than_its_size(browser):
+    pool = _pool(browser, size=2)
+    active = []
+    peak = []
+
+    async def borrow():
+        async with pool.page():
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def run():
+        await asyncio.gather(*(borrow() for _ in range(6)))
+
+    asyncio.run(run())
+
+    assert max(peak) == 2
+    assert len(browser.contexts) == 2
+    assert len(pool._idle) == 2
+
+
+def test_released_pages_are_reused_and_unrouted(browser):
+    pool = _pool(browser, size=2)
+
+    async def run():
+        async with pool.page() as first:
+            pass
+        async with pool.page() as second:
+            pass
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert second is first
+    assert first.unrouted == 2
+    assert len(browser.contexts) == 1
+
+
+@pytest.mark.parametrize('crash', ['page', 'browser'])
+def test_crashed_slots_are_dropped_and_rebuilt(browser, crash):
+    pool = _pool(browser, size=1)
+
+    async def run():
+        async with pool.page() as page:
+            if crash == 'page':
+                page.closed = True
+            else:
+                browser.connected = False
+        browser.connected = True
+        async with pool.page() as page:
+            return page
+
+    replacement = asyncio.run(run())
+
+    assert browser.contexts[0].closed
+    assert replacement is browser.contexts[1].page
+
+
+def test_a_failing_borrower_still_frees_its_slot(browser):
+    pool = _pool(browser, size=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with pool.page():
+                raise RuntimeError('navigation failed')
+        async with pool.page() as page:
+            return page
+
+    assert asyncio.run(run()) is browser.contexts[0].page
+
+
+def test_close_closes_idle_contexts_and_the_browser(browser):
+    pool = _pool(browser, size=2)
+
+    async def run():
+        async with pool.page():
+            pass
+        await pool.close()
+
+    asyncio.run(run())
+
+    assert browser.contexts[0].closed
+    assert browser.closed
+    assert pool._idle == []
+
+
+def test_host_throttle_spaces_requests_per_host():
+    throttle = HostThrottle()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await throttle.wait('https://a.example.com/1', 0.05)
+        await throttle.wait('https://b.example.com/1', 0.05)
+        other_host = loop.time() - started
+        await throttle.wait('https://a.example.com/2', 0.05)
+        return other_host, loop.time() - started
+
+    other_host, same_host = asyncio.run(run())
+
+    assert other_host < 0.04
+    assert same_host >= 0.045
+
+
+@pytest.fixture
+def worker_loop(monkeypatch):
+    monkeypatch.setattr(browser_pool, '_worker_loop', None)
+    monkeypatch.setattr(browser_pool, '_shared_pools', {})
+    yield
+    shutdown_worker_loop()
+
+
+def test_worker_loop_and_shared_pool_outlive_each_task(worker_loop):
+    async def task():
+        return asyncio.get_running_loop(), get_shared_browser_pool()
+
+    first_loop, first_pool = run_in_worker_loop(task())
+    second_loop, second_pool = run_in_worker_loop(task())
+
+    assert second_loop is first_loop
+    assert second_pool is first_pool is not None
+    assert get_shared_browser_pool(headless=False) is None
+
+
+def test_shared_pool_is_only_handed_out_on_the_worker_loop(worker_loop):
+    async def task():
+        return get_shared_browser_pool()
+
+    assert asyncio.run(task()) is None
+
+
+def test_shutdown_closes_shared_pools_and_the_loop(worker_loop, browser):
+    async def task():
+        pool = get_shared_browser_pool()
+        pool._browser = browser
+        return asyncio.get_running_loop()
+
+    loop = run_in_worker_loop(task())
+    shutdown_worker_loop()
+
+    assert browser.closed
+    assert loop.is_closed()
+    assert browser_pool._shared_pools == {}
@@ -0,0 +1,75 @@
+import pytest
+
+from src.models.comparison import CanonicalMaterial, CanonicalMaterialStats, MaterialVariant
+from src.services.canonical_stats import refresh_canonical_stats
+
+LISTING = '/api/v1/canonical-materials'
+
+
+@pytest.fixture
+def catalog(db, supplier):
+    # (name, variant prices): spreads of 0%, 50%, 100%, and one without variants.
+    canonicals = {}
+    for name, prices in (('Rebar', [10.0, 10.0]), ('Plywood', [20.0, 30.0]), ('Drywall', [5.0, 7.5, 10.0]), ('Gravel', [])):
+        canonical = CanonicalMaterial(name=name, category='Test')
+        db.session.add(canonical)
+        db.session.flush()
+        for price in prices:
+            db.session.add(MaterialVariant(
+                canonical_material_id=canonical.id, supplier_id=supplier.id, price=price, unit='EA'
+            ))
+        canonicals[name] = canonical
+    db.session.commit()
+    refresh_canonical_stats([c.id for c in canonicals.values()])
+    return canonicals
+
+
+def _names(response):
+    return [row['name'] for row in response.get_json()['canonical_materials']]
+
+
+def test_stats_are_aggregated_per_canonical(db, catalog):
+    drywall = db.session.get(CanonicalMaterialStats, catalog['Drywall'].id)
+    gravel = db.session.get(CanonicalMaterialStats, catalog['Gravel'].id)
+
+    assert (drywall.variant_count, drywall.min_price, drywall.max_price, drywall.avg_price) == (3, 5.0, 10.0, 7.5)
+    assert drywall.price_spread == 5.0
+    assert drywall.price_spread_percent == 100.0
+    assert (gravel.variant_count, gravel.min_price, gravel.price_spread_percent) == (0, 0.0, 0.0)
+
+
+def test_listing_sorts_and_filters_on_stats(app, catalog):
+    client = app.test_client()
+
+    widest = client.get(f'{LISTING}?sort_by=price_spread_percent&sort_order=desc')
+    multi = client.get(f'{LISTING}?min_variant_count=2&sort_by=name')
+
+    # Ties (both 0%) fall back to the id, in the same direction.
+    assert _names(widest) == ['Drywall', 'Plywood', 'Gravel', 'Rebar']
+    assert _names(multi) == ['Drywall', 'Plywood', 'Rebar']
+    assert widest.get_json()['canonical_materials'][0]['variant_count'] == 3
+
+
+def test_canonical_without_a_stats_row_is_still_listed(app, db, catalog):
+    CanonicalMaterialStats.query.filter_by(canonical_material_id=catalog['Gravel'].id).delete()
+    db.session.commit()
+
+    rows = app.test_client().get(f'{LISTING}?sort_by=name').get_json()['canonical_materials']
+
+    gravel = next(row for row in rows if row['name'] == 'Gravel')
+    assert gravel['variant_count'] == 0
+
+
+@pytest.mark.parametrize('sort_by', ['min_price', 'price_spread', 'last_updated', 'name'])
+def test_cursor_pages_cover_every_row_once(app, catalog, sort_by):
+    client = app.test_client()
+    seen, cursor = [], None
+    while True:
+        url = f'{LISTING}?sort_by={sort_by}&use_cursor=true&per_page=1'
+        body = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        seen.extend(row['id'] for row in body['canonical_materials'])
+        cursor = body['next_cursor']
+        if not body['has_next']:
+            break
+
+    assert sorted(seen) == sorted(c.id for c in catalog.values())
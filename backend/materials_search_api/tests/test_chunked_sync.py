@@ -0,0 +1,94 @@
+import pytest
+
+from src.integrations.base import DataProviderAdapter, MaterialPrice, SyncCheckpoint
+from src.models.material import DeadLetter, Material, PriceSource, ProviderMaterialMap, SyncJob
+from src.services import sync_lock
+from src.services.sync_lock import acquire_provider_lease, running_sync_job_id
+from src.tasks import sync_tasks
+from src.tasks.sync_tasks import sync_provider_chunk, finalize_sync_job
+
+CHUNKS = [{'category': 'Steel'}, {'category': 'Lumber'}]
+
+
+class CategoryAdapter(DataProviderAdapter):
+    """Two pages of two items per category; `broken` crashes after its first page."""
+
+    def __init__(self, broken=None):
+        super().__init__({'name': 'categories'})
+        self.broken = broken
+
+    async def iter_prices(self, category=None, limit=100, checkpoint=None, **kwargs):
+        self.items_failed = 0
+        for page in (1, 2):
+            if category == self.broken and page == 2:
+                raise ValueError('layout changed')
+            for i in range(2):
+                yield MaterialPrice(external_id=f'{category}-{page}-{i}', name=f'{category} {page}-{i}',
+                                    price=10.0 + i, unit='EA')
+            yield SyncCheckpoint(pages_done=page, items_yielded=page * 2)
+
+    async def fetch_prices(self, category=None, search_query=None, limit=100):
+        raise NotImplementedError
+
+    async def fetch_single_price(self, external_id):
+        return None
+
+    async def search_materials(self, query, limit=20):
+        return []
+
+    async def validate_connection(self):
+        return True
+
+
+@pytest.fixture(autouse=True)
+def local_leases(monkeypatch):
+    monkeypatch.setattr(sync_lock, '_backend', sync_lock._LocalLeases())
+
+
+@pytest.fixture
+def chord_job(db, supplier, provider, monkeypatch):
+    monkeypatch.setattr(sync_tasks.update_price_consensus, 'delay', lambda *args: None)
+    for chunk in CHUNKS:
+        for page in (1, 2):
+            for i in range(2):
+                external_id = f"{chunk['category']}-{page}-{i}"
+                material = Material(name=external_id, category=chunk['category'], price=1.0, unit='EA',
+                                    supplier_id=supplier.id)
+                db.session.add(material)
+                db.session.flush()
+                db.session.add(ProviderMaterialMap(provider_id=provider.id, external_id=external_id,
+                                                   material_id=material.id, status='matched'))
+    job = SyncJob(provider_id=provider.id, job_type='full', status='running', chunks_total=len(CHUNKS))
+    db.session.add(job)
+    db.session.commit()
+    acquire_provider_lease(provider.id, job.id)
+    return job
+
+
+def _run_chord(monkeypatch, job, adapter):
+    monkeypatch.setattr(sync_tasks, 'build_adapter', lambda provider: adapter)
+    results = [sync_provider_chunk.run(job.id, index, chunk) for index, chunk in enumerate(CHUNKS)]
+    return finalize_sync_job.run(results, job.id)
+
+
+def test_job_counts_rows_a_failed_chunk_wrote_before_failing(db, monkeypatch, provider, chord_job):
+    summary = _run_chord(monkeypatch, chord_job, CategoryAdapter(broken='Lumber'))
+
+    assert (summary['chunks_completed'], summary['chunks_failed']) == (1, 1)
+    # Four rows from the healthy chunk and two from the broken chunk's first page.
+    assert PriceSource.query.count() == 6
+    assert summary['items_processed'] == 6
+    db.session.expire_all()
+    job = db.session.get(SyncJob, chord_job.id)
+    assert (job.items_processed, job.chunks_completed, job.chunks_failed) == (6, 1, 1)
+    assert job.status == 'completed'
+    assert 'chunk 1: layout changed' in job.error_message
+    assert DeadLetter.query.filter_by(kind='chunk').count() == 1
+    assert running_sync_job_id(provider.id) is None
+
+
+def test_healthy_chord_counts_every_row_once(db, monkeypatch, chord_job):
+    summary = _run_chord(monkeypatch, chord_job, CategoryAdapter())
+
+    assert summary['status'] == 'completed'
+    assert summary['items_processed'] == PriceSource.query.count() == 8
@@ -0,0 +1,73 @@
+import pytest
+
+from src.models.comparison import CanonicalComparison, MaterialVariant
+from src.models.material import Material, Supplier
+from src.services.comparison import (
+    create_canonical_material, add_variant_to_canonical, mark_comparisons_stale,
+    get_canonical_comparison, refresh_stale_comparisons
+)
+from src.services.units import apply_normalized_price
+
+
+@pytest.fixture
+def canonical(db, supplier):
+    canonical = create_canonical_material('Drywall 1/2 in 4x8', 'Drywall')
+    other = Supplier(name='Budget Builders', rating=3.0)
+    db.session.add(other)
+    db.session.commit()
+    material = Material(name='Drywall 1/2 in 4x8', category='Drywall', unit='EA', price=14.0, supplier_id=supplier.id)
+    db.session.add(material)
+    db.session.commit()
+    add_variant_to_canonical(canonical.id, supplier.id, 14.0, 'EA', material_id=material.id)
+    add_variant_to_canonical(canonical.id, other.id, 12.0, 'EA')
+    return canonical
+
+
+def test_adding_a_variant_materializes_the_comparison(db, canonical):
+    record = db.session.get(CanonicalComparison, canonical.id)
+
+    assert not record.is_stale
+    assert [c['price'] for c in record.comparisons] == [12.0, 14.0]
+    assert record.price_range == {'min': 12.0, 'max': 14.0, 'avg': 13.0}
+    assert record.price_statistics['variant_count'] == 2
+
+
+@pytest.mark.parametrize('scope', ['canonical', 'supplier', 'material', 'unrelated'])
+def test_mark_stale_scopes(db, canonical, supplier, scope):
+    material_id = MaterialVariant.query.filter(MaterialVariant.material_id.isnot(None)).one().material_id
+    kwargs = {
+        'canonical': {'canonical_ids': [canonical.id]},
+        'supplier': {'supplier_id': supplier.id},
+        'material': {'material_ids': [material_id]},
+        'unrelated': {'material_ids': [material_id + 100]},
+    }[scope]
+
+    marked = mark_comparisons_stale(**kwargs)
+    db.session.commit()
+
+    assert marked == (0 if scope == 'unrelated' else 1)
+    db.session.expire_all()
+    assert db.session.get(CanonicalComparison, canonical.id).is_stale is (scope != 'unrelated')
+
+
+def test_stale_comparison_is_rebuilt_on_read(db, canonical):
+    variant = MaterialVariant.query.filter_by(price=12.0).one()
+    variant.price = 20.0
+    apply_normalized_price(variant)
+    mark_comparisons_stale(canonical_ids=[canonical.id])
+    db.session.commit()
+
+    record = get_canonical_comparison(canonical.id)
+
+    assert not record.is_stale
+    assert [c['price'] for c in record.comparisons] == [14.0, 20.0]
+    assert get_canonical_comparison(canonical.id + 100) is None
+
+
+def test_refresh_stale_creates_missing_rows(db, canonical):
+    CanonicalComparison.query.delete()
+    db.session.commit()
+
+    assert refresh_stale_comparisons(batch_size=1) == 1
+    assert refresh_stale_comparisons() == 0
+    assert db.session.get(CanonicalComparison, canonical.id) is not None
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from src.models.material import Material, MaterialPriceConsensus, PriceHistory, PriceSource
+from src.services.consensus import compute_consensus, refresh_price_consensus, summarize_sources
+
+
+def _source(db, material, provider, price, unit=None, confidence=1.0, external_id=None, is_valid=True):
+    source = PriceSource(
+        material_id=material.id, provider_id=provider.id, price=price, unit=unit,
+        confidence_score=confidence, is_valid=is_valid,
+        external_id=external_id or f'{material.id}-{price}-{unit}'
+    )
+    db.session.add(source)
+    return source
+
+
+@pytest.fixture
+def rebar(db, supplier):
+    material = Material(name='Rebar', category='Steel', price=100.0, unit='TON', supplier_id=supplier.id)
+    db.session.add(material)
+    db.session.commit()
+    return material
+
+
+def test_outliers_are_dropped_per_material():
+    material = np.array([1, 1, 1, 1, 2, 2])
+    price = np.array([10.0, 10.2, 9.8, 50.0, 5.0, 5.0])
+    weight = np.ones(6)
+
+    stats = compute_consensus(material, price, weight)
+
+    assert stats['material_id'].tolist() == [1, 2]
+    assert stats['outlier_count'].tolist() == [1, 0]
+    assert stats['consensus_price'][0] == pytest.approx(10.0)
+    assert stats['consensus_price'][1] == pytest.approx(5.0)
+    assert stats['max_price'][0] == 50.0
+
+
+def test_confidence_weights_the_consensus():
+    stats = compute_consensus(np.array([1, 1]), np.array([10.0, 10.5]), np.array([1.0, 0.0]))
+
+    assert stats['consensus_price'][0] == pytest.approx(10.0)
+
+
+def test_confidence_grows_with_agreeing_sources():
+    one = compute_consensus(np.array([1]), np.array([10.0]), np.array([1.0]))
+    three = compute_consensus(np.array([1, 1, 1]), np.array([10.0, 10.0, 10.0]), np.ones(3))
+
+    assert three['confidence'][0] > one['confidence'][0]
+
+
+def test_refresh_converts_units_and_drops_incompatible_sources(db, provider, rebar):
+    _source(db, rebar, provider, 110.0, unit='ton')
+    _source(db, rebar, provider, 0.055, unit='lb')  # 110 per ton
+    _source(db, rebar, provider, 3.0, unit='gal')  # not a weight
+    db.session.commit()
+
+    result = refresh_price_consensus()
+
+    assert result == {'materials': 1, 'prices_updated': 1}
+    consensus = db.session.get(MaterialPriceConsensus, rebar.id)
+    assert consensus.source_count == 2
+    assert consensus.consensus_price == pytest.approx(110.0)
+    db.session.expire_all()
+    assert rebar.price == 110.0
+    assert [h.price for h in PriceHistory.query.filter_by(material_id=rebar.id)] == [110.0]
+
+
+def test_refresh_ignores_invalid_sources_and_small_changes(db, provider, rebar):
+    _source(db, rebar, provider, 100.001, unit='TON')
+    _source(db, rebar, provider, 500.0, unit='TON', is_valid=False)
+    db.session.commit()
+
+    result = refresh_price_consensus(material_ids=[rebar.id])
+
+    assert result == {'materials': 1, 'prices_updated': 0}
+    assert PriceHistory.query.count() == 0
+
+
+def test_summarize_sources_uses_the_material_unit(db, provider, rebar):
+    sources = [_source(db, rebar, provider, 0.05, unit='LB'), _source(db, rebar, provider, 100.0, unit='TON')]
+
+    summary = summarize_sources(rebar, sources)
+
+    assert summary['source_count'] == 2
+    assert summary['consensus_price'] == pytest.approx(100.0)
+    assert summarize_sources(rebar, [_source(db, rebar, provider, 3.0, unit='GAL')]) is None
+
+
+def test_price_sources_endpoint_serves_the_stored_consensus(app, db, provider, rebar):
+    _source(db, rebar, provider, 100.0, unit='TON')
+    _source(db, rebar, provider, 104.0, unit='TON')
+    _source(db, rebar, provider, 900.0, unit='TON', is_valid=False)
+    db.session.commit()
+    refresh_price_consensus()
+    stored = db.session.get(MaterialPriceConsensus, rebar.id)
+    # A stored row that no longer matches the sources shows it is what gets served.
+    stored.consensus_price = 123.0
+    db.session.commit()
+    url = f'/api/v1/materials/{rebar.id}/price-sources'
+
+    valid = app.test_client().get(url).get_json()['statistics']
+    everything = app.test_client().get(f'{url}?valid_only=false').get_json()['statistics']
+
+    assert valid['consensus_price'] == 123.0
+    assert valid['computed_at'] == stored.computed_at.isoformat()
+    assert everything['count'] == 3
+    assert everything['computed_at'] is None
+
+
+def test_price_sources_endpoint_computes_before_the_first_refresh(app, db, provider, rebar):
+    _source(db, rebar, provider, 100.0, unit='TON')
+    db.session.commit()
+
+    statistics = app.test_client().get(f'/api/v1/materials/{rebar.id}/price-sources').get_json()['statistics']
+
+    assert statistics['consensus_price'] == 100.0
+    assert statistics['count'] == 1
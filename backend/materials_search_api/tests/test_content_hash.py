@@ -0,0 +1,66 @@
+import pytest
+
+from src.integrations.base import MaterialPrice
+from src.models.material import Material, PriceSource, ProviderMaterialMap
+from src.services.ingestion import price_content_hash, write_price_batch
+
+
+def _price(price=12.5, **raw):
+    return MaterialPrice(
+        external_id='sku-1', name='Rebar #4', price=price, unit='EA',
+        raw_data={'price': price, **raw}
+    )
+
+
+@pytest.fixture
+def mapped(db, supplier, provider):
+    material = Material(name='Rebar #4', category='Steel', price=12.5, unit='EA', supplier_id=supplier.id)
+    db.session.add(material)
+    db.session.flush()
+    db.session.add(ProviderMaterialMap(
+        provider_id=provider.id, external_id='sku-1', material_id=material.id, status='matched'
+    ))
+    db.session.commit()
+    return material
+
+
+def test_hash_ignores_volatile_raw_fields():
+    assert price_content_hash(_price(rank=1, fetched='10:00')) == price_content_hash(_price(rank=7, fetched='10:05'))
+    assert price_content_hash(_price(12.5)) != price_content_hash(_price(13.0))
+    assert price_content_hash(_price(availability='in_stock')) != price_content_hash(_price(availability='backorder'))
+
+
+def test_unchanged_price_only_extends_expiry(db, provider, mapped):
+    assert write_price_batch(provider.id, [_price()])['written'] == 1
+    db.session.commit()
+    first = PriceSource.query.one()
+    first_expiry = first.expires_at
+
+    counts = write_price_batch(provider.id, [_price(rank=3)])
+    db.session.commit()
+
+    assert counts == {'received': 1, 'duplicates': 0, 'written': 0, 'unchanged': 1, 'unmatched': 0}
+    db.session.expire_all()
+    assert PriceSource.query.count() == 1
+    assert PriceSource.query.one().expires_at >= first_expiry
+
+
+def test_changed_price_inserts_new_row(db, provider, mapped):
+    write_price_batch(provider.id, [_price()])
+    db.session.commit()
+
+    counts = write_price_batch(provider.id, [_price(13.0)])
+    db.session.commit()
+
+    assert counts['written'] == 1
+    assert counts['unchanged'] == 0
+    assert sorted(p.price for p in PriceSource.query) == [12.5, 13.0]
+
+
+def test_duplicates_within_a_batch_keep_the_last(db, provider, mapped):
+    counts = write_price_batch(provider.id, [_price(12.5), _price(14.0)])
+    db.session.commit()
+
+    assert (counts['received'], counts['duplicates']) == (1, 1)
+    assert counts['written'] == 1
+    assert PriceSource.query.one().price == 14.0
@@ -0,0 +1,95 @@
+import numpy as np
+
+from src.models.comparison import CanonicalMaterial, CanonicalComparison, MaterialVariant
+from src.models.material import Material
+from src.services.entity_resolution import (
+    cluster_block, minhash_signatures, numeric_key, material_signature_text, resolve_canonical_materials
+)
+
+
+def _material(db, supplier, name, unit='EA', category='Plumbing', price=10.0):
+    material = Material(name=name, category=category, unit=unit, price=price, supplier_id=supplier.id)
+    db.session.add(material)
+    return material
+
+
+def test_numeric_key_keeps_sizes_apart():
+    assert numeric_key('Copper Pipe 2 in x 10 ft') == '2 10'
+    assert numeric_key('Copper Pipe 2.0" x 10\'') == '2 10'
+    assert numeric_key('Copper Pipe 3 in x 10 ft') != numeric_key('Copper Pipe 2 in x 10 ft')
+
+
+def test_near_duplicates_share_a_cluster():
+    texts = [material_signature_text(name, None) for name in (
+        'Copper Pipe Type L 2 in x 10 ft',
+        'Copper Pipe Type L 2in x 10ft',
+        'Copper Pipe, Type L, 2 in x 10 ft',
+        'PVC Conduit Schedule 40 2 in x 10 ft',
+    )]
+
+    labels = cluster_block(minhash_signatures(texts))
+
+    assert labels[0] == labels[1] == labels[2]
+    assert labels[3] != labels[0]
+
+
+def test_identical_signatures_always_match():
+    signatures = minhash_signatures(['Drywall Sheet 4 x 8'] * 3)
+
+    assert len(set(cluster_block(signatures).tolist())) == 1
+    assert np.array_equal(signatures[0], signatures[2])
+
+
+def test_resolver_groups_duplicates_and_is_idempotent(db, supplier):
+    for name in ('Copper Pipe Type L 2 in x 10 ft', 'Copper Pipe Type L 2in x 10ft'):
+        _material(db, supplier, name)
+    _material(db, supplier, 'Copper Pipe Type L 3 in x 10 ft')
+    _material(db, supplier, 'Copper Pipe Type L 2 in x 10 ft', unit='LF')
+    db.session.commit()
+
+    first = resolve_canonical_materials()
+    second = resolve_canonical_materials()
+
+    assert first['canonicals_created'] == 1
+    assert first['variants_created'] == 2
+    assert second['canonicals_created'] == 0
+    assert second['variants_created'] == 0
+    assert {v.source for v in MaterialVariant.query} == {'resolver'}
+
+
+def test_new_duplicate_joins_the_existing_canonical(db, supplier):
+    _material(db, supplier, 'Copper Pipe Type L 2 in x 10 ft')
+    _material(db, supplier, 'Copper Pipe Type L 2in x 10ft')
+    db.session.commit()
+    resolve_canonical_materials()
+    canonical = CanonicalMaterial.query.one()
+    db.session.add(CanonicalComparison(
+        canonical_material_id=canonical.id, canonical={}, variants=[], comparisons=[],
+        price_range={}, price_statistics={}
+    ))
+    _material(db, supplier, 'Copper Pipe - Type L - 2 in x 10 ft')
+    db.session.commit()
+
+    result = resolve_canonical_materials()
+
+    assert result['canonicals_created'] == 0
+    assert result['variants_created'] == 1
+    assert MaterialVariant.query.filter_by(canonical_material_id=canonical.id).count() == 3
+    assert db.session.get(CanonicalComparison, canonical.id).is_stale
+
+
+def test_resolver_variants_follow_material_edits(db, supplier):
+    first = _material(db, supplier, 'Copper Pipe Type L 2 in x 10 ft')
+    _material(db, supplier, 'Copper Pipe Type L 2in x 10ft')
+    db.session.commit()
+    resolve_canonical_materials()
+
+    first.price = 99.0
+    first.availability = 'Out of Stock'
+    db.session.commit()
+    result = resolve_canonical_materials()
+
+    assert result['canonicals_refreshed'] == 1
+    variant = MaterialVariant.query.filter_by(material_id=first.id).one()
+    assert variant.price == 99.0
+    assert variant.availability == 'Out of Stock'
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from src import cache as cache_module
+from src.integrations.http_cache import CachingTransport, BYPASS_CACHE_HEADERS
+
+URL = 'https://prices.example.com/items?sku=42&api_key=secret'
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    monkeypatch.setattr(cache_module, '_local_cache', {})
+
+
+class Upstream:
+    """MockTransport handler that counts calls and answers with fixed headers."""
+
+    def __init__(self, cache_control='max-age=60', status_code=200):
+        self.cache_control = cache_control
+        self.status_code = status_code
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        headers = {'Cache-Control': self.cache_control} if self.cache_control else {}
+        return httpx.Response(self.status_code, headers=headers, json={'call': self.calls})
+
+
+def _fetch(transport, times=2, url=URL, method='GET', headers=None):
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [(await client.request(method, url, headers=headers)).json() for _ in range(times)]
+    return asyncio.run(run())
+
+
+def _transport(upstream, **kwargs):
+    return CachingTransport('acme', transport=httpx.MockTransport(upstream), **kwargs)
+
+
+def test_second_request_is_a_cache_hit():
+    upstream = Upstream()
+
+    bodies = _fetch(_transport(upstream))
+
+    assert bodies == [{'call': 1}, {'call': 1}]
+    assert upstream.calls == 1
+
+
+@pytest.mark.parametrize('method, url', [
+    ('POST', URL),
+    ('GET', 'https://prices.example.com/items?sku=43'),
+])
+def test_other_requests_miss(method, url):
+    upstream = Upstream()
+    transport = _transport(upstream)
+
+    _fetch(transport, times=1)
+    _fetch(transport, times=1, url=url, method=method)
+
+    assert upstream.calls == 2
+
+
+@pytest.mark.parametrize('cache_control', ['no-store', 'no-cache', 'private, max-age=60', None])
+def test_responses_that_forbid_or_omit_caching_are_not_stored(cache_control):
+    upstream = Upstream(cache_control)
+
+    _fetch(_transport(upstream))
+
+    assert upstream.calls == 2
+
+
+def test_no_cache_request_bypasses_a_stored_response():
+    upstream = Upstream()
+    transport = _transport(upstream)
+
+    _fetch(transport, times=1)
+    bodies = _fetch(transport, times=1, headers=BYPASS_CACHE_HEADERS)
+
+    assert bodies == [{'call': 2}]
+
+
+@pytest.mark.parametrize('cache_control, calls', [(None, 1), ('max-age=5', 1), ('no-store', 2)])
+def test_ttl_override_stores_anything_the_origin_does_not_forbid(cache_control, calls):
+    upstream = Upstream(cache_control)
+
+    _fetch(_transport(upstream, ttl=300))
+
+    assert upstream.calls == calls
+
+
+def test_ttl_override_expires_entries(monkeypatch):
+    upstream = Upstream(cache_control='max-age=3600')
+    transport = _transport(upstream, ttl=10)
+    clock = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: clock[0])
+
+    _fetch(transport, times=1)
+    clock[0] += 11
+    _fetch(transport, times=1)
+
+    assert upstream.calls == 2
+
+
+def test_record_writes_a_redacted_fixture_that_replay_serves(tmp_path):
+    upstream = Upstream(cache_control='no-store')
+    recorded = _fetch(_transport(upstream, mode='record', fixtures_dir=str(tmp_path)), times=1)
+
+    [fixture] = os.listdir(tmp_path / 'acme')
+    with open(tmp_path / 'acme' / fixture) as f:
+        stored = json.load(f)
+    assert stored['url'] == 'https://prices.example.com/items?sku=42&api_key=%2A%2A%2A'
+    assert stored['status_code'] == 200
+
+    offline = Upstream()
+    replayed = _fetch(_transport(offline, mode='replay', fixtures_dir=str(tmp_path)), times=1)
+    assert replayed == recorded
+    assert offline.calls == 0
+
+
+def test_replay_without_a_fixture_raises(tmp_path):
+    upstream = Upstream()
+
+    with pytest.raises(httpx.ConnectError, match='No recorded fixture'):
+        _fetch(_transport(upstream, mode='replay', fixtures_dir=str(tmp_path)), times=1)
+    assert upstream.calls == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CachingTransport('acme', mode='sometimes')
@@ -0,0 +1,159 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.integrations.base import MaterialPrice, SyncCheckpoint, ProviderError
+from src.integrations.http_scraper_provider import HttpScraperAdapter
+
+BASE_URL = 'https://shop.example.com'
+SELECTORS = {
+    'product_list': '.product',
+    'name': '.name',
+    'price': '.price',
+    'sku': '.sku',
+    'link': 'a.detail',
+    'next_page': 'a.next',
+}
+
+
+def _product(sku, name, price):
+    price_html = f'<span class="price">{price}</span>' if price else ''
+    return (
+        f'<li class="product"><a class="detail" href="/product/{sku}">'
+        f'<span class="name">{name}</span></a>{price_html}<span class="sku">{sku}</span></li>'
+    )
+
+
+def _page(products, next_href=None):
+    pager = f'<nav><a class="next" href="{next_href}">Next</a></nav>' if next_href else ''
+    return f'<html><body><ul>{"".join(products)}</ul>{pager}</body></html>'
+
+
+# Linked pages: /catalog -> /catalog/2 -> end.
+LINKED = {
+    '/catalog': _page([_product('A1', 'Copper Pipe 1/2 in', '$12.49'),
+                       _product('A2', 'Pipe cutter', None)], next_href='/catalog/2'),
+    '/catalog/2': _page([_product('A3', 'PVC Elbow 2 in', '$1,204.00')], next_href='#'),
+}
+# Numbered pages: page 3 is empty, which ends the crawl.
+NUMBERED = {
+    '/search?page=1': _page([_product('B1', 'Lumber 2x4 8 ft', '$4.10')]),
+    '/search?page=2': _page([_product('B2', 'Lumber 2x6 8 ft', '$6.20')]),
+    '/search?page=3': _page([]),
+}
+
+
+class Site:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def __call__(self, request):
+        path = request.url.raw_path.decode()
+        self.requested.append(path)
+        if path not in self.pages:
+            return httpx.Response(404)
+        return httpx.Response(200, html=self.pages[path])
+
+
+def _adapter(site, **config):
+    adapter = HttpScraperAdapter({
+        'name': 'shop',
+        'base_url': BASE_URL,
+        'config': {'selectors': SELECTORS, 'respect_robots_txt': False, 'delay_seconds': 0, **config},
+    })
+    adapter._client = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(site))
+    return adapter
+
+
+def _crawl(adapter, **kwargs):
+    async def run():
+        return [entry async for entry in adapter.iter_prices(**kwargs)]
+    return asyncio.run(run())
+
+
+def _prices(entries):
+    return [entry for entry in entries if isinstance(entry, MaterialPrice)]
+
+
+def _checkpoints(entries):
+    return [entry for entry in entries if isinstance(entry, SyncCheckpoint)]
+
+
+def test_selectors_are_extracted_into_prices():
+    site = Site(LINKED)
+    adapter = _adapter(site, search_url_template='{base_url}/catalog')
+
+    prices = _prices(_crawl(adapter))
+
+    assert [(p.external_id, p.name, p.price) for p in prices] == [
+        ('A1', 'Copper Pipe 1/2 in', 12.49),
+        ('A3', 'PVC Elbow 2 in', 1204.0),
+    ]
+    assert prices[0].source_url == f'{BASE_URL}/product/A1'
+    assert prices[0].raw_data['sku'] == 'A1'
+
+
+def test_next_page_links_are_followed_until_they_run_out():
+    site = Site(LINKED)
+    adapter = _adapter(site, search_url_template='{base_url}/catalog')
+
+    entries = _crawl(adapter)
+
+    assert site.requested == ['/catalog', '/catalog/2']
+    assert [c.pages_done for c in _checkpoints(entries)] == [1]
+    assert _checkpoints(entries)[0].next_url == f'{BASE_URL}/catalog/2'
+
+
+def test_page_numbers_stop_at_the_first_empty_page():
+    site = Site(NUMBERED)
+    adapter = _adapter(site, search_url_template='{base_url}/search?page={page}')
+
+    entries = _crawl(adapter)
+
+    assert site.requested == ['/search?page=1', '/search?page=2', '/search?page=3']
+    assert [p.external_id for p in _prices(entries)] == ['B1', 'B2']
+    assert [(c.pages_done, c.items_yielded) for c in _checkpoints(entries)] == [(1, 1), (2, 2)]
+
+
+@pytest.mark.parametrize('kwargs, requested', [
+    ({'max_pages': 1}, ['/search?page=1']),
+    ({'limit': 1}, ['/search?page=1']),
+    ({'start_page': 2, 'max_pages': 1}, ['/search?page=2']),
+])
+def test_crawl_window_and_limit(kwargs, requested):
+    site = Site(NUMBERED)
+
+    _crawl(_adapter(site, search_url_template='{base_url}/search?page={page}'), **kwargs)
+
+    assert site.requested == requested
+
+
+def test_crawl_resumes_from_a_checkpoint():
+    first = Site(LINKED)
+    checkpoint = _checkpoints(_crawl(_adapter(first, search_url_template='{base_url}/catalog')))[0]
+
+    site = Site(LINKED)
+    entries = _crawl(_adapter(site, search_url_template='{base_url}/catalog'), checkpoint=vars(checkpoint))
+
+    assert site.requested == ['/catalog/2']
+    assert [p.external_id for p in _prices(entries)] == ['A3']
+
+
+def test_numbered_crawl_resumes_at_the_next_page():
+    site = Site(NUMBERED)
+    adapter = _adapter(site, search_url_template='{base_url}/search?page={page}')
+
+    entries = _crawl(adapter, checkpoint={'pages_done': 1, 'items_yielded': 1})
+
+    assert site.requested == ['/search?page=2', '/search?page=3']
+    assert _checkpoints(entries)[-1].items_yielded == 2
+
+
+def test_http_errors_raise_provider_errors():
+    adapter = _adapter(Site({}), search_url_template='{base_url}/missing')
+
+    with pytest.raises(ProviderError) as error:
+        _crawl(adapter)
+    assert error.value.status_code == 404
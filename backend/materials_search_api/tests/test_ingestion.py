@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.integrations.base import DataProviderAdapter, MaterialPrice
+from src.models.material import Material, PriceSource, ProviderMaterialMap, SyncJob
+from src.services import ingestion
+from src.services.ingestion import stream_prices_to_db, write_price_batch
+
+ITEMS = 12
+
+
+class CountingAdapter(DataProviderAdapter):
+    """Yields ITEMS prices as fast as the pipeline takes them, counting each one."""
+
+    def __init__(self, items=ITEMS):
+        super().__init__({'name': 'counting'})
+        self.items = items
+        self.yielded = 0
+
+    async def iter_prices(self, limit=100, checkpoint=None, **kwargs):
+        self.items_failed = 0
+        for n in range(self.items):
+            self.yielded += 1
+            yield MaterialPrice(external_id=f'item-{n}', name=f'Item {n}', price=10.0 + n, unit='EA')
+
+    async def fetch_prices(self, category=None, search_query=None, limit=100):
+        raise NotImplementedError
+
+    async def fetch_single_price(self, external_id):
+        return None
+
+    async def search_materials(self, query, limit=20):
+        return []
+
+    async def validate_connection(self):
+        return True
+
+
+@pytest.fixture
+def mapped(db, supplier, provider):
+    for n in range(ITEMS):
+        material = Material(name=f'Item {n}', category='Steel', price=1.0, unit='EA', supplier_id=supplier.id)
+        db.session.add(material)
+        db.session.flush()
+        db.session.add(ProviderMaterialMap(provider_id=provider.id, external_id=f'item-{n}',
+                                           material_id=material.id, status='matched'))
+    job = SyncJob(provider_id=provider.id, job_type='full', status='running')
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+class SlowWriter:
+    """Wraps the executor-side writer, recording its thread and how far the producer got meanwhile."""
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.writes = []
+        self._write = ingestion._write_batch_in_context
+
+    def __call__(self, app, provider_id, sync_job_id, batch):
+        yielded_before = self.adapter.yielded
+        time.sleep(0.02)
+        counts = self._write(app, provider_id, sync_job_id, batch)
+        self.writes.append({'thread': threading.get_ident(), 'size': len(batch),
+                            'yielded_before': yielded_before, 'yielded_after': self.adapter.yielded})
+        return counts
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = SlowWriter(CountingAdapter())
+    monkeypatch.setattr(ingestion, '_write_batch_in_context', writer)
+    return writer
+
+
+def test_duplicates_in_a_batch_are_counted_once(db, provider, mapped):
+    first = MaterialPrice(external_id='item-0', name='Item 0', price=10.0, unit='EA')
+    second = MaterialPrice(external_id='item-1', name='Item 1', price=11.0, unit='EA')
+
+    counts = write_price_batch(provider.id, [first, first, second])
+
+    assert counts['received'] == 2
+    assert counts['duplicates'] == 1
+    assert counts['received'] == counts['written'] + counts['unchanged'] + counts['unmatched']
+
+
+def test_writes_run_off_the_event_loop_while_fetching_continues(db, provider, mapped, writer):
+    loop_threads = []
+
+    async def run():
+        loop_threads.append(threading.get_ident())
+        return await stream_prices_to_db(writer.adapter, provider.id, mapped.id, batch_size=4, queue_size=4)
+
+    totals = asyncio.run(run())
+
+    assert totals['written'] == ITEMS
+    assert totals['batches'] == 3
+    assert [w['size'] for w in writer.writes] == [4, 4, 4]
+    assert all(w['thread'] != loop_threads[0] for w in writer.writes)
+    # The producer kept filling the queue while the first batch was being written.
+    assert writer.writes[0]['yielded_after'] > writer.writes[0]['yielded_before']
+    db.session.expire_all()
+    assert db.session.get(SyncJob, mapped.id).items_processed == ITEMS
+    assert PriceSource.query.count() == ITEMS
+
+
+def test_full_queue_blocks_the_producer(db, provider, mapped, writer):
+    batch_size, queue_size = 2, 1
+
+    asyncio.run(stream_prices_to_db(
+        writer.adapter, provider.id, mapped.id, batch_size=batch_size, queue_size=queue_size
+    ))
+
+    # While a batch is written, the producer can only fill the queue (and hold
+    # one more item waiting to be put), never run ahead through the catalog.
+    written = 0
+    for write in writer.writes:
+        assert write['yielded_after'] - written <= batch_size + queue_size + 1
+        written += write['size']
+    assert written == ITEMS
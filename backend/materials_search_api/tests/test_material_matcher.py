@@ -0,0 +1,73 @@
+import pytest
+
+from src.integrations.base import MaterialPrice
+from src.models.material import Material, PriceSource, ProviderMaterialMap
+from src.services.ingestion import write_price_batch
+from src.services.material_matcher import CatalogIndex, match_pending_items
+
+
+@pytest.fixture
+def catalog(db, supplier):
+    materials = [
+        Material(name='Copper Pipe Type L 1/2 in x 10 ft', category='Plumbing', price=20.0, unit='EA',
+                 supplier_id=supplier.id),
+        Material(name='PVC Pipe Schedule 40 2 in x 10 ft', category='Plumbing', price=8.0, unit='EA',
+                 supplier_id=supplier.id),
+    ]
+    db.session.add_all(materials)
+    db.session.commit()
+    return materials
+
+
+def _offer(external_id, name, price=21.0):
+    return MaterialPrice(external_id=external_id, name=name, price=price, unit='EA', category='Plumbing')
+
+
+def test_index_matches_exact_then_fuzzy_names(db, catalog):
+    index = CatalogIndex.load()
+
+    assert index.match('copper pipe type L 1/2 in x 10 ft') == (catalog[0].id, 'name', 1.0)
+    material_id, method, score = index.match('PVC Pipe Sched 40 2 in x 10 ft', 'Plumbing')
+    assert (material_id, method) == (catalog[1].id, 'tokens')
+    assert 0.75 <= score < 1.0
+    assert index.match('Cedar fence picket') is None
+
+
+def test_unknown_items_are_queued_then_matched_and_written(db, provider, catalog):
+    counts = write_price_batch(provider.id, [_offer('cu-12', 'Copper Pipe Type L 1/2 in x 10 ft'),
+                                             _offer('fence', 'Cedar fence picket', 3.0)])
+    db.session.commit()
+
+    assert counts['unmatched'] == 2
+    assert PriceSource.query.count() == 0
+    assert ProviderMaterialMap.query.filter_by(status='pending').count() == 2
+
+    totals = match_pending_items(provider.id)
+
+    assert (totals['matched'], totals['unmatched'], totals['prices_written']) == (1, 1, 1)
+    assert totals['material_ids'] == [catalog[0].id]
+    entry = ProviderMaterialMap.query.filter_by(external_id='cu-12').one()
+    assert (entry.status, entry.material_id, entry.pending_price) == ('matched', catalog[0].id, None)
+    assert PriceSource.query.one().price == 21.0
+
+
+def test_matched_items_are_written_directly_next_time(db, provider, catalog):
+    write_price_batch(provider.id, [_offer('cu-12', 'Copper Pipe Type L 1/2 in x 10 ft')])
+    db.session.commit()
+    match_pending_items(provider.id)
+
+    counts = write_price_batch(provider.id, [_offer('cu-12', 'Copper Pipe Type L 1/2 in x 10 ft', 22.0)])
+    db.session.commit()
+
+    assert (counts['written'], counts['unmatched']) == (1, 0)
+
+
+def test_rematch_retries_unmatched_items(db, provider, supplier, catalog):
+    write_price_batch(provider.id, [_offer('fence', 'Cedar fence picket', 3.0)])
+    db.session.commit()
+    match_pending_items(provider.id)
+    db.session.add(Material(name='Cedar Fence Picket', category='Lumber', price=3.0, unit='EA', supplier_id=supplier.id))
+    db.session.commit()
+
+    assert match_pending_items(provider.id)['matched'] == 0
+    assert match_pending_items(provider.id, rematch=True)['matched'] == 1
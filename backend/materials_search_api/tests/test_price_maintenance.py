@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.material import Material, PriceSource, PriceSourceArchive
+from src.services.price_maintenance import expire_prices, archive_invalid_prices, read_archive
+
+NOW = datetime(2026, 1, 15)
+
+
+@pytest.fixture
+def material(db, supplier):
+    material = Material(name='Rebar', category='Steel', price=10.0, unit='EA', supplier_id=supplier.id)
+    db.session.add(material)
+    db.session.commit()
+    return material
+
+
+def _sources(db, material, provider, count, expires_at, is_valid=True):
+    db.session.add_all([
+        PriceSource(
+            material_id=material.id, provider_id=provider.id, external_id=f'sku-{i}', price=10.0 + i,
+            fetched_at=expires_at - timedelta(days=1), expires_at=expires_at, is_valid=is_valid
+        )
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_expiry_runs_in_batches(db, material, provider):
+    _sources(db, material, provider, 7, NOW - timedelta(hours=1))
+    _sources(db, material, provider, 2, NOW + timedelta(hours=1))
+
+    metrics = expire_prices(batch_size=3, now=NOW)
+
+    assert metrics['rows'] == 7
+    assert metrics['batches'] == 3
+    assert PriceSource.query.filter_by(is_valid=True).count() == 2
+
+
+def test_old_invalid_rows_are_archived_and_deleted(db, material, provider):
+    _sources(db, material, provider, 5, NOW - timedelta(days=40), is_valid=False)
+    _sources(db, material, provider, 2, NOW - timedelta(days=5), is_valid=False)
+
+    metrics = archive_invalid_prices(30, batch_size=2, now=NOW)
+
+    assert metrics['rows'] == 5
+    assert PriceSource.query.count() == 2
+    archives = PriceSourceArchive.query.order_by(PriceSourceArchive.id).all()
+    assert [a.row_count for a in archives] == [2, 2, 1]
+    restored = [row for archive in archives for row in read_archive(archive)]
+    assert sorted(row['price'] for row in restored) == [10.0, 11.0, 12.0, 13.0, 14.0]
+    assert archives[0].first_price_source_id == restored[0]['id']
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from src.services.provider_health import (
+    MIN_OUTCOMES, DEFAULT_COOLDOWN_SECONDS,
+    record_provider_outcome, record_probe_result, is_provider_available, due_for_probe, cooldown_seconds
+)
+
+
+def _fail(provider, times=1):
+    state = None
+    for _ in range(times):
+        state = record_provider_outcome(provider.id, False, error=TimeoutError('read timed out'))
+    return state
+
+
+def test_circuit_stays_closed_below_min_outcomes(db, provider):
+    assert _fail(provider, MIN_OUTCOMES - 1) == 'closed'
+    assert is_provider_available(provider)
+
+
+def test_circuit_opens_at_failure_threshold(db, provider):
+    record_provider_outcome(provider.id, True)
+    record_provider_outcome(provider.id, True)
+
+    assert _fail(provider, 1) == 'closed'
+    assert _fail(provider, 1) == 'open'
+    assert not is_provider_available(provider)
+    assert provider.health['errors']['TimeoutError'] == 2
+    assert provider.health['last_transition']['to'] == 'open'
+
+
+def test_probe_waits_for_cooldown(db, provider):
+    _fail(provider, MIN_OUTCOMES)
+    now = provider.circuit_opened_at
+
+    assert not due_for_probe(provider, now + timedelta(seconds=DEFAULT_COOLDOWN_SECONDS - 1))
+    assert due_for_probe(provider, now + timedelta(seconds=DEFAULT_COOLDOWN_SECONDS))
+
+
+def test_half_open_trial_closes_on_success(db, provider):
+    _fail(provider, MIN_OUTCOMES)
+
+    assert record_probe_result(provider.id, True) == 'half_open'
+    assert is_provider_available(provider)
+    assert record_provider_outcome(provider.id, True) == 'closed'
+    assert provider.health['outcomes'] == []
+    assert provider.circuit_opened_at is None
+
+
+def test_half_open_failure_reopens_with_longer_cooldown(db, provider):
+    _fail(provider, MIN_OUTCOMES)
+    record_probe_result(provider.id, True)
+
+    assert _fail(provider) == 'open'
+    assert cooldown_seconds(provider) == DEFAULT_COOLDOWN_SECONDS * 2
+
+
+def test_latency_histogram_accumulates(db, provider):
+    record_provider_outcome(provider.id, True, latencies_ms=[50, 300, 40000], errors={'http_503': 2})
+    record_provider_outcome(provider.id, True, latencies_ms=[80], errors={'http_503': 1})
+
+    assert provider.health['latency_ms'] == {'le_100': 2, 'le_500': 1, 'gt_30000': 1}
+    assert provider.health['errors'] == {'http_503': 3}
+    assert provider.health['requests'] == 4
+    assert provider.health['failure_rate'] == 0.0
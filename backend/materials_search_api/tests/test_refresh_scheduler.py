@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.integrations.base import DataProviderAdapter, MaterialPrice, SyncResult
+from src.models.material import Material, MaterialRefreshSchedule, PriceHistory, PriceSource, ProviderMaterialMap
+from src.services import sync_lock
+from src.services.refresh_scheduler import (
+    DEFAULT_VOLATILITY, compute_volatility, refresh_interval_hours, rebuild_refresh_schedule,
+    plan_refreshes, mark_refreshed
+)
+from src.tasks import sync_tasks
+from src.tasks.sync_tasks import refresh_provider_prices
+
+NOW = datetime(2026, 3, 1)
+
+
+def _history(db, material, prices):
+    for day, price in enumerate(prices):
+        db.session.add(PriceHistory(
+            material_id=material.id, price=price, recorded_at=NOW - timedelta(days=len(prices) - day)
+        ))
+
+
+@pytest.fixture
+def materials(db, supplier):
+    volatile = Material(name='Copper wire', category='Electrical', price=100.0, unit='LF', supplier_id=supplier.id)
+    steady = Material(name='Conduit', category='Electrical', price=10.0, unit='LF', supplier_id=supplier.id)
+    fresh = Material(name='Breaker', category='Electrical', price=30.0, unit='EA', supplier_id=supplier.id)
+    loner = Material(name='Gravel', category='Aggregates', price=30.0, unit='CY', supplier_id=supplier.id)
+    db.session.add_all([volatile, steady, fresh, loner])
+    db.session.flush()
+    _history(db, volatile, [100, 110, 95, 108, 90])
+    _history(db, steady, [10, 10.01, 10.0, 10.01, 10.0])
+    db.session.commit()
+    return {'volatile': volatile, 'steady': steady, 'fresh': fresh, 'loner': loner}
+
+
+def test_volatility_tiers():
+    assert refresh_interval_hours(0.10) == 1
+    assert refresh_interval_hours(0.03) == 6
+    assert refresh_interval_hours(0.01) == 24
+    assert refresh_interval_hours(0.0) == 168
+
+
+def test_volatility_is_measured_from_price_changes(db, materials):
+    measured = compute_volatility(now=NOW)
+
+    volatile, changes = measured[materials['volatile'].id]
+    assert changes == 4
+    assert volatile > 0.05
+    assert measured[materials['steady'].id][0] < 0.005
+    assert materials['fresh'].id not in measured
+
+
+def test_schedule_falls_back_to_category_then_default(db, materials):
+    rebuild_refresh_schedule(now=NOW)
+    schedule = {s.material_id: s for s in MaterialRefreshSchedule.query}
+
+    assert schedule[materials['volatile'].id].refresh_interval_hours == 1
+    assert schedule[materials['steady'].id].refresh_interval_hours == 168
+    assert schedule[materials['fresh'].id].volatility_source == 'category'
+    assert schedule[materials['loner'].id].volatility_source == 'default'
+    assert schedule[materials['loner'].id].volatility == DEFAULT_VOLATILITY
+    # Never refreshed or fetched: due immediately.
+    assert schedule[materials['loner'].id].next_refresh_at == NOW
+
+
+def test_plan_respects_the_provider_budget_and_staleness(db, provider, materials):
+    provider.rate_limit_requests, provider.rate_limit_period = 4, 3600
+    for name, material in materials.items():
+        db.session.add(PriceSource(material_id=material.id, provider_id=provider.id, external_id=name, price=1.0,
+                                   fetched_at=NOW - timedelta(days=10)))
+    db.session.commit()
+    rebuild_refresh_schedule(now=NOW)
+
+    plan = plan_refreshes([provider], now=NOW)[provider.id]
+
+    # Budget is half of 4 requests per hour; the most overdue (1 h interval) goes first.
+    assert len(plan['external_ids']) == 2
+    assert plan['external_ids'][0] == 'volatile'
+
+    mark_refreshed(plan['material_ids'], now=NOW)
+    again = plan_refreshes([provider], now=NOW)[provider.id]
+    assert not set(again['material_ids']) & set(plan['material_ids'])
+
+
+class CategoryAdapter(DataProviderAdapter):
+    """A category sync that only returns some of the category's items."""
+
+    def __init__(self, external_ids):
+        super().__init__({'name': 'category'})
+        self.external_ids = external_ids
+
+    async def fetch_prices(self, category=None, search_query=None, limit=100):
+        prices = [MaterialPrice(external_id=eid, name=eid, price=12.0, unit='LF') for eid in self.external_ids]
+        return SyncResult(success=True, items_processed=len(prices), items_failed=0, prices=prices)
+
+    async def fetch_single_price(self, external_id):
+        return None
+
+    async def search_materials(self, query, limit=20):
+        return []
+
+    async def validate_connection(self):
+        return True
+
+
+def test_category_refresh_only_marks_materials_it_priced(db, monkeypatch, provider, materials):
+    monkeypatch.setattr(sync_lock, '_backend', sync_lock._LocalLeases())
+    electrical = [materials[name] for name in ('volatile', 'steady', 'fresh')]
+    for material in electrical:
+        db.session.add(ProviderMaterialMap(provider_id=provider.id, external_id=material.name,
+                                           material_id=material.id, status='matched'))
+    db.session.commit()
+    rebuild_refresh_schedule()
+    monkeypatch.setattr(sync_tasks, 'build_adapter', lambda p: CategoryAdapter(['Copper wire', 'Conduit']))
+
+    refresh_provider_prices.run(provider.id, [], ['Electrical'], [m.id for m in electrical])
+
+    refreshed = {s.material_id for s in MaterialRefreshSchedule.query.filter(
+        MaterialRefreshSchedule.last_refreshed_at.isnot(None))}
+    assert refreshed == {materials['volatile'].id, materials['steady'].id}
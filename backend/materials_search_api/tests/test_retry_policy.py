@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.integrations.base import ProviderError, parse_retry_after
+from src.models.material import DeadLetter
+from src.tasks.retry_policy import (
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY, is_retryable, is_provider_error, retry_countdown, dead_letter
+)
+from src.tasks.sync_tasks import _record_outcome
+
+
+@pytest.mark.parametrize('exc, retryable', [
+    (ProviderError('throttled', status_code=429), True),
+    (ProviderError('unavailable', status_code=503), True),
+    (ProviderError('bad key', status_code=401), False),
+    (ProviderError('flaky', retryable=True), True),
+    (httpx.ConnectError('refused'), True),
+    (asyncio.TimeoutError(), True),
+    (ValueError('bad selector'), False),
+])
+def test_is_retryable(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def test_only_provider_and_network_errors_count_against_the_provider():
+    assert is_provider_error(ProviderError('bad key', status_code=401))
+    assert is_provider_error(ConnectionError())
+    assert not is_provider_error(KeyError('selectors'))
+    assert not is_provider_error(RuntimeError('database is locked'))
+
+
+def test_countdown_is_jittered_and_capped():
+    for retries in range(8):
+        delay = retry_countdown(TimeoutError(), retries)
+        assert 0 <= delay <= min(RETRY_BASE_DELAY * 2 ** retries, RETRY_MAX_DELAY)
+
+
+def test_retry_after_wins():
+    assert retry_countdown(ProviderError('throttled', status_code=429, retry_after=12), 5) == 12
+    assert retry_countdown(ProviderError('throttled', status_code=429, retry_after=10 ** 6), 0) == RETRY_MAX_DELAY
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_dead_letter_records_the_failure(db, provider):
+    entry = dead_letter(
+        'refresh', provider.id, {'external_ids': ['a', 'b']},
+        exc=ProviderError('unavailable', status_code=503), attempts=4
+    )
+
+    stored = db.session.get(DeadLetter, entry.id)
+    assert stored.status == 'pending'
+    assert stored.error_type == 'ProviderError'
+    assert stored.status_code == 503
+    assert stored.attempts == 4
+    assert stored.payload == {'external_ids': ['a', 'b']}
+
+
+def test_non_provider_errors_leave_the_circuit_alone(db, provider):
+    _record_outcome(provider.id, None, error=KeyError('selectors'))
+    assert not provider.health
+
+    _record_outcome(provider.id, None, error=ProviderError('unavailable', status_code=503))
+    assert provider.health['outcomes'] == [0]
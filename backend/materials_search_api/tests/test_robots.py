@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src import cache as cache_module
+from src.integrations import robots
+from src.integrations.http_scraper_provider import HttpScraperAdapter
+from src.integrations.robots import get_robots_rules, get_crawl_delay, ROBOTS_ERROR_TTL
+
+BASE_URL = 'https://shop.example.com'
+ROBOTS = 'User-agent: MaterialsSearch\nDisallow: /private\nCrawl-delay: 5\n'
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(cache_module, '_local_cache', {})
+    monkeypatch.setattr(robots, '_parsed', {})
+
+
+class Host:
+    def __init__(self, robots_txt=ROBOTS, robots_status=200):
+        self.robots_txt = robots_txt
+        self.robots_status = robots_status
+        self.requested = []
+
+    def __call__(self, request):
+        path = request.url.path
+        self.requested.append(path)
+        if path == '/robots.txt':
+            return httpx.Response(self.robots_status, text=self.robots_txt)
+        return httpx.Response(200, html='<html><body><ul></ul></body></html>')
+
+
+def _client(host):
+    return httpx.AsyncClient(transport=httpx.MockTransport(host))
+
+
+def _rules(host, url=f'{BASE_URL}/catalog'):
+    async def run():
+        async with _client(host) as client:
+            return await get_robots_rules(client, url)
+    return asyncio.run(run())
+
+
+def _adapter(host, **config):
+    adapter = HttpScraperAdapter({
+        'name': 'shop',
+        'base_url': BASE_URL,
+        'config': {'selectors': {'product_list': '.product'}, **config},
+    })
+    adapter._client = _client(host)
+    return adapter
+
+
+def test_parsed_rules_are_memoised_per_process():
+    host = Host()
+
+    first = _rules(host)
+    second = _rules(host, f'{BASE_URL}/other')
+
+    assert second is first
+    assert host.requested == ['/robots.txt']
+
+
+def test_shared_cache_body_is_reused_by_a_new_process(monkeypatch):
+    host = Host()
+    _rules(host)
+    # Another worker: nothing parsed in-process, but the body is in the shared cache.
+    monkeypatch.setattr(robots, '_parsed', {})
+
+    rules = _rules(host)
+
+    assert host.requested == ['/robots.txt']
+    assert not rules.can_fetch('MaterialsSearch', f'{BASE_URL}/private/x')
+
+
+@pytest.mark.parametrize('status, ttl', [(404, 86400), (503, ROBOTS_ERROR_TTL)])
+def test_missing_or_failing_robots_txt_allows_everything(monkeypatch, status, ttl):
+    stored = {}
+    monkeypatch.setattr(robots, 'shared_cache_set', lambda key, value, timeout: stored.update({key: timeout}))
+
+    rules = _rules(Host(robots_status=status))
+
+    assert rules.can_fetch('MaterialsSearch', f'{BASE_URL}/private/x')
+    assert stored == {'robots:shop.example.com': ttl}
+
+
+@pytest.mark.parametrize('robots_txt, delay', [
+    (ROBOTS, 5.0),
+    ('User-agent: *\nRequest-rate: 2/10\n', 5.0),
+    ('User-agent: *\nDisallow:\n', None),
+])
+def test_crawl_delay_falls_back_to_request_rate(robots_txt, delay):
+    assert get_crawl_delay(_rules(Host(robots_txt))) == delay
+
+
+def test_disallowed_urls_are_skipped_and_recorded():
+    host = Host()
+    adapter = _adapter(host, search_url_template='{base_url}/private/search?q={query}')
+
+    prices = asyncio.run(adapter.search_materials('pipe'))
+
+    assert prices == []
+    assert adapter.skipped_urls == [f'{BASE_URL}/private/search?q=pipe']
+    assert '/private/search' not in host.requested
+
+
+@pytest.mark.parametrize('config, delay', [
+    ({}, 5.0),
+    ({'delay_seconds': 0}, 5.0),
+    ({'delay_seconds': 8}, 8),
+    ({'http_cache_mode': 'replay', 'delay_seconds': 8}, 0),
+])
+def test_crawl_delay_is_a_floor_on_the_configured_delay(config, delay):
+    adapter = _adapter(Host(), **config)
+
+    assert asyncio.run(adapter.check_robots_txt(f'{BASE_URL}/catalog')) is True
+    assert adapter.delay_between_requests == delay
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.models.material import Project
+from src.models.user import User
+from src.services.scoring import DEFAULT_WEIGHTS, resolve_weights, scoring_weights_for, score_candidates, score_offers
+
+
+def test_resolve_weights_applies_overrides_in_order():
+    weights = resolve_weights({'price': 50, 'bogus': 9}, {'price': 60, 'rating': None})
+
+    assert weights['price'] == 60.0
+    assert weights['rating'] == DEFAULT_WEIGHTS['rating']
+    assert 'bogus' not in weights
+    assert resolve_weights({key: 0 for key in DEFAULT_WEIGHTS}) == DEFAULT_WEIGHTS
+
+
+def test_scores_compare_within_groups():
+    scores = score_candidates([10.0, 20.0, 100.0, 200.0], groups=[0, 0, 1, 1], weights={
+        'price': 1, 'unit_price': 0, 'lead_time': 0, 'availability': 0, 'rating': 0
+    })
+
+    assert scores.tolist() == [100.0, 50.0, 100.0, 50.0]
+
+
+def test_components_follow_the_documented_scales():
+    only = {'price': 0, 'unit_price': 0, 'lead_time': 0, 'availability': 0, 'rating': 0}
+
+    lead = score_candidates([1.0] * 5, lead_times=[3, 10, 20, 45, np.nan], weights={**only, 'lead_time': 1})
+    availability = score_candidates([1.0] * 3, availability=['In Stock', 'limited_stock', None],
+                                    weights={**only, 'availability': 1})
+    rating = score_candidates([1.0, 1.0], ratings=[5.0, np.nan], weights={**only, 'rating': 1})
+
+    assert lead == pytest.approx([100.0, 200 / 3, 100 / 3, 0.0, 0.0])
+    assert availability.tolist() == [100.0, 50.0, 0.0]
+    assert rating.tolist() == [100.0, 0.0]
+
+
+def test_unit_prices_only_compare_within_a_unit():
+    scores = score_candidates(
+        [1.0, 1.0, 1.0], unit_prices=[2.0, 4.0, 8.0], units=['SF', 'SF', 'LF'],
+        weights={'price': 0, 'unit_price': 1, 'lead_time': 0, 'availability': 0, 'rating': 0}
+    )
+
+    assert scores.tolist() == [100.0, 50.0, 100.0]
+
+
+def test_weights_change_the_winner():
+    offers = [
+        {'price': 10.0, 'lead_time_days': 40, 'availability': 'in_stock', 'supplier_rating': 3.0},
+        {'price': 12.0, 'lead_time_days': 2, 'availability': 'in_stock', 'supplier_rating': 3.0},
+    ]
+
+    assert np.argmax(score_offers(offers, weights={'price': 100, 'lead_time': 1})) == 0
+    assert np.argmax(score_offers(offers, weights={'price': 1, 'lead_time': 100})) == 1
+
+
+def test_project_weights_override_the_owners(db):
+    owner = User(username='owner', email='owner@example.com', scoring_weights={'price': 50, 'rating': 20})
+    other = User(username='other', email='other@example.com')
+    db.session.add_all([owner, other])
+    db.session.flush()
+    project = Project(name='Tower', user_id=owner.id, scoring_weights={'price': 70})
+    db.session.add(project)
+    db.session.commit()
+
+    weights = scoring_weights_for(owner.id, project.id)
+    assert weights['price'] == 70.0
+    assert weights['rating'] == 20.0
+
+    # Someone else's project, or no user at all, falls back to the caller's own weights.
+    assert scoring_weights_for(other.id, project.id) == DEFAULT_WEIGHTS
+    assert scoring_weights_for(None, project.id) == DEFAULT_WEIGHTS
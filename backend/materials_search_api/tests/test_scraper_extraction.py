@@ -0,0 +1,167 @@
+import asyncio
+
+from src.integrations.base import MaterialPrice, SyncCheckpoint
+from src.integrations.browser_pool import BrowserPool
+from src.integrations.scraper_provider import PlaywrightScraperAdapter, EXTRACT_ITEMS_JS
+
+BASE_URL = 'https://shop.example.com'
+SELECTORS = {
+    'product_list': '.product',
+    'name': '.name',
+    'price': '.price',
+    'link': 'a.detail',
+    'next_page': 'a.next',
+}
+
+
+class Response:
+    status = 200
+    headers = {}
+
+
+class StubPage:
+    """Playwright page stand-in: evaluate answers from `pages`, keyed by the current URL."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.url = 'about:blank'
+        self.visited = []
+        self.evaluations = []
+
+    async def goto(self, url, wait_until=None):
+        self.url = url
+        self.visited.append(url)
+        return Response()
+
+    async def wait_for_load_state(self, state):
+        pass
+
+    async def wait_for_selector(self, selector, timeout=None):
+        pass
+
+    async def evaluate(self, script, args):
+        self.evaluations.append((script, args))
+        result = self.pages[self.url]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def unroute(self, pattern):
+        pass
+
+    def is_closed(self):
+        return False
+
+
+class StubBrowser:
+    def __init__(self, page):
+        self.page = page
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self, user_agent=None):
+        browser = self
+
+        class Context:
+            async def new_page(self):
+                return browser.page
+
+            async def close(self):
+                pass
+
+        return Context()
+
+
+def _adapter(page, **config):
+    adapter = PlaywrightScraperAdapter({
+        'name': 'shop',
+        'base_url': BASE_URL,
+        'config': {'selectors': SELECTORS, 'respect_robots_txt': False, 'delay_seconds': 0,
+                   'search_url_template': '{base_url}/search?q={query}&page={page}', **config},
+    })
+    adapter._pool = BrowserPool(1)
+    adapter._pool._browser = StubBrowser(page)
+    return adapter
+
+
+def _url(page_number):
+    return f'{BASE_URL}/search?q=pipe&page={page_number}'
+
+
+def _crawl(adapter, **kwargs):
+    async def run():
+        return [entry async for entry in adapter.iter_prices(search_query='pipe', **kwargs)]
+    return asyncio.run(run())
+
+
+def test_each_page_is_extracted_with_one_evaluate_call():
+    page = StubPage({
+        _url(1): [{'name': 'Copper Pipe 1/2 in', 'price': '$12.49', 'link': '/product/cu-12'},
+                  {'name': 'PVC Elbow', 'price': '$1,204.00', 'link': '/product/pvc-2'}],
+        _url(2): [],
+    })
+
+    entries = _crawl(_adapter(page))
+
+    assert page.visited == [_url(1), _url(2)]
+    assert len(page.evaluations) == 2
+    script, args = page.evaluations[0]
+    assert script == EXTRACT_ITEMS_JS
+    assert args == {'productSelector': '.product', 'fields': {'name': '.name', 'price': '.price', 'link': 'a.detail'}}
+
+    prices = [e for e in entries if isinstance(e, MaterialPrice)]
+    assert [(p.name, p.price, p.source_url) for p in prices] == [
+        ('Copper Pipe 1/2 in', 12.49, f'{BASE_URL}/product/cu-12'),
+        ('PVC Elbow', 1204.0, f'{BASE_URL}/product/pvc-2'),
+    ]
+    assert prices[0].confidence_score == 0.7
+    assert [e.next_url for e in entries if isinstance(e, SyncCheckpoint)] == [_url(2)]
+
+
+def test_failed_evaluate_yields_no_items():
+    page = StubPage({_url(1): RuntimeError('Execution context was destroyed')})
+
+    assert _crawl(_adapter(page)) == []
+
+
+def test_unparseable_items_are_counted_as_failed(monkeypatch):
+    page = StubPage({
+        _url(1): [{'name': 'Copper Pipe', 'price': '$12.49'}, {'name': 'Bad', 'price': '$1'}],
+        _url(2): [],
+    })
+    adapter = _adapter(page)
+    parse = adapter._parse_item
+
+    def flaky_parse(item):
+        if item['name'] == 'Bad':
+            raise ValueError('bad price')
+        return parse(item)
+
+    monkeypatch.setattr(adapter, '_parse_item', flaky_parse)
+
+    prices = [e for e in _crawl(adapter) if isinstance(e, MaterialPrice)]
+
+    assert [p.name for p in prices] == ['Copper Pipe']
+    assert adapter.items_failed == 1
+
+
+def test_single_item_is_extracted_from_the_whole_document():
+    url = f'{BASE_URL}/product/cu-12'
+    page = StubPage({url: [{'name': 'Copper Pipe 1/2 in', 'price': '$12.49', 'link': url}]})
+
+    price = asyncio.run(_adapter(page).fetch_single_price('cu-12'))
+
+    _, args = page.evaluations[0]
+    assert args['productSelector'] is None
+    assert (price.name, price.price, price.source_url) == ('Copper Pipe 1/2 in', 12.49, url)
+
+
+def test_single_item_without_a_match_is_none():
+    url = f'{BASE_URL}/product/gone'
+    page = StubPage({url: []})
+
+    assert asyncio.run(_adapter(page).fetch_single_price('gone')) is None
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.models.material import Material
+from src.services import similarity
+from src.services.similarity import SimilarityIndex, get_similarity_index, similar_material_ids
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(similarity, '_index', None)
+    monkeypatch.setattr(similarity, '_index_signature', None)
+    monkeypatch.setattr(similarity, '_rebuilding', False)
+
+
+@pytest.fixture
+def catalog(db, supplier):
+    rows = [
+        ('Hot Rolled Steel Rebar #4 x 20 ft', 'Steel', 'EA', 12.0),
+        ('Hot Rolled Steel Rebar #4 x 20ft', 'Steel', 'EA', 12.5),
+        ('Hot Rolled Steel Rebar #5 x 20 ft', 'Steel', 'EA', 18.0),
+        ('Steel Angle 2 x 2 x 20 ft', 'Steel', 'EA', 40.0),
+        ('Hot Rolled Steel Rebar #4 x 20 ft', 'Lumber', 'EA', 12.0),
+    ]
+    materials = [
+        Material(name=name, category=category, unit=unit, price=price, supplier_id=supplier.id)
+        for name, category, unit, price in rows
+    ]
+    db.session.add_all(materials)
+    db.session.commit()
+    return materials
+
+
+def test_nearest_neighbours_rank_by_similarity(db, catalog):
+    results = similar_material_ids(catalog[0], k=3)
+
+    ids = [material_id for material_id, _ in results]
+    assert ids[0] == catalog[1].id
+    assert catalog[0].id not in ids
+    assert catalog[4].id not in ids
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_can_span_categories(db, catalog):
+    ids = [material_id for material_id, _ in similar_material_ids(catalog[0], k=10, same_category=False)]
+
+    assert catalog[4].id in ids
+
+
+def test_query_vector_for_unindexed_text(db, catalog):
+    index = SimilarityIndex.build()
+
+    results = index.search(*index.query_vector('steel rebar #4', unit='ea', price=12.0), k=2, category='Steel')
+
+    assert {material_id for material_id, _ in results} == {catalog[0].id, catalog[1].id}
+
+
+def test_rows_are_unit_length(db, catalog):
+    index = SimilarityIndex.build()
+
+    norms = np.sqrt(np.bincount(np.repeat(np.arange(len(index.ids)), np.diff(index.indptr)), weights=index.weights ** 2))
+    assert np.allclose(norms, 1.0, atol=1e-5)
+
+
+def test_stale_index_is_served_while_it_rebuilds(db, supplier, catalog):
+    index = get_similarity_index()
+    db.session.add(Material(name='Steel Channel 4 in', category='Steel', unit='EA', price=30.0, supplier_id=supplier.id))
+    db.session.commit()
+
+    # Rebuilds are rate-limited, so a young index is kept even though the catalog grew.
+    assert get_similarity_index() is index
+
+    index.built_at -= similarity.SIMILARITY_INDEX_MIN_REBUILD_SECONDS
+    assert get_similarity_index() is index
+    for _ in range(100):
+        if not similarity._rebuilding:
+            break
+        time.sleep(0.01)
+
+    rebuilt = get_similarity_index()
+    assert rebuilt is not index
+    assert len(rebuilt.ids) == len(catalog) + 1
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from src.integrations.base import DataProviderAdapter, MaterialPrice, SyncCheckpoint
+from src.models.material import Material, PriceSource, ProviderMaterialMap, SyncJob
+from src.services.ingestion import stream_prices_to_db, chunk_key
+
+PAGES = 3
+PAGE_SIZE = 2
+
+
+class PagedAdapter(DataProviderAdapter):
+    """Yields PAGES pages with a checkpoint after each; can crash once mid-crawl."""
+
+    def __init__(self, fail_on_page=None):
+        super().__init__({'name': 'paged'})
+        self.fail_on_page = fail_on_page
+        self.pages_fetched = []
+
+    async def iter_prices(self, limit=100, checkpoint=None, **kwargs):
+        self.items_failed = 0
+        start = (checkpoint or {}).get('pages_done', 0) + 1
+        for page in range(start, PAGES + 1):
+            if page == self.fail_on_page:
+                raise RuntimeError('browser crashed')
+            self.pages_fetched.append(page)
+            for i in range(PAGE_SIZE):
+                n = (page - 1) * PAGE_SIZE + i
+                yield MaterialPrice(external_id=f'item-{n}', name=f'Item {n}', price=10.0 + n, unit='EA')
+            yield SyncCheckpoint(pages_done=page, items_yielded=page * PAGE_SIZE)
+
+    async def fetch_prices(self, category=None, search_query=None, limit=100):
+        raise NotImplementedError
+
+    async def fetch_single_price(self, external_id):
+        return None
+
+    async def search_materials(self, query, limit=20):
+        return []
+
+    async def validate_connection(self):
+        return True
+
+
+@pytest.fixture
+def mapped_items(db, supplier, provider):
+    for n in range(PAGES * PAGE_SIZE):
+        material = Material(name=f'Item {n}', category='Steel', price=1.0, unit='EA', supplier_id=supplier.id)
+        db.session.add(material)
+        db.session.flush()
+        db.session.add(ProviderMaterialMap(
+            provider_id=provider.id, external_id=f'item-{n}', material_id=material.id, status='matched'
+        ))
+    db.session.commit()
+
+
+def _new_job(db, provider, **fields):
+    job = SyncJob(provider_id=provider.id, job_type='full', status='running', **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_checkpoint_is_saved_per_page_and_cleared_on_completion(db, provider, mapped_items):
+    job = _new_job(db, provider)
+
+    totals = asyncio.run(stream_prices_to_db(PagedAdapter(), provider.id, job.id, batch_size=100))
+
+    assert totals['written'] == PAGES * PAGE_SIZE
+    assert totals['resumed'] is False
+    db.session.expire_all()
+    assert job.checkpoint == {}
+
+
+def test_failed_crawl_resumes_after_last_checkpoint(db, provider, mapped_items):
+    job = _new_job(db, provider)
+    with pytest.raises(RuntimeError):
+        asyncio.run(stream_prices_to_db(PagedAdapter(fail_on_page=3), provider.id, job.id, batch_size=100))
+
+    db.session.expire_all()
+    saved = job.checkpoint[chunk_key(None)]
+    assert saved['pages_done'] == 2
+    assert saved['items_written'] == 2 * PAGE_SIZE
+
+    retry = PagedAdapter()
+    totals = asyncio.run(stream_prices_to_db(retry, provider.id, job.id, batch_size=100))
+
+    assert retry.pages_fetched == [3]
+    assert totals['resumed'] is True
+    assert totals['written'] == PAGE_SIZE
+    assert PriceSource.query.count() == PAGES * PAGE_SIZE
+    db.session.expire_all()
+    assert job.checkpoint == {}
+
+
+def test_new_job_inherits_unfinished_checkpoint(db, provider):
+    from src.tasks.sync_tasks import _start_sync_job
+    from src.services.sync_lock import release_provider_lease
+
+    previous = _new_job(db, provider, checkpoint={chunk_key(None): {'pages_done': 2, 'items_yielded': 4}})
+
+    job = _start_sync_job(provider.id, 'full')
+    try:
+        assert job.resumed_from_id == previous.id
+        assert job.checkpoint == previous.checkpoint
+    finally:
+        release_provider_lease(provider.id, job.id)
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from src.integrations.base import DataProviderAdapter, MaterialPrice, SyncResult
+from src.models.material import PriceSource, SyncJob
+from src.services import sync_lock
+from src.services.ingestion import stream_prices_to_db
+from src.services.sync_lock import (
+    LeaseLost, acquire_provider_lease, extend_provider_lease, release_provider_lease,
+    hold_provider_lease, running_sync_job_id, lease_heartbeat, check_lease
+)
+from src.tasks.sync_tasks import sync_provider, sync_provider_chunk
+
+
+class StaticAdapter(DataProviderAdapter):
+    async def fetch_prices(self, category=None, search_query=None, limit=100):
+        prices = [MaterialPrice(external_id='sku-1', name='Rebar', price=10.0, unit='EA')]
+        return SyncResult(success=True, items_processed=1, items_failed=0, prices=prices)
+
+    async def fetch_single_price(self, external_id):
+        return None
+
+    async def search_materials(self, query, limit=20):
+        return []
+
+    async def validate_connection(self):
+        return True
+
+
+@pytest.fixture(autouse=True)
+def local_leases(monkeypatch):
+    monkeypatch.setattr(sync_lock, '_backend', sync_lock._LocalLeases())
+
+
+@pytest.fixture
+def running_job(db, provider):
+    job = SyncJob(provider_id=provider.id, job_type='full', status='running', chunks_total=2)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_lease_has_a_single_owner():
+    assert acquire_provider_lease(1, 10)
+    assert not acquire_provider_lease(1, 11)
+    assert not extend_provider_lease(1, 11)
+    assert not release_provider_lease(1, 11)
+    assert running_sync_job_id(1) == 10
+
+    assert release_provider_lease(1, 10)
+    assert running_sync_job_id(1) is None
+    assert acquire_provider_lease(1, 11)
+
+
+def test_lease_expires_after_ttl():
+    assert acquire_provider_lease(1, 10, ttl=0.01)
+    time.sleep(0.02)
+
+    assert not extend_provider_lease(1, 10)
+    assert acquire_provider_lease(1, 11)
+
+
+def test_hold_extends_own_lease_or_takes_a_free_one():
+    assert hold_provider_lease(1, 10)
+    assert hold_provider_lease(1, 10)
+    assert not hold_provider_lease(1, 11)
+
+
+def test_heartbeat_reports_a_lease_taken_over():
+    acquire_provider_lease(1, 10)
+    with lease_heartbeat(1, 10, ttl=1, interval=0.01) as state:
+        check_lease(state)
+        release_provider_lease(1, 10)
+        acquire_provider_lease(1, 11)
+        time.sleep(0.05)
+
+        assert state['lost']
+        with pytest.raises(LeaseLost):
+            check_lease(state)
+
+
+def test_writer_stops_once_the_lease_is_lost(db, provider, running_job):
+    with pytest.raises(LeaseLost):
+        asyncio.run(stream_prices_to_db(
+            StaticAdapter({'name': 'static'}), provider.id, running_job.id, lease_state={'lost': True}
+        ))
+
+    assert PriceSource.query.count() == 0
+
+
+def test_concurrent_sync_coalesces_into_the_running_job(db, provider, running_job):
+    acquire_provider_lease(provider.id, running_job.id)
+
+    result = sync_provider.run(provider.id)
+
+    assert result == {'status': 'coalesced', 'sync_job_id': running_job.id}
+    assert SyncJob.query.count() == 1
+
+
+def test_chunk_of_a_superseded_job_stops(db, provider, running_job):
+    acquire_provider_lease(provider.id, running_job.id + 1)
+
+    result = sync_provider_chunk.run(running_job.id, 0, {})
+
+    assert result['superseded'] is True
+    db.session.expire_all()
+    assert running_job.chunks_failed == 1
+    assert running_sync_job_id(provider.id) == running_job.id + 1
@@ -0,0 +1,66 @@
+import pytest
+
+from src.models.material import Material
+from src.services.units import unit_code, parse_unit, unit_conversion, normalized_unit_price, apply_normalized_price
+
+
+@pytest.mark.parametrize('spelling, code', [
+    ('sq. ft', 'SF'),
+    ('Square Feet', 'SF'),
+    ('each', 'EA'),
+    ('LIN FT', 'LF'),
+    ('cu yd', 'CY'),
+    ('widgets', None),
+    (None, None),
+])
+def test_unit_code(spelling, code):
+    assert unit_code(spelling) == code
+
+
+@pytest.mark.parametrize('unit_text, name, code', [
+    ('$2.49/sq ft', '', 'SF'),
+    ('', 'Plywood 4x8 per sheet', 'SHT'),
+    ('', 'Shingles (bundle)', 'BDL'),
+    ('', 'Mystery item', 'EA'),
+])
+def test_parse_unit(unit_text, name, code):
+    assert parse_unit(unit_text, name) == code
+
+
+def test_measured_units_convert_to_a_base():
+    assert unit_conversion('yd') == ('LF', 3.0)
+    assert unit_conversion('ton') == ('LB', 2000.0)
+    assert unit_conversion('cf') == pytest.approx(('CY', 1 / 27))
+
+
+def test_package_units_need_a_size():
+    assert unit_conversion('sheet', {'dimensions': '4 x 8'}) == ('SF', 32.0)
+    assert unit_conversion('sheet', {'dimensions': '48 x 96'}) == ('SF', 32.0)
+    assert unit_conversion('bag', {'bag_weight_lb': 80}) == ('LB', 80.0)
+    assert unit_conversion('bag') == ('BAG', 1.0)
+
+
+def test_explicit_override_wins():
+    assert unit_conversion('EA', {'unit_conversion': {'unit': 'yd', 'factor': 2}}) == ('LF', 6.0)
+
+
+def test_sheets_of_different_sizes_compare_per_square_foot():
+    small = normalized_unit_price(32.0, 'sheet', {'dimensions': '4x8'})
+    large = normalized_unit_price(42.0, 'sheet', {'dimensions': '4x12'})
+
+    assert small == ('SF', 1.0)
+    assert large == ('SF', 0.875)
+
+
+def test_unknown_units_compare_only_with_themselves():
+    assert normalized_unit_price(5.0, 'widgets') == ('WIDGETS', 5.0)
+    assert normalized_unit_price(5.0, None) == (None, None)
+    assert normalized_unit_price(None, 'EA') == ('EA', None)
+
+
+def test_apply_normalized_price_uses_the_record_specs():
+    material = Material(price=64.0, unit='sheet', specifications={'sheet_area_sqft': 32})
+
+    apply_normalized_price(material)
+
+    assert (material.normalized_unit, material.normalized_unit_price) == ('SF', 2.0)
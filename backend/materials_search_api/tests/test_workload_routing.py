@@ -0,0 +1,62 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.models.material import DataProvider
+from src.services import sync_lock
+from src.tasks import sync_tasks
+from src.tasks.sync_tasks import workload_queue, interactive_queue
+
+
+@pytest.fixture(autouse=True)
+def local_leases(monkeypatch):
+    monkeypatch.setattr(sync_lock, '_backend', sync_lock._LocalLeases())
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    calls = []
+
+    class Result:
+        id = 'task-1'
+
+    def apply_async(args, queue=None, **kwargs):
+        calls.append((args, queue))
+        return Result()
+
+    monkeypatch.setattr(sync_tasks.sync_provider, 'apply_async', apply_async)
+    return calls
+
+
+def _provider(db, name, **config):
+    provider = DataProvider(name=name, provider_type='scraper', config=config)
+    db.session.add(provider)
+    db.session.commit()
+    return provider
+
+
+@pytest.mark.parametrize('name, config, background, interactive', [
+    ('demo', {}, 'api', 'interactive'),
+    ('http_scraper', {}, 'api', 'interactive'),
+    ('grainger', {}, 'browser', 'browser'),
+    ('playwright_scraper', {}, 'browser', 'browser'),
+    ('demo', {'queue': 'browser'}, 'browser', 'browser'),
+    ('unregistered', {}, 'api', 'interactive'),
+])
+def test_queues_follow_the_adapter_workload(db, name, config, background, interactive):
+    provider = _provider(db, name, **config)
+
+    assert workload_queue(provider) == background
+    assert interactive_queue(provider) == interactive
+
+
+@pytest.mark.parametrize('name, queue', [('demo', 'interactive'), ('grainger', 'browser')])
+def test_user_triggered_sync_is_routed_by_workload(app, db, queued, name, queue):
+    provider = _provider(db, name)
+    token = create_access_token(identity='1')
+
+    response = app.test_client().post(
+        f'/api/v1/providers/{provider.id}/sync', json={}, headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 200
+    assert queued == [((provider.id, 'full'), queue)]